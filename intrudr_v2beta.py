@@ -5,11 +5,21 @@ VERSION2 BETA
 
 """
 
-import sys, os, re, requests, random, threading, time, itertools, csv, warnings
-from urllib.parse import urlsplit, parse_qsl
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys, os, re, requests, random, threading, time, itertools, csv, warnings, bisect, queue, signal, asyncio, ssl, zlib
+import multiprocessing as mp, struct, mmap, array, argparse, hashlib, sqlite3, heapq, http.client, json, tempfile
+import base64, html, functools, collections, http.server, shutil, platform, subprocess, math, socket, secrets, hmac, difflib
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, parse_qsl, quote, unquote
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from requests import Request
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from colorama import Fore, Style, init
+try:
+	import resource   # peak RSS in the benchmark (Unix only)
+except ImportError:
+	resource = None
 
 init(autoreset=True)
 warnings.filterwarnings("ignore", message="Unverified HTTPS request")
@@ -23,16 +33,80 @@ except OverflowError:
 # ================================== CONFIG ==================================
 REQUEST_TIMEOUT = 60
 REQUEST_RETRIES = 1
+RETRY_POLICY = {                 # failure class -> retries allowed for it
+	"refused": REQUEST_RETRIES,  # connection refused
+	"timeout": REQUEST_RETRIES,  # connect/read timeout
+	"reset": REQUEST_RETRIES,    # connection reset / closed mid-response
+	"error": REQUEST_RETRIES,    # any other transport error
+	"5xx": 0,                    # 500-599 responses (often the finding itself, so not retried by default)
+	"429": 3,                    # Too Many Requests, honouring Retry-After
+}
+RETRY_BACKOFF_BASE = 0.5         # first retry delay (s), doubled per retry, with jitter
+RETRY_BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 120.0          # cap on a server-supplied Retry-After
 MAX_WORKERS = 12
-THROTTLE_SECONDS = 0.0
+SUBMIT_WINDOW_FACTOR = 4         # max in-flight tasks = MAX_WORKERS * SUBMIT_WINDOW_FACTOR (the AIMD limit replaces it when adaptive)
+ENGINE = "threads"               # "threads" (requests + ThreadPoolExecutor), "async" (asyncio, keep-alive pool), "raw" (async, exact template bytes) or "distributed" (leased to `worker` processes)
+ASYNC_CONCURRENCY = 500          # max in-flight requests for the async/raw engines
+PROCESS_WORKERS = 1              # >1 shards the attack across this many processes, each with MAX_WORKERS threads
+SHARD_BATCH_SIZE = 64            # results per message from a shard process to the parent
+DIST_LISTEN = "127.0.0.1:7070"   # distributed engine: address the coordinator listens on for workers
+DIST_TOKEN = None                # shared secret workers must present (None = a random one, printed at start)
+DIST_LEASE_SIZE = 256            # request indexes per lease handed to a worker
+DIST_LEASE_TIMEOUT = 30          # a worker silent this long (s) is dropped and its leases re-issued
+REORDER_WINDOW_MAX = 5000        # pause submission while this many out-of-order results are buffered
+THROTTLE_SECONDS = 0.0           # minimum spacing between sends (same as TARGET_RPS = 1 / THROTTLE_SECONDS)
+TARGET_RPS = 0                   # >0 caps the send rate across all workers/processes (token bucket)
+RATE_BURST = 1                   # token bucket size: sends allowed back to back before pacing kicks in
+REQUEST_JITTER = (0.02, 0.12)    # random delay (s) before each request; (0, 0) disables
+ADAPTIVE_CONCURRENCY = False     # AIMD: grow in-flight limit while healthy, halve on 429/503, errors, latency spikes
+ADAPTIVE_MIN = 1
+ADAPTIVE_MAX = 128               # ceiling (thread pool size for the threaded engine)
+ADAPTIVE_LATENCY_SPIKE = 3.0     # latency above this multiple of the running average counts as congestion
+MAX_BODY_BYTES = 0               # keep at most this many response body bytes (0 = all); the rest is skipped but counted
+STATUS_ONLY = False              # stop after the response headers: status + Content-Length only, body never read
 SUMMARY_FILENAME = "summary.csv"
+SUMMARY_META_FILENAME = "summary_meta.csv"   # summary.csv without the request/response columns, read by `diff`
+# Only interesting responses get their body stored and printed; every request still gets a
+# compact summary.csv row. Rules: "status" (codes), "length" / "words" / "lines" / "time"
+# ((min, max), None = open end), "regex" (searched in the body).
+MATCH = {}                       # e.g. {"status": (200, 302)}: interesting if any rule hits (empty = everything)
+FILTER = {}                      # e.g. {"length": (0, 150)}: not interesting if any rule hits
+AUTO_BASELINE = False            # also drop responses in the dominant status/length cluster
+BASELINE_SAMPLE = 30             # results observed before the baseline starts deciding
+BASELINE_LENGTH_TOLERANCE = 10   # length difference (bytes) still counted as the baseline cluster
 RESPONSE_PREVIEW_LEN = 2000
+OUTPUT_MODE = "compact"          # "compact": one refreshing status line, full output only for MATCH/FILTER hits; "verbose": every request printed
+PROGRESS_REFRESH = 0.5           # seconds between status line redraws in compact mode (10 s when stdout is not a terminal)
 SHOW_FULL_RESPONSE = True        # whether to print full response to console (capped by MAX_RESPONSE_PRINT)
 MAX_RESPONSE_PRINT = 100_000     # cap console print; set 0 for unlimited
 
+POOL_MAXSIZE = 0                 # keep-alive connections per host, shared by all threads; 0 = one per worker
+POOL_CONNECTIONS = 4             # hosts (target, redirects, proxy) with a cached connection pool
+POOL_WARMUP = 0                  # connections to open before the attack clock starts (0 = off)
+
+WORDLIST_MMAP_BYTES = 8 * 1024 * 1024   # wordlists at least this big are memory-mapped with a line-offset index instead of loaded
+LARGE_BODY_BYTES = 64 * 1024     # request bodies at least this big are sent as shared pre-encoded segments + per-request payloads (0 = off)
+
+# Payload processing, like Burp's: a rule chain per parameter / placeholder, applied in order to
+# every value before it is sent. Keys are parameter names, PH1.. or the original placeholder name.
+# Rules: "urlencode", "urlencode-all", "urldecode", "htmlencode", "base64", "base64decode", "hex",
+# "md5", "sha1", "sha256", "lower", "upper", "reverse", ("prefix", s), ("suffix", s), ("replace", old, new)
+PAYLOAD_PROCESSING = {}          # e.g. {"user": ["lower", ("suffix", "@corp.local")], "PH1": ["base64", "urlencode"]}
+PROCESSING_CACHE_SIZE = 65536    # processed values memoized per key (least recently used evicted)
+
 USE_PROXY = False
 PROXY_ADDR = "http://127.0.0.1:8080"
 RECORD_PREPARED_RAW = True
+RESPONSE_STORE = "archive"       # "archive" (rolling segment files + offset index) or "files" (one file per request)
+ARCHIVE_SEGMENT_BYTES = 256 * 1024 * 1024
+WRITER_BATCH_SIZE = 256          # rows the background writer persists per batch
+WRITER_QUEUE_MAX = 2048          # results waiting for the writer before the emitter blocks
+RESULTS_DB = None                # e.g. "results.db": also record results in an indexed SQLite DB inside the output folder
+DEDUPE_BODIES = True             # store each distinct response body once; summary rows refer to it by hash
+METRICS_FILE = None              # e.g. "metrics.jsonl" (a JSON snapshot per line) or "metrics.prom" (Prometheus text, rewritten) in the output folder
+METRICS_INTERVAL = 5             # seconds between metrics snapshots
+CHECKPOINT_INTERVAL = 30         # seconds between checkpoint saves, so `resume <outdir>` can continue an interrupted attack (0 = off)
 
 USER_AGENTS = [
 	"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
@@ -48,10 +122,15 @@ _thread_local = threading.local()
 
 # ================================== HELPERS ==================================
 def get_thread_session():
+	# per-thread Session (cookies, headers) on the process-wide adapter, so idle keep-alive
+	# connections are shared by every worker thread
 	s = getattr(_thread_local, "session", None)
-	if s is None:
+	if s is None or getattr(_thread_local, "adapter", None) is not _http_adapter:
 		s = requests.Session()
+		s.mount("http://", _http_adapter)
+		s.mount("https://", _http_adapter)
 		_thread_local.session = s
+		_thread_local.adapter = _http_adapter
 	return s
 
 def sanitize_filename(s):
@@ -79,11 +158,164 @@ def build_raw_bytes_from_prepared(prep):
 	head = (start_line + header_lines + "\r\n").encode("utf-8")
 	if prep.body is None:
 		return head
+	if isinstance(prep.body, ChainedBytes):
+		return ChainedBytes([head] + prep.body.parts)
 	if isinstance(prep.body, bytes):
 		return head + prep.body
 	else:
 		return head + str(prep.body).encode("utf-8")
 
+# ================================== CONNECTIONS ==================================
+class ConnStats:
+	# Connections opened vs requests sent on an already open one, and the time spent opening
+	# them (TCP connect + proxy CONNECT + TLS). Warmed connections count as reused once used.
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.requests = 0
+		self.new = 0
+		self.warmed = 0
+		self.handshake = 0.0
+		self.handshake_max = 0.0
+
+	def opened(self, seconds, warm=False):
+		with self.lock:
+			self.new += 1
+			self.warmed += warm
+			self.handshake += seconds
+			self.handshake_max = max(self.handshake_max, seconds)
+
+	def used(self):
+		with self.lock:
+			self.requests += 1
+
+	def snapshot(self):
+		with self.lock:
+			return {"requests": self.requests, "new": self.new, "warmed": self.warmed, "handshake": self.handshake, "handshake_max": self.handshake_max}
+
+	def merge(self, snap):
+		with self.lock:
+			self.requests += snap["requests"]
+			self.new += snap["new"]
+			self.warmed += snap["warmed"]
+			self.handshake += snap["handshake"]
+			self.handshake_max = max(self.handshake_max, snap["handshake_max"])
+
+	def describe(self):
+		opened_for_requests = self.new - self.warmed
+		reused = max(0, self.requests - opened_for_requests)
+		ratio = reused / self.requests * 100 if self.requests else 0.0
+		avg = self.handshake / self.new * 1000 if self.new else 0.0
+		warm = f" ({self.warmed} pre-warmed)" if self.warmed else ""
+		return (f"{self.new} opened{warm}, {reused}/{self.requests} requests on a reused connection ({ratio:.1f}% reuse) | "
+			f"handshake avg {avg:.1f} ms, max {self.handshake_max * 1000:.1f} ms, total {self.handshake:.2f} s")
+
+class _TimedConnectionMixin:
+	# also splits the open into TCP connect and TLS (+ proxy CONNECT) for the sending
+	# thread's current request, see _prepare_and_send
+	def _new_conn(self):
+		t = time.perf_counter()
+		try:
+			return super()._new_conn()
+		finally:
+			self.tcp_seconds = time.perf_counter() - t
+
+	def connect(self):
+		t = time.perf_counter()
+		self.tcp_seconds = 0.0
+		super().connect()
+		seconds = time.perf_counter() - t
+		warm = getattr(self, "warmup", False)
+		_conn_stats.opened(seconds, warm)
+		phases = getattr(_thread_local, "conn_phases", None)
+		if phases is not None and not warm:
+			tcp = self.tcp_seconds if isinstance(self, HTTPSConnection) or self._tunnel_host else seconds
+			phases[0] += tcp
+			phases[1] += seconds - tcp
+
+	def request(self, *args, **kwargs):
+		_conn_stats.used()
+		return super().request(*args, **kwargs)
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+	pass
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+	pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+	ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+	ConnectionCls = _TimedHTTPSConnection
+
+_TIMED_POOLS = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+class TimedHTTPAdapter(HTTPAdapter):
+	# HTTPAdapter whose pools (direct and through the proxy) use the instrumented connections
+	def init_poolmanager(self, *args, **kwargs):
+		super().init_poolmanager(*args, **kwargs)
+		self.poolmanager.pool_classes_by_scheme = _TIMED_POOLS
+
+	def proxy_manager_for(self, proxy, **proxy_kwargs):
+		manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+		manager.pool_classes_by_scheme = _TIMED_POOLS
+		return manager
+
+_conn_stats = ConnStats()
+_http_adapter = TimedHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=max(POOL_MAXSIZE, MAX_WORKERS))
+
+def configure_http_pool(workers):
+	# Adapter sized for this run's workers, and fresh counters. An adapter of the right size
+	# is kept, so back-to-back runs (batch jobs) reuse its idle connections.
+	global _http_adapter, _conn_stats
+	size = POOL_MAXSIZE or workers
+	_conn_stats = ConnStats()
+	if _http_adapter._pool_maxsize != size or _http_adapter._pool_connections != POOL_CONNECTIONS:
+		_http_adapter = TimedHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=size)
+	return size
+
+def warmup_http_pool(url, count):
+	# Opens `count` keep-alive connections to the target's pool (same pool key the requests
+	# will use, proxy and TLS settings included) and parks them idle.
+	proxies = {"http": PROXY_ADDR, "https": PROXY_ADDR} if USE_PROXY else None
+	get_conn = getattr(_http_adapter, "get_connection_with_tls_context", None)
+	if get_conn is not None:
+		pool = get_conn(Request("GET", url).prepare(), False, proxies)
+	else:
+		pool = _http_adapter.get_connection(url, proxies)
+
+	def open_one(_):
+		conn = pool._get_conn()
+		conn.warmup = True
+		try:
+			conn.connect()
+		finally:
+			conn.warmup = False
+		return conn
+
+	opened, errors = [], []
+	with ThreadPoolExecutor(max_workers=max(1, min(count, 32))) as ex:
+		for fut in [ex.submit(open_one, i) for i in range(count)]:
+			try:
+				opened.append(fut.result())
+			except Exception as e:
+				errors.append(e)
+	for conn in opened:
+		pool._put_conn(conn)
+	return len(opened), (errors[0] if errors else None)
+
+def _warmup_url(template, combos):
+	# the first request's URL; every request of an attack normally shares its origin
+	if not len(combos):
+		return None
+	return template.render(combos[0], USER_AGENTS[0])[0]
+
+def _print_warmup(opened, count, err):
+	if err is not None:
+		print(Fore.YELLOW + f"[*] Warmed up {opened}/{count} connections (first error: {err})" + Style.RESET_ALL)
+	else:
+		print(Fore.CYAN + f"[*] Warmed up {opened} connections" + Style.RESET_ALL)
+
 # ================================== PARSING & DETECTION ==================================
 def prompt_for_raw_request():
 	print(Fore.CYAN + "\n"*2 + "[*] Paste raw HTTP request. Use ^^...^^ wrapper for placeholders.\n[*] End with 'END' or '..'\n" + Style.RESET_ALL)
@@ -122,6 +354,9 @@ def parse_request(raw_request: str):
 		else:
 			body_lines.append(ln.rstrip("\r\n"))
 	body = "\n".join(body_lines).strip()
+	content_type = next((v for k, v in headers.items() if k.lower() == "content-type"), "")
+	if content_type.lower().startswith("multipart/"):
+		body = body.replace("\n", "\r\n")   # multipart parts are delimited by CRLF (RFC 2046)
 	return method, path, headers, body
 
 def detect_parameters_and_placeholders(path: str, body: str, headers: dict):
@@ -141,6 +376,8 @@ def detect_parameters_and_placeholders(path: str, body: str, headers: dict):
 					params[k] = v
 		except Exception:
 			pass
+	elif ct.lower().startswith("multipart/"):
+		pass   # part headers are not parameters; fuzz upload fields with ^^placeholders^^
 	else:
 		for k, v in re.findall(r'([^\s&=]+)=([^&\r\n]*)', body):
 			if k not in params:
@@ -161,6 +398,214 @@ def detect_parameters_and_placeholders(path: str, body: str, headers: dict):
 	placeholder_names = [f"PH{i+1}" for i in range(len(original_placeholders))]
 	return params, placeholder_names, original_placeholders
 
+# ================================== WORDLISTS ==================================
+WORDLIST_INDEX_HEADER = struct.Struct("<8sQQQc7x16s")   # magic, file size, mtime_ns, line count, typecode, blake2b of the file
+WORDLIST_INDEX_MAGIC = b"IDRWLIX2"
+
+class Wordlist:
+	# Read-only sequence over a wordlist file: the file is mmap'd and a persisted index of
+	# line start offsets gives len() and lookup by index without loading the lines. Blank
+	# lines are skipped and values stripped, like the plain loader. Pickles by path.
+	def __init__(self, path):
+		self.path = os.path.abspath(path)
+		self._open()
+
+	def _open(self):
+		size = os.path.getsize(self.path)
+		with open(self.path, "rb") as fh:
+			self.mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+		self.offsets = self._load_index(size)
+
+	def _load_index(self, size):
+		idx_path = _wordlist_index_path(self.path)
+		mtime = os.stat(self.path).st_mtime_ns
+		try:
+			with open(idx_path, "rb") as fh:
+				self.idx_mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+			magic, isize, imtime, count, typecode, digest = WORDLIST_INDEX_HEADER.unpack_from(self.idx_mm)
+			if magic == WORDLIST_INDEX_MAGIC and isize == size and imtime == mtime:
+				self.digest = digest.hex()
+				return memoryview(self.idx_mm)[WORDLIST_INDEX_HEADER.size:].cast(typecode.decode())
+			self.idx_mm.close()
+		except (OSError, ValueError, struct.error):
+			pass
+		offsets, digest = _build_line_index(self.path, "I" if size < 2**32 else "Q")
+		self.digest = digest.hex()
+		self.idx_mm = None
+		try:
+			with open(idx_path + ".tmp", "wb") as fh:
+				fh.write(WORDLIST_INDEX_HEADER.pack(WORDLIST_INDEX_MAGIC, size, mtime, len(offsets), offsets.typecode.encode(), digest))
+				offsets.tofile(fh)
+			os.replace(idx_path + ".tmp", idx_path)
+		except OSError:
+			pass   # index not persisted; this run still uses it from memory
+		return offsets
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def __getitem__(self, i):
+		start = self.offsets[i]
+		end = self.mm.find(b"\n", start)
+		return self.mm[start:end if end != -1 else len(self.mm)].strip().decode("utf-8", errors="ignore")
+
+	def __iter__(self):
+		# streaming read in file order, same values as the index
+		with open(self.path, "rb") as fh:
+			yield from _wordlist_values(fh)
+
+	def __getstate__(self):
+		return {"path": self.path}
+
+	def __setstate__(self, state):
+		self.path = state["path"]
+		self._open()
+
+def _wordlist_index_path(path):
+	# <wordlist>.idx next to the file, or a per-path file in the temp dir if that folder is read-only
+	beside = path + ".idx"
+	if os.path.exists(beside) or os.access(os.path.dirname(path), os.W_OK):
+		return beside
+	cache = os.path.join(tempfile.gettempdir(), "intrudr_wordlist_idx")
+	os.makedirs(cache, exist_ok=True)
+	return os.path.join(cache, hashlib.blake2b(path.encode(), digest_size=8).hexdigest() + ".idx")
+
+def _build_line_index(path, typecode):
+	# start offset of every non-blank line, and the file's blake2b (it is read anyway, so a
+	# distributed or resumed attack can check a copy without reading it again); the per-line
+	# work stays in C iterators
+	offsets = array.array(typecode)
+	h = hashlib.blake2b(digest_size=16)
+	base = 0
+	carry = b""
+	with open(path, "rb") as fh:
+		while True:
+			chunk = fh.read(16 * 1024 * 1024)
+			if not chunk:
+				break
+			h.update(chunk)
+			data = carry + chunk
+			cut = data.rfind(b"\n") + 1
+			if not cut:
+				carry = data
+				continue
+			lines = data[:cut].split(b"\n")
+			lines.pop()
+			starts = itertools.accumulate(map((1).__add__, map(len, lines)), initial=base)
+			offsets.extend(itertools.compress(starts, map(bytes.strip, lines)))
+			base += cut
+			carry = data[cut:]
+	if carry.strip():
+		offsets.append(base)
+	return offsets, h.digest()
+
+def _wordlist_values(fh):
+	# the one line rule every loader follows: split on \n, strip ASCII whitespace (so CRLF
+	# files load the same), skip blank lines, then decode
+	for ln in map(bytes.strip, fh):
+		if ln:
+			yield ln.decode("utf-8", errors="ignore")
+
+def load_wordlist(path):
+	# small files load into a list as before, big ones become an mmap'd Wordlist
+	if os.path.getsize(path) >= WORDLIST_MMAP_BYTES:
+		return Wordlist(path)
+	with open(path, "rb") as fh:
+		return list(_wordlist_values(fh))
+
+# ================================== PAYLOAD PROCESSING ==================================
+def _b64decode(v):
+	# lenient about missing padding; values that are not base64 pass through unchanged
+	try:
+		return base64.b64decode(v.encode() + b"==").decode("utf-8", errors="ignore")
+	except ValueError:
+		return v
+
+PAYLOAD_RULES = {
+	"urlencode": lambda v: quote(v, safe=""),
+	"urlencode-all": lambda v: "".join(f"%{b:02X}" for b in v.encode()),
+	"urldecode": unquote,
+	"htmlencode": html.escape,
+	"base64": lambda v: base64.b64encode(v.encode()).decode(),
+	"base64decode": _b64decode,
+	"hex": lambda v: v.encode().hex(),
+	"md5": lambda v: hashlib.md5(v.encode()).hexdigest(),
+	"sha1": lambda v: hashlib.sha1(v.encode()).hexdigest(),
+	"sha256": lambda v: hashlib.sha256(v.encode()).hexdigest(),
+	"lower": str.lower,
+	"upper": str.upper,
+	"reverse": lambda v: v[::-1],
+	"prefix": lambda v, s: s + v,
+	"suffix": lambda v, s: v + s,
+	"replace": lambda v, old, new: v.replace(old, new),
+}
+
+def compile_rule_chain(rules):
+	# ["base64", ("prefix", "x")] -> one function applying the rules in order
+	steps = []
+	for rule in rules:
+		name, *args = [rule] if isinstance(rule, str) else rule
+		if name not in PAYLOAD_RULES:
+			raise ValueError(f"Unknown payload processing rule: {name}")
+		fn, args = PAYLOAD_RULES[name], [str(a) for a in args]
+		try:
+			fn("", *args)   # catches a wrong argument count before the attack starts
+		except TypeError:
+			raise ValueError(f"Wrong arguments for payload processing rule {name}: {args}")
+		steps.append((fn, args))
+	def chain(value):
+		for fn, args in steps:
+			value = fn(value, *args)
+		return value
+	return chain
+
+def describe_rule_chain(rules):
+	return " -> ".join(r if isinstance(r, str) else f"{r[0]}({', '.join(map(repr, r[1:]))})" for r in rules)
+
+class ProcessedValues:
+	# Lazy view of a value list (list or Wordlist) through a rule chain. Each value is processed
+	# once and kept in a bounded LRU cache, so the thousands of combos that repeat a value in
+	# Clusterbomb / Sniper reuse it. Pickles by its inputs; the cache is rebuilt.
+	def __init__(self, values, rules):
+		self.values = values
+		self.rules = rules
+		self._setup()
+
+	def _setup(self):
+		self.process = functools.lru_cache(maxsize=PROCESSING_CACHE_SIZE)(compile_rule_chain(self.rules))
+
+	def __len__(self):
+		return len(self.values)
+
+	def __getitem__(self, i):
+		return self.process(self.values[i])
+
+	def __iter__(self):
+		return map(self.process, self.values)
+
+	def __getstate__(self):
+		return {"values": self.values, "rules": self.rules}
+
+	def __setstate__(self, state):
+		self.values = state["values"]
+		self.rules = state["rules"]
+		self._setup()
+
+def apply_payload_processing(values_dict, placeholder_names, original_placeholders):
+	# wraps the value lists that have a PAYLOAD_PROCESSING chain; keys may use the PH name
+	# or the original ^^placeholder^^ name
+	out = dict(values_dict)
+	for k, vals in values_dict.items():
+		rules = PAYLOAD_PROCESSING.get(k)
+		if rules is None and k in placeholder_names:
+			i = placeholder_names.index(k)
+			if i < len(original_placeholders):
+				rules = PAYLOAD_PROCESSING.get(original_placeholders[i])
+		if rules:
+			out[k] = ProcessedValues(vals, list(rules))
+			print(Fore.CYAN + f"[*] Payload processing for '{k}': {describe_rule_chain(rules)}" + Style.RESET_ALL)
+	return out
+
 # ================================== USER INPUT ==================================
 def get_parameter_values(param_keys, placeholder_names, detected_params=None, detected_placeholders=None):
 	values = {}
@@ -177,8 +622,7 @@ def get_parameter_values(param_keys, placeholder_names, detected_params=None, de
 			if choice == "f":
 				p = input(f"> Enter file path for '{k}': ").strip()
 				if os.path.isfile(p):
-					with open(p, "r", encoding="utf-8", errors="ignore") as fh:
-						vals = [ln.strip() for ln in fh if ln.strip()]
+					vals = load_wordlist(p)
 					if vals:
 						values[k] = vals
 						break
@@ -217,8 +661,7 @@ def get_parameter_values(param_keys, placeholder_names, detected_params=None, de
 			if choice == "f":
 				p = input(f"> Enter file path for '{ph}': ").strip()
 				if os.path.isfile(p):
-					with open(p, "r", encoding="utf-8", errors="ignore") as fh:
-						vals = [ln.strip() for ln in fh if ln.strip()]
+					vals = load_wordlist(p)
 					if vals:
 						values[ph] = vals
 						break
@@ -242,6 +685,80 @@ def get_parameter_values(param_keys, placeholder_names, detected_params=None, de
 	return values
 
 # ================================== COMBOS ==================================
+class ComboSpace:
+	# Lazy view over the attack's combo space: size is computed up front, combos are
+	# produced on demand (iteration or index lookup) so nothing is materialized.
+	def __init__(self, target_lists, attack_mode):
+		self.target_lists = target_lists
+		self.attack_mode = attack_mode
+		self.sizes = [len(lst) for lst in target_lists]
+		if attack_mode == "Sniper":
+			# offsets[i] = first combo index that varies list i
+			self.offsets = []
+			acc = 0
+			for n in self.sizes:
+				self.offsets.append(acc)
+				acc += n
+			self.total = acc
+		elif attack_mode in ("Pitchfork", "Battering-ram"):
+			self.total = self.sizes[0] if self.sizes else 0
+		else:  # Clusterbomb / Cartesian product
+			total = 1
+			for n in self.sizes:
+				total *= n
+			self.total = total if self.sizes else 0
+
+	def __len__(self):
+		return self.total
+
+	def __getitem__(self, idx):
+		if idx < 0:
+			idx += self.total
+		if not 0 <= idx < self.total:
+			raise IndexError("combo index out of range")
+		lists = self.target_lists
+		if self.attack_mode == "Sniper":
+			i = bisect.bisect_right(self.offsets, idx) - 1
+			v = lists[i][idx - self.offsets[i]]
+			return tuple(lists[j][0] if j != i else v for j in range(len(lists)))
+		if self.attack_mode == "Pitchfork":
+			return tuple(lst[idx] for lst in lists)
+		if self.attack_mode == "Battering-ram":
+			return tuple([lists[0][idx]] * len(lists))
+		# mixed-radix decode, last list varies fastest (same order as itertools.product)
+		digits = []
+		for n in reversed(self.sizes):
+			idx, d = divmod(idx, n)
+			digits.append(d)
+		digits.reverse()
+		return tuple(lst[d] for lst, d in zip(lists, digits))
+
+	def __iter__(self):
+		lists = self.target_lists
+		if self.attack_mode == "Sniper":
+			for i, lst in enumerate(lists):
+				for v in lst:
+					yield tuple(lists[j][0] if j != i else v for j in range(len(lists)))
+		elif self.attack_mode == "Pitchfork":
+			yield from zip(*lists)
+		elif self.attack_mode == "Battering-ram":
+			for v in lists[0]:
+				yield tuple([v] * len(lists))
+		elif all(isinstance(lst, (list, tuple)) for lst in lists):
+			yield from itertools.product(*lists)
+		else:
+			# product() would copy a memory-mapped Wordlist into a tuple; stream it instead
+			yield from _stream_product(lists)
+
+def _stream_product(lists):
+	# itertools.product order without materializing the inputs
+	if not lists:
+		yield ()
+		return
+	for v in lists[0]:
+		for tail in _stream_product(lists[1:]):
+			yield (v,) + tail
+
 def generate_combos_from_values(values_dict, attack_mode):
 	ordered_keys = list(values_dict.keys())
 	target_lists = [values_dict[k] for k in ordered_keys]
@@ -250,27 +767,18 @@ def generate_combos_from_values(values_dict, attack_mode):
 	if any(len(lst) == 0 for lst in target_lists):
 		raise ValueError("[*] Each parameter must have at least one value.")
 
-	if attack_mode == "Sniper":
-		combos = []
-		for i, lst in enumerate(target_lists):
-			for v in lst:
-				combo = [target_lists[j][0] if j != i else v for j in range(len(target_lists))]
-				combos.append(tuple(combo))
-
-	elif attack_mode == "Pitchfork":
+	if attack_mode == "Pitchfork":
 		if not all(len(lst) == len(target_lists[0]) for lst in target_lists):
 			raise ValueError("[*] All lists must have same length for Pitchfork.")
-		combos = list(zip(*target_lists))
 
 	elif attack_mode == "Battering-ram":
 		if not all(len(lst) == len(target_lists[0]) for lst in target_lists):
 			raise ValueError("[*]All lists must have same length for Battering-ram.")
-		combos = [tuple([target_lists[0][i]] * len(target_lists)) for i in range(len(target_lists[0]))]
 
-	else:  # Clusterbomb / Cartesian product
-		combos = list(itertools.product(*target_lists))
+	elif attack_mode != "Sniper":
+		attack_mode = "Clusterbomb"
 
-	return combos, ordered_keys
+	return ComboSpace(target_lists, attack_mode), ordered_keys
 
 # ================================== REPLACEMENT & SENDING ==================================
 def replace_wrapped_placeholders_in_text(text: str, placeholder_names, mapping, original_placeholders):
@@ -308,343 +816,3304 @@ def build_sent_request_text(method, url, full_headers_dict, body):
 	for k, v in full_headers_dict.items():
 		header_lines.append(f"{k}: {v}")
 	headers_text = "\n".join(header_lines) if header_lines else "(no headers)"
-	body_text = body if body else "(empty)"
+	body_text = (body.text() if isinstance(body, ChainedBytes) else body) if body else "(empty)"
 	return f"{request_line}\n{headers_text}\n\n{body_text}"
 
-def _prepare_and_send(prep, session, proxies):
-	last_exc = None
-	for _ in range(REQUEST_RETRIES + 1):
+# ================================== REQUEST TEMPLATE ==================================
+SHARED_SEGMENT_MIN = 4096   # literal body pieces at least this big are shared, not copied per request
+SHARED_SEGMENTS = {}        # content hash -> encoded literal body piece, filled when a template is compiled, cleared after the attack
+
+class ChainedBytes:
+	# A request body (or whole raw request) as a list of buffers: bytes parts belong to this
+	# request, str parts are keys into SHARED_SEGMENTS. It is sent, stored and pickled part by
+	# part, so big template pieces are never joined or copied per request.
+	__slots__ = ("parts", "size")
+
+	def __init__(self, parts):
+		self.parts = parts
+		self.size = sum(len(p) if isinstance(p, bytes) else len(SHARED_SEGMENTS[p]) for p in parts)
+
+	def __reduce__(self):
+		return ChainedBytes, (self.parts,)
+
+	def __len__(self):
+		return self.size
+
+	def __iter__(self):
+		for p in self.parts:
+			yield p if isinstance(p, bytes) else SHARED_SEGMENTS[p]
+
+	def __bytes__(self):
+		return b"".join(self)
+
+	def text(self):
+		# console / summary.csv form: shared pieces are named, not copied out
+		return "".join(_decode_body(p) if isinstance(p, bytes) else f"[... {len(SHARED_SEGMENTS[p])} bytes of the request template ...]" for p in self.parts)
+
+def _shared_segment(data):
+	if len(data) < SHARED_SEGMENT_MIN:
+		return data
+	key = hashlib.blake2b(data, digest_size=16).hexdigest()
+	SHARED_SEGMENTS.setdefault(key, data)
+	return key
+
+class RequestTemplate:
+	# The parsed request compiled once into literal segments and typed slots (path, body,
+	# header values). A slot is the index of a key in ordered_keys; rendering a field is a
+	# single join instead of a regex/str.replace pass per parameter per request.
+	def __init__(self, method, path, headers, body, ordered_keys, original_placeholders):
+		self.method = method
+		self.ordered_keys = list(ordered_keys)
+		self.original_placeholders = original_placeholders
+		# same split as before: keys starting with PH are wrapped placeholders, mapped by position
+		self.ph_names = [k for k in self.ordered_keys if k.startswith("PH")]
+		param_idx = [i for i, k in enumerate(self.ordered_keys) if not k.startswith("PH")]
+		# a name only matches at a delimiter boundary, so "id" never claims the tail of "userid=";
+		# in a Cookie header ";" separates pairs, so it ends a value there too
+		self.param_patterns = [(i, re.compile(r'(?:(?<=[?&;\s])|^)' + re.escape(f"{self.ordered_keys[i]}=") + r'[^&\s]*')) for i in param_idx]
+		self.cookie_patterns = [(i, re.compile(r'(?:(?<=[?&;\s])|^)' + re.escape(f"{self.ordered_keys[i]}=") + r'[^&;\s]*')) for i in param_idx]
+		self.ph_markers = []
+		for n, ph in enumerate(self.ph_names):
+			if n < len(original_placeholders):
+				self.ph_markers.append((self.ordered_keys.index(ph), f"^^{original_placeholders[n]}^^"))
+		# param values that themselves carry a ^^marker^^ still get placeholder substitution
+		self.param_slots = set(param_idx)
+
+		self.path_parts = self._compile(path)
+		self.body_parts = self._compile(body)
+		# a big body (e.g. a multipart upload) is encoded once; each request only encodes its
+		# payload values and chains them between the shared pieces
+		self.body_chain = None
+		if LARGE_BODY_BYTES and len(body) >= LARGE_BODY_BYTES:
+			self.body_chain = [p if isinstance(p, int) else _shared_segment(p.encode("utf-8")) for p in self.body_parts]
+		self.header_parts = []
+		for k, v in headers.items():
+			self.header_parts.append((k, None if k == "User-Agent" else self._compile_header(k, v)))
+		if "User-Agent" not in headers:
+			self.header_parts.append(("User-Agent", None))
+		self.raw_header_parts = [(k, self._compile_header(k, v)) for k, v in headers.items()]
+
+		# scheme and URL prefix are resolved once unless a slot can change them
+		affecting = [self._compile(headers.get(h, "")) for h in ("Host", "Origin", "Referer")]
+		path_static = all(isinstance(p, str) for p in self.path_parts)
+		path_static_start = path_static or (isinstance(self.path_parts[0], str) and self.path_parts[0].startswith("/"))
+		self.url_prefix = None
+		self.static_error = None
+		if path_static_start and not any(isinstance(x, int) for p in affecting for x in p):
+			if path_static and re.match(r'^https?://', self.path_parts[0]):
+				self.url_prefix = ""
+			else:
+				host = headers.get("Host")
+				if not host:
+					self.static_error = "No Host header"
+				else:
+					self.url_prefix = f"{determine_scheme(path, headers)}://{host}"
+
+	def _compile_header(self, name, value):
+		return self._compile(value, self.cookie_patterns if name.lower() == "cookie" else None)
+
+	def _compile(self, text, patterns=None):
+		# claimed spans: (start, end, slot) - named params first (in key order), then placeholders
+		spans = []
+		def free(a, b):
+			return all(b <= s or a >= e for s, e, _ in spans)
+		for slot, patt in patterns or self.param_patterns:
+			for m in patt.finditer(text):
+				a = m.start() + len(self.ordered_keys[slot]) + 1
+				if free(m.start(), m.end()):
+					spans.append((a, m.end(), slot))
+		for slot, marker in self.ph_markers:
+			start = text.find(marker)
+			while start != -1:
+				if free(start, start + len(marker)):
+					spans.append((start, start + len(marker), slot))
+				start = text.find(marker, start + len(marker))
+		spans.sort()
+		parts = []
+		pos = 0
+		for a, b, slot in spans:
+			parts.append(text[pos:a])
+			parts.append(slot)
+			pos = b
+		parts.append(text[pos:])
+		return [p for p in parts if p != ""] or [""]
+
+	def _values(self, combo):
+		vals = ["" if v is None else v for v in combo]
+		if self.ph_markers:
+			for i in self.param_slots:
+				if "^^" in vals[i]:
+					vals[i] = replace_wrapped_placeholders_in_text(vals[i], self.ph_names, dict(zip(self.ordered_keys, vals)), self.original_placeholders)
+		return vals
+
+	def _body(self, vals):
+		if self.body_chain is None:
+			return self._join(self.body_parts, vals)
+		return ChainedBytes([vals[p].encode("utf-8") if isinstance(p, int) else p for p in self.body_chain])
+
+	@staticmethod
+	def _join(parts, vals):
+		if len(parts) == 1 and isinstance(parts[0], str):
+			return parts[0]
+		return "".join(p if isinstance(p, str) else vals[p] for p in parts)
+
+	def _url(self, new_path, new_headers):
+		# absolute URL for the rendered path/headers; None when no Host can be resolved
+		if self.static_error:
+			return None
+		if self.url_prefix is not None:
+			if self.url_prefix and not new_path.startswith("/"):
+				new_path = "/" + new_path
+			return self.url_prefix + new_path
+		scheme = determine_scheme(new_path, new_headers)
+		if re.match(r'^https?://', new_path):
+			return new_path
+		host = new_headers.get("Host")
+		if not host:
+			return None
+		if not new_path.startswith("/"):
+			new_path = "/" + new_path
+		return f"{scheme}://{host}{new_path}"
+
+	def render(self, combo, user_agent):
+		# returns (url, headers, body); url is None when no Host can be resolved. The body is
+		# a ChainedBytes for a large body template.
+		vals = self._values(combo)
+		new_path = self._join(self.path_parts, vals)
+		new_body = self._body(vals)
+		new_headers = {k: (user_agent if parts is None else self._join(parts, vals)) for k, parts in self.header_parts}
+		return self._url(new_path, new_headers), new_headers, new_body
+
+	def render_raw(self, combo):
+		# Exact-bytes rendering: request line, headers (pasted order and User-Agent untouched)
+		# and body go out as pasted, with only Content-Length kept in sync with the body.
+		vals = self._values(combo)
+		new_path = self._join(self.path_parts, vals)
+		body_bytes = self._body(vals)
+		if not isinstance(body_bytes, ChainedBytes):
+			body_bytes = body_bytes.encode("utf-8")
+		lines = [f"{self.method} {new_path} HTTP/1.1"]
+		new_headers = {}
+		for k, parts in self.raw_header_parts:
+			v = str(len(body_bytes)) if k.lower() == "content-length" else self._join(parts, vals)
+			new_headers[k] = v
+			lines.append(f"{k}: {v}")
+		if body_bytes and not any(k.lower() == "content-length" for k in new_headers):
+			lines.append(f"Content-Length: {len(body_bytes)}")
+		head = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+		raw_bytes = ChainedBytes([head] + body_bytes.parts) if isinstance(body_bytes, ChainedBytes) else head + body_bytes
+		return self._url(new_path, new_headers), new_headers, raw_bytes
+
+	def combo_frag(self, combo):
+		return "_".join(f"{k}-{'' if v is None else v}" for k, v in zip(self.ordered_keys, combo))
+
+def _decode_body(content_bytes):
+	try:
+		return content_bytes.decode('utf-8')
+	except Exception:
+		return content_bytes.decode('utf-8', errors='replace')
+
+def _body_hash(content_bytes, total_length=None):
+	# a capped body is identified by its kept prefix plus its full length
+	h = hashlib.blake2b(content_bytes, digest_size=16)
+	if total_length is not None:
+		h.update(b"\0%d" % total_length)
+	return h.hexdigest()
+
+def _capped_body_hash(content_bytes, length, truncated):
+	if not truncated:
+		return _body_hash(content_bytes)
+	return "" if STATUS_ONLY else _body_hash(content_bytes, length)   # status-only: body never read
+
+def _declared_length(method, status, content_length, content_encoding):
+	# body length known from the headers alone: 0 for bodyless responses, Content-Length for
+	# identity-encoded ones, else None (needs a counting read)
+	if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+		return 0
+	if content_length and content_length.strip().isdigit() and content_encoding in (None, "", "identity"):
+		return int(content_length)
+	return None
+
+def _header_length(content_length):
+	return int(content_length) if content_length and content_length.strip().isdigit() else -1
+
+class CappedBody:
+	# A response body read under MAX_BODY_BYTES: Content-Encoding is undone as the bytes come
+	# in, the first MAX_BODY_BYTES decoded bytes are kept and the rest is only counted, so the
+	# length is in decoded bytes like a full read's.
+	def __init__(self, headers):
+		enc = next((v.strip().lower() for k, v in headers if k.lower() == "content-encoding"), "")
+		self.deflate = enc == "deflate"   # retried without the zlib wrapper if that fails at once
+		self.decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if enc == "gzip" else zlib.decompressobj() if self.deflate else None
+		self.kept = bytearray()
+		self.total = 0
+
+	def _keep(self, data):
+		self.total += len(data)
+		room = MAX_BODY_BYTES - len(self.kept)
+		if room > 0:
+			self.kept += data[:room]
+
+	def feed(self, data):
+		if self.decoder is None:
+			self._keep(data)
+			return
 		try:
-			resp = session.send(prep, timeout=REQUEST_TIMEOUT, proxies=proxies, verify=False)
-			return resp, None
-		except requests.RequestException as e:
-			last_exc = e
+			while data:
+				# bounded steps, so a small compressed chunk never inflates in one piece
+				self._keep(self.decoder.decompress(data, 1024 * 1024))
+				data = self.decoder.unconsumed_tail
+		except zlib.error:
+			if self.deflate and not self.total:
+				self.deflate = False
+				self.decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+				self.feed(data)
+			else:
+				self.decoder = None   # undecodable: count the rest as sent, like a full read keeps it
+				self._keep(data)
+
+	def result(self):
+		# (kept decoded bytes, decoded length, truncated)
+		if self.decoder is not None:
+			try:
+				self._keep(self.decoder.flush())
+			except zlib.error:
+				pass
+		return bytes(self.kept), self.total, self.total > len(self.kept)
+
+def _read_stream_body(resp, method):
+	# Reads a stream=True response. Returns (kept body bytes, length, truncated), the length in
+	# decoded body bytes. STATUS_ONLY skips the body and reports Content-Length (-1 without
+	# one); MAX_BODY_BYTES keeps a prefix and counts the rest, from Content-Length when the
+	# body is not compressed, else by decoding it while draining.
+	declared = _declared_length(method, resp.status_code, resp.headers.get("Content-Length"), resp.headers.get("Content-Encoding"))
+	if STATUS_ONLY:
+		if declared == 0:
+			resp.content   # nothing to read, hands the connection back to the pool
+			return b"", 0, False
+		resp.close()   # unread body: drop the connection
+		return b"", _header_length(resp.headers.get("Content-Length")), True
+	if not MAX_BODY_BYTES:
+		content = resp.content
+		return content, len(content), False
+	body = CappedBody(resp.headers.items())
+	for chunk in resp.raw.stream(65536, decode_content=False):
+		body.feed(chunk)
+		if declared is not None and len(body.kept) >= MAX_BODY_BYTES and declared > body.total:
+			resp.close()   # the rest is known from Content-Length, no need to download it
+			return bytes(body.kept), declared, True
+	return body.result()
+
+def _response_fname(idx, combo_frag):
+	safe_frag = sanitize_filename(combo_frag)[:150]
+	return f"response_{idx:04d}_{safe_frag}.txt"
+
+def _response_preview(resp_text):
+	# build preview for console/CSV short column (but we also return full_response)
+	if not resp_text:
+		return ""
+	if SHOW_FULL_RESPONSE:
+		if MAX_RESPONSE_PRINT and len(resp_text) > MAX_RESPONSE_PRINT:
+			return resp_text[:MAX_RESPONSE_PRINT] + "\n\n[TRUNCATED in console]\n"
+		return resp_text
+	return resp_text[:RESPONSE_PREVIEW_LEN]
+
+def _response_result(idx, combo_frag, status, resp_text, elapsed_req, sent_request_text, raw_bytes, body_hash, length, truncated=False):
+	# Shared tail of every sender: build the preview and the record. Saving the response and
+	# the raw request is left to the result store on the output side. `length` is the body
+	# size in decoded bytes, also when the body was capped or skipped.
+	preview = _response_preview(resp_text)
+
+	return {
+		"idx": idx,
+		"combo_frag": combo_frag,
+		"status": status,
+		"length": length,
+		"fname": "",
+		"error": None,
+		"time": elapsed_req,
+		"request_text": sent_request_text,
+		"response_preview": preview,
+		"full_response": resp_text,
+		"raw_path": "",
+		"raw_bytes": raw_bytes,
+		"body_hash": body_hash,
+		"truncated": truncated,
+	}
+
+def _failure_class(exc):
+	# maps a transport exception onto a RETRY_POLICY class; requests/urllib3 wrap the socket
+	# error a few levels deep, so walk causes, `reason` and exception args
+	if isinstance(exc, (requests.Timeout, asyncio.TimeoutError, TimeoutError)):
+		return "timeout"
+	stack, seen = [exc], set()
+	while stack:
+		e = stack.pop()
+		if id(e) in seen:
 			continue
-	return None, last_exc
+		seen.add(id(e))
+		if isinstance(e, ConnectionRefusedError):
+			return "refused"
+		if isinstance(e, (ConnectionResetError, ConnectionAbortedError, BrokenPipeError, asyncio.IncompleteReadError, http.client.RemoteDisconnected)):
+			return "reset"
+		if isinstance(e, (TimeoutError, asyncio.TimeoutError)):
+			return "timeout"
+		stack.extend(x for x in (e.__cause__, e.__context__, getattr(e, "reason", None), *e.args) if isinstance(x, BaseException))
+	return "error"
+
+def _status_class(status):
+	if status == 429:
+		return "429"
+	if status is not None and 500 <= status < 600:
+		return "5xx"
+	return None
 
-def _send_single_request(idx, combo, method, path, headers, body, ordered_keys, outdir, session_headers, original_placeholders):
+def _retry_after_seconds(value):
+	# Retry-After is either delay-seconds or an HTTP-date
+	if not value:
+		return None
+	value = value.strip()
+	if value.isdigit():
+		return float(value)
 	try:
-		start_req = time.time()
-		time.sleep(random.uniform(0.02, 0.12))
-		headers_copy = dict(headers)
-		headers_copy["User-Agent"] = random.choice(USER_AGENTS)
-		mapping = dict(zip(ordered_keys, combo))
-		new_path = path
-		new_body = body
-		new_headers = dict(headers_copy)
-
-		# Replace named parameters (name=val) for non-placeholder keys
-		for name in ordered_keys:
-			# placeholders start with PH, skip for this loop
-			if name.startswith("PH"):
-				continue
-			val = mapping.get(name, "")
-			if val is None:
-				val = ""
-			patt = re.compile(re.escape(f"{name}=") + r'[^&\s]*')
-			new_path = patt.sub(f"{name}={val}", new_path)
-			new_body = patt.sub(f"{name}={val}", new_body)
-			for hk, hv in list(new_headers.items()):
-				new_headers[hk] = patt.sub(f"{name}={val}", hv)
-
-		# Now handle wrapped placeholders (^^...^^) using placeholder_names mapped to original_placeholders
-		ph_names = [k for k in ordered_keys if k.startswith("PH")]
-		if ph_names:
-			new_path = replace_wrapped_placeholders_in_text(new_path, ph_names, mapping, original_placeholders)
-			new_body = replace_wrapped_placeholders_in_text(new_body, ph_names, mapping, original_placeholders)
-			for hk, hv in list(new_headers.items()):
-				new_headers[hk] = replace_wrapped_placeholders_in_text(hv, ph_names, mapping, original_placeholders)
+		return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+	except (TypeError, ValueError, OverflowError):
+		return None
 
-		scheme = determine_scheme(new_path, new_headers)
-		if re.match(r'^https?://', new_path):
-			url = new_path
-		else:
-			host = new_headers.get("Host")
-			if not host:
-				return {"idx": idx, "combo_frag": "_".join(f"{k}-{mapping.get(k,'')}" for k in ordered_keys), "status": None, "length": 0, "fname": "", "error": "No Host header", "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
-			if not new_path.startswith("/"):
-				new_path = "/" + new_path
-			url = f"{scheme}://{host}{new_path}"
+def _retry_delay(retries_so_far, retry_after=None):
+	if retry_after is not None:
+		return min(retry_after, RETRY_AFTER_MAX)
+	delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** retries_so_far))
+	return delay / 2 + random.uniform(0, delay / 2)
 
-		prepared_headers = {k: v for k, v in new_headers.items()}
+def _finish_attempt(res, retry_reasons, failure, retry_after=None):
+	# Counts this attempt against the request and either schedules a retry (`retry_in`, the
+	# engine re-queues it and frees the worker meanwhile) or records the final outcome.
+	reasons = list(retry_reasons or ())
+	res["attempts"] = len(reasons) + 1
+	res["retry_reasons"] = reasons
+	if failure is not None and reasons.count(failure) < RETRY_POLICY.get(failure, 0):
+		res["retry_in"] = _retry_delay(len(reasons), retry_after)
+		res["retry_reasons"] = reasons + [failure]
+	res["outcome"] = failure or "ok"
+	return res
+
+def _prepare_and_send(prep, session, proxies, phases):
+	# one attempt; returns (resp, exc, latency excluding pacing) and adds the wait, connect,
+	# tls and ttfb phases. Retries go through the engine's retry queue so a failing target
+	# doesn't hold the worker.
+	t = time.time()
+	_pace()
+	sent_at = time.time()
+	phases["wait"] = phases.get("wait", 0.0) + sent_at - t
+	_thread_local.conn_phases = conn = [0.0, 0.0]   # filled by _TimedConnectionMixin if a connection is opened
+	try:
+		resp, exc = session.send(prep, timeout=REQUEST_TIMEOUT, proxies=proxies, verify=False, stream=True), None
+	except requests.RequestException as e:
+		resp, exc = None, e
+	latency = time.time() - sent_at
+	_thread_local.conn_phases = None
+	if conn[0]:
+		phases["connect"] = conn[0]
+	if conn[1]:
+		phases["tls"] = conn[1]
+	phases["ttfb"] = max(0.0, latency - conn[0] - conn[1])
+	return resp, exc, latency
+
+def _send_single_request(idx, combo, template, retry_reasons=None):
+	# `retry_reasons` lists the failure classes of earlier attempts when this is a retry.
+	# The request time leaves out our own delays (jitter, rate limiting): see the "wait" phase.
+	try:
+		start_req = time.time()
+		if REQUEST_JITTER[1] > 0:
+			time.sleep(random.uniform(*REQUEST_JITTER))
+		t = time.time()
+		phases = {"wait": t - start_req}
+		combo_frag = template.combo_frag(combo)
+		method = template.method
+		url, prepared_headers, new_body = template.render(combo, random.choice(USER_AGENTS))
+		phases["render"] = time.time() - t
+		if url is None:
+			return {"idx": idx, "combo_frag": combo_frag, "status": None, "length": 0, "fname": "", "error": "No Host header", "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
+
+		t = time.time()
 		session = get_thread_session()
 		req = Request(method, url, headers=prepared_headers, data=new_body if new_body else None)
 		prep = session.prepare_request(req)
 
-		raw_path = ""
+		raw_bytes = b""
 		if RECORD_PREPARED_RAW:
 			try:
 				raw_bytes = build_raw_bytes_from_prepared(prep)
-				raw_path = os.path.join(outdir, f"sent_raw_{idx:04d}.bin")
-				os.makedirs(os.path.dirname(raw_path) or ".", exist_ok=True)
-				with open(raw_path, "wb") as fh:
-					fh.write(raw_bytes)
 			except Exception:
-				raw_path = ""
+				raw_bytes = b""
 
 		proxies = {"http": PROXY_ADDR, "https": PROXY_ADDR} if USE_PROXY else None
 		sent_request_text = build_sent_request_text(method, url, prepared_headers, new_body)
-		resp, last_exc = _prepare_and_send(prep, session, proxies)
-		elapsed_req = time.time() - start_req
-
-		safe_frag = sanitize_filename("_".join(f"{k}-{mapping.get(k,'')}" for k in ordered_keys))[:150]
-		resp_fname = f"response_{idx:04d}_{safe_frag}.txt"
-		resp_path = os.path.join(outdir, resp_fname)
+		phases["prepare"] = time.time() - t
+		resp, last_exc, latency = _prepare_and_send(prep, session, proxies, phases)
+		if resp is not None:
+			t = time.time()
+			try:
+				content_bytes, length, truncated = _read_stream_body(resp, method)
+			except Exception as e:
+				resp, last_exc = None, e
+			phases["download"] = time.time() - t
+		elapsed_req = time.time() - start_req - phases["wait"]
 
 		if resp is None:
-			return {"idx": idx, "combo_frag": "_".join(f"{k}-{mapping.get(k,'')}" for k in ordered_keys), "status": None, "length": 0, "fname": resp_fname, "error": f"Failed after retries: {last_exc}", "time": elapsed_req, "request_text": sent_request_text, "response_preview": "", "full_response": "", "raw_path": raw_path}
+			failure = _failure_class(last_exc)
+			res = {"idx": idx, "combo_frag": combo_frag, "status": None, "length": 0, "fname": "", "error": f"Failed ({failure}): {last_exc}", "time": elapsed_req, "latency": latency, "phases": phases, "request_text": sent_request_text, "response_preview": "", "full_response": "", "raw_path": "", "raw_bytes": raw_bytes}
+			return _finish_attempt(res, retry_reasons, failure)
 
-		# Save the full response safely using bytes -> decode (avoid truncation)
-		try:
-			content_bytes = resp.content
+		res = _response_result(idx, combo_frag, resp.status_code, _decode_body(content_bytes), elapsed_req, sent_request_text, raw_bytes, _capped_body_hash(content_bytes, length, truncated), length, truncated)
+		res["latency"] = latency
+		res["phases"] = phases
+		return _finish_attempt(res, retry_reasons, _status_class(resp.status_code), _retry_after_seconds(resp.headers.get("Retry-After")))
+	except Exception as exc:
+		return {"idx": idx, "combo_frag": "(error)", "status": None, "length": 0, "fname": "", "error": str(exc), "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
+
+# ================================== RESPONSE STORE ==================================
+ARCHIVE_DIRNAME = "archive"
+ARCHIVE_INDEX_NAME = "index.bin"
+BODIES_DIRNAME = "bodies"
+ARCHIVE_RECORD = struct.Struct("<QBIQQ")   # idx, kind, segment, offset, length
+ARCHIVE_REQUEST, ARCHIVE_RESPONSE = 1, 2
+ARCHIVE_REQUEST_CHAIN = 3                   # request stored as a manifest of pieces (see ChainedBytes)
+ARCHIVE_PIECE = struct.Struct("<IQQ")       # manifest entry: segment, offset, length
+
+class FileStore:
+	# Legacy layout: one response_XXXX_*.txt and one sent_raw_XXXX.bin per request. With
+	# DEDUPE_BODIES each distinct body is written once as bodies/<hash>.txt instead.
+	def __init__(self, outdir, append=False):
+		self.outdir = outdir
+		os.makedirs(outdir, exist_ok=True)
+		if DEDUPE_BODIES:
+			os.makedirs(os.path.join(outdir, BODIES_DIRNAME), exist_ok=True)
+
+	def save(self, res):
+		idx = res["idx"]
+		raw_bytes = res.pop("raw_bytes", b"")
+		if raw_bytes:
+			raw_path = os.path.join(self.outdir, f"sent_raw_{idx:04d}.bin")
 			try:
-				resp_text = content_bytes.decode('utf-8')
+				with open(raw_path, "wb") as fh:
+					fh.writelines(raw_bytes) if isinstance(raw_bytes, ChainedBytes) else fh.write(raw_bytes)
+				res["raw_path"] = raw_path
 			except Exception:
-				resp_text = content_bytes.decode('utf-8', errors='replace')
-			safe_write_file(resp_path, resp_text)
-			length = len(resp_text)
-		except Exception:
-			# fallback to resp.text or empty
+				pass
+		if res.get("status") is not None:
+			h = res.get("body_hash")
+			if DEDUPE_BODIES and h:
+				fname = f"{BODIES_DIRNAME}/{h}.txt"
+				if os.path.exists(os.path.join(self.outdir, fname)):
+					res["fname"] = fname
+					return
+			else:
+				fname = _response_fname(idx, res.get("combo_frag", ""))
 			try:
-				resp_text = resp.text
-				safe_write_file(resp_path, resp_text)
-				length = len(resp_text)
+				with open(os.path.join(self.outdir, fname), "w", encoding="utf-8", errors="ignore") as fh:
+					fh.write(res.get("full_response", ""))
+				res["fname"] = fname
 			except Exception:
-				resp_text = ""
-				length = 0
+				pass
+
+	def close(self):
+		pass
 
-		status = resp.status_code
+class ArchiveWriter:
+	# Appends requests and responses to rolling segment files under <outdir>/archive and
+	# records idx -> (segment, offset, length) in a fixed-size binary index. With
+	# DEDUPE_BODIES a body already stored is not written again: the new index record just
+	# points at the existing bytes. A chained request writes its shared template pieces once
+	# per run and is recorded as a manifest of the pieces it is made of.
+	def __init__(self, outdir, append=False, segment_bytes=None):
+		self.dir = os.path.join(outdir, ARCHIVE_DIRNAME)
+		os.makedirs(self.dir, exist_ok=True)
+		self.segment_bytes = segment_bytes or ARCHIVE_SEGMENT_BYTES
+		existing = sorted(f for f in os.listdir(self.dir) if f.startswith("segment_"))
+		if not append:
+			for f in existing + [ARCHIVE_INDEX_NAME]:
+				if os.path.exists(os.path.join(self.dir, f)):
+					os.remove(os.path.join(self.dir, f))
+			existing = []
+		self.seg_no = len(existing) - 1 if existing else 0
+		self.seg_fh = open(self._segment_path(self.seg_no), "ab")
+		self.offset = self.seg_fh.tell()
+		self.index_fh = open(os.path.join(self.dir, ARCHIVE_INDEX_NAME), "ab")
+		self.bodies = {}   # body hash -> (segment, offset, length)
+		self.shared = {}   # SHARED_SEGMENTS key -> (segment, offset, length)
 
-		# build preview for console/CSV short column (but we also return full_response)
-		if resp_text:
-			if SHOW_FULL_RESPONSE:
-				if MAX_RESPONSE_PRINT and len(resp_text) > MAX_RESPONSE_PRINT:
-					preview = resp_text[:MAX_RESPONSE_PRINT] + "\n\n[TRUNCATED in console]\n"
-				else:
-					preview = resp_text
+	def _segment_path(self, seg_no):
+		return os.path.join(self.dir, f"segment_{seg_no:05d}.bin")
+
+	def _write(self, data):
+		if self.offset and self.offset + len(data) > self.segment_bytes:
+			self.seg_fh.close()
+			self.seg_no += 1
+			self.seg_fh = open(self._segment_path(self.seg_no), "ab")
+			self.offset = 0
+		off = self.offset
+		self.seg_fh.write(data)
+		self.offset += len(data)
+		return self.seg_no, off, len(data)
+
+	def append(self, idx, kind, data):
+		return self.link(idx, kind, self._write(data))
+
+	def append_chain(self, idx, chained):
+		pieces = []
+		for part in chained.parts:
+			if isinstance(part, bytes):
+				loc = self._write(part)
 			else:
-				preview = resp_text[:RESPONSE_PREVIEW_LEN]
-		else:
-			preview = ""
-
-		return {
-			"idx": idx,
-			"combo_frag": "_".join(f"{k}-{mapping.get(k,'')}" for k in ordered_keys),
-			"status": status,
-			"length": length,
-			"fname": resp_fname,
-			"error": None,
-			"time": elapsed_req,
-			"request_text": sent_request_text,
-			"response_preview": preview,
-			"full_response": resp_text,
-			"raw_path": raw_path,
-		}
-	except Exception as exc:
-		return {"idx": idx, "combo_frag": "(error)", "status": None, "length": 0, "fname": "", "error": str(exc), "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
+				loc = self.shared.get(part)
+				if loc is None:
+					loc = self.shared[part] = self._write(SHARED_SEGMENTS[part])
+			if pieces and pieces[-1][0] == loc[0] and pieces[-1][1] + pieces[-1][2] == loc[1]:
+				pieces[-1] = (loc[0], pieces[-1][1], pieces[-1][2] + loc[2])   # contiguous with the previous piece
+			else:
+				pieces.append(loc)
+		return self.append(idx, ARCHIVE_REQUEST_CHAIN, b"".join(ARCHIVE_PIECE.pack(*loc) for loc in pieces))
 
-# ================================== ORDERED CONCURRENT SENDER ==================================
-def send_requests_concurrent(method, path, headers, body, combos, ordered_keys, outdir, session_headers, original_placeholders, max_workers=MAX_WORKERS, start_time=None):
-	if start_time is None:
-		start_time = time.time()
-	print(Fore.CYAN + f"\n[*] [Attack started at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}]" + Style.RESET_ALL)
+	def link(self, idx, kind, loc):
+		seg, off, length = loc
+		self.index_fh.write(ARCHIVE_RECORD.pack(idx, kind, seg, off, length))
+		return f"{ARCHIVE_DIRNAME}/segment_{seg:05d}.bin:{off}+{length}"
 
-	os.makedirs(outdir, exist_ok=True)
-	summary_path = os.path.join(outdir, SUMMARY_FILENAME)
-	with open(summary_path, "w", encoding="utf-8", newline="") as slog:
-		writer = csv.writer(slog)
-		writer.writerow(["index","params","status","length","filename","error","req_time_s","request","full_response","sent_raw_file"])
+	def save(self, res):
+		idx = res["idx"]
+		raw_bytes = res.pop("raw_bytes", b"")
+		if isinstance(raw_bytes, ChainedBytes):
+			res["raw_path"] = self.append_chain(idx, raw_bytes)
+		elif raw_bytes:
+			res["raw_path"] = self.append(idx, ARCHIVE_REQUEST, raw_bytes)
+		if res.get("status") is not None:
+			h = res.get("body_hash")
+			if DEDUPE_BODIES and h in self.bodies:
+				res["fname"] = self.link(idx, ARCHIVE_RESPONSE, self.bodies[h])
+				return
+			seg_no, off = self.seg_no, self.offset
+			res["fname"] = self.append(idx, ARCHIVE_RESPONSE, res.get("full_response", "").encode("utf-8", errors="ignore"))
+			if DEDUPE_BODIES and h:
+				if self.seg_no != seg_no:   # append rolled over to a new segment
+					seg_no, off = self.seg_no, 0
+				self.bodies[h] = (seg_no, off, self.offset - off)
 
-	total = len(combos)
-	ex = ThreadPoolExecutor(max_workers=max_workers)
-	future_map = {}
-	results = {}
-	lock = threading.Lock()
-	summary_lines = []
+	def close(self):
+		self.seg_fh.close()
+		self.index_fh.close()
 
-	# submit tasks
-	try:
-		for idx, combo in enumerate(combos):
-			fut = ex.submit(_send_single_request, idx+1, combo, method, path, headers, body, ordered_keys, outdir, session_headers, original_placeholders)
-			future_map[fut] = idx+1
-	except Exception as e:
-		print(Fore.RED + f"Error submitting tasks: {e}" + Style.RESET_ALL)
-		ex.shutdown(wait=False)
-		return
+class ArchiveReader:
+	# Memory-mapped read access to an archive. The index keeps only an array of idx keys
+	# (8 bytes per entry); lookups bisect it when the index is in order, as written by the
+	# ordered emitter, and fall back to a dict otherwise.
+	def __init__(self, outdir):
+		self.dir = os.path.join(outdir, ARCHIVE_DIRNAME)
+		with open(os.path.join(self.dir, ARCHIVE_INDEX_NAME), "rb") as fh:
+			data = fh.read()
+		data = data[:len(data) - len(data) % ARCHIVE_RECORD.size]
+		self.index = data
+		self.keys = array.array("Q", (rec[0] for rec in ARCHIVE_RECORD.iter_unpack(data)))
+		self.positions = None
+		if any(self.keys[i] > self.keys[i + 1] for i in range(len(self.keys) - 1)):
+			self.positions = {}
+			for pos, key in enumerate(self.keys):
+				self.positions.setdefault(key, []).append(pos)
+		self.maps = {}
 
-	# collector: store results as they complete
-	try:
-		for fut in as_completed(future_map):
-			try:
-				res = fut.result()
-			except Exception as e:
-				idx = future_map.get(fut, None) or -1
-				res = {"idx": idx, "combo_frag": "(unknown)", "status": None, "length": 0, "fname": "", "error": f"Worker exception: {e}", "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
-			with lock:
-				results[res["idx"]] = res
-	except KeyboardInterrupt:
-		print(Fore.YELLOW + "\nKeyboardInterrupt detected — cancelling pending tasks..." + Style.RESET_ALL)
-		try:
-			ex.shutdown(wait=False, cancel_futures=True)
-		except TypeError:
-			ex.shutdown(wait=False)
-	except Exception as e:
-		print(Fore.RED + f"\nCollector error: {e}" + Style.RESET_ALL)
-		try:
-			ex.shutdown(wait=False)
-		except Exception:
-			pass
+	def _records(self, idx):
+		if self.positions is not None:
+			yield from self.positions.get(idx, [])
+			return
+		pos = bisect.bisect_left(self.keys, idx)
+		while pos < len(self.keys) and self.keys[pos] == idx:
+			yield pos
+			pos += 1
 
-	# ordered printer
-	try:
-		for i in range(1, total+1):
-			# wait until result i is available or all futures done
-			while True:
-				with lock:
-					if i in results:
-						res = results.pop(i)
-						break
-				time.sleep(0.02)
-				if all(f.done() for f in future_map) and i not in results:
-					res = {"idx": i, "combo_frag": "(missing)", "status": None, "length": 0, "fname": "", "error": "missing result (task failed or cancelled)", "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
-					break
+	def locate(self, idx, kind=ARCHIVE_RESPONSE):
+		# last matching record wins (a resumed run may re-send an index)
+		found = None
+		for pos in self._records(idx):
+			_, k, seg, off, length = ARCHIVE_RECORD.unpack_from(self.index, pos * ARCHIVE_RECORD.size)
+			if k == kind:
+				found = (seg, off, length)
+		return found
 
-			idx = res["idx"]
-			combo_frag = res.get("combo_frag", "")
-			status = res.get("status")
-			length = res.get("length", 0)
-			fname = res.get("fname", "")
-			error = res.get("error")
-			req_time = res.get("time", 0.0)
-			request_text = res.get("request_text", "")
-			response_preview = res.get("response_preview", "")
-			full_response = res.get("full_response", "")
-			raw_path = res.get("raw_path", "")
+	def _view(self, seg, off, length):
+		if length == 0:
+			return memoryview(b"")
+		if seg not in self.maps:
+			with open(os.path.join(self.dir, f"segment_{seg:05d}.bin"), "rb") as fh:
+				self.maps[seg] = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+		return memoryview(self.maps[seg])[off:off + length]
 
-			combo_display = combo_frag.replace("_", " | ") if combo_frag else "(no params)"
-			summary_lines.append((idx, total, combo_display, status, length, req_time, error))
+	def _pieces(self, idx):
+		# (segment, offset, length) pieces of a chained request, or None
+		loc = self.locate(idx, ARCHIVE_REQUEST_CHAIN)
+		if loc is None:
+			return None
+		with self._view(*loc) as manifest:
+			return list(ARCHIVE_PIECE.iter_unpack(manifest))
 
-			print(Fore.CYAN + f"\n[{idx}/{total}] Request -> " + Style.RESET_ALL + (combo_display if combo_display else "(no params)"))
-			if request_text:
-				for ln in request_text.splitlines():
-					print(Fore.BLUE + "	 >> " + ln + Style.RESET_ALL)
+	def get(self, idx, kind=ARCHIVE_RESPONSE):
+		# zero-copy view into the mapped segment (release it before close()); None when the
+		# entry does not exist. A chained request is assembled into a new buffer.
+		loc = self.locate(idx, kind)
+		if loc is None:
+			pieces = self._pieces(idx) if kind == ARCHIVE_REQUEST else None
+			if pieces is None:
+				return None
+			return memoryview(b"".join(self._view(*p) for p in pieces))
+		return self._view(*loc)
 
-			if error:
-				print(Fore.RED + f"	 [-] Failed: {error}" + Style.RESET_ALL)
-			else:
-				if status is not None:
-					if 200 <= status < 300:
-						color, marker = Fore.GREEN, "[*]"
-					elif 300 <= status < 400:
-						color, marker = Fore.YELLOW, "[-]"
-					else:
-						color, marker = Fore.RED, "[-]"
-					print(color + f"	 {marker} Status: {status} | Length: {length} chars | Time: {req_time:.3f}s" + Style.RESET_ALL)
-				else:
-					print(Fore.RED + "	 [-] No status returned." + Style.RESET_ALL)
-
-			if full_response:
-				if SHOW_FULL_RESPONSE:
-					print(Fore.YELLOW + "	 >> Response body:" + Style.RESET_ALL)
-					count = 0
-					for ln in full_response.splitlines():
-						if MAX_RESPONSE_PRINT and count >= MAX_RESPONSE_PRINT:
-							print(Fore.YELLOW + "	  [Console output truncated]" + Style.RESET_ALL)
-							break
-						print(Fore.YELLOW + "	  " + ln + Style.RESET_ALL)
-						count += len(ln) + 1
-					if MAX_RESPONSE_PRINT and len(full_response) > MAX_RESPONSE_PRINT:
-						print(Fore.YELLOW + f"	  [Response truncated in console at {MAX_RESPONSE_PRINT} chars; full response saved to {fname}]" + Style.RESET_ALL)
-				else:
-					first_line = response_preview.splitlines()[0] if response_preview.splitlines() else ""
-					print(Fore.YELLOW + f"	 >> Response preview: {first_line[:200]}..." + Style.RESET_ALL)
-			else:
-				if fname:
-					print(Fore.YELLOW + f"	 >> Full response saved to: {fname}" + Style.RESET_ALL)
+	def size(self, idx, kind=ARCHIVE_RESPONSE):
+		loc = self.locate(idx, kind)
+		if loc is None:
+			pieces = self._pieces(idx) if kind == ARCHIVE_REQUEST else None
+			return None if pieces is None else sum(p[2] for p in pieces)
+		return loc[2]
 
-			with open(summary_path, "a", encoding="utf-8", newline="") as slog:
-				writer = csv.writer(slog)
-				writer.writerow([idx, combo_frag, status if status is not None else "ERROR", length, fname, error or "", f"{req_time:.3f}", request_text, full_response, raw_path])
+	def indexes(self):
+		return sorted(set(self.keys))
 
-			if THROTTLE_SECONDS > 0:
-				time.sleep(THROTTLE_SECONDS)
+	def close(self):
+		for mm in self.maps.values():
+			mm.close()
+		self.maps.clear()
 
-	finally:
-		try:
-			ex.shutdown(wait=False)
-		except Exception:
-			pass
+def open_result_store(outdir, append=False):
+	if RESPONSE_STORE == "files":
+		return FileStore(outdir, append=append)
+	return ArchiveWriter(outdir, append=append)
 
-	print(Fore.CYAN + "\n" + "-"*55 + " Attack Summary " + "-"*55 + "\n" + Style.RESET_ALL)
-	for idx, total, combo_display, status, length, req_time, error in summary_lines:
-		if error:
-			line = f"[{idx}/{total}] Request -> {combo_display} \t [-] Failed: {error}"
-			print(Fore.RED + line + Style.RESET_ALL)
+# ================================== CHECKPOINTS ==================================
+CHECKPOINT_FILENAME = "checkpoint.json"                    # attack definition, written once
+CHECKPOINT_PROGRESS_FILENAME = "checkpoint_progress.json"  # completed indexes, rewritten as the attack runs
+# config the resumed attack must run with to behave like the original one. Secrets stay out
+# (the definition is written next to the output and sent to every worker): a resumed
+# distributed attack uses the current DIST_TOKEN, or prints a fresh one.
+CHECKPOINT_CONFIG = ["REQUEST_TIMEOUT", "RETRY_POLICY", "RETRY_BACKOFF_BASE", "RETRY_BACKOFF_MAX", "RETRY_AFTER_MAX",
+	"SUBMIT_WINDOW_FACTOR", "ASYNC_CONCURRENCY", "THROTTLE_SECONDS", "TARGET_RPS", "RATE_BURST", "REQUEST_JITTER",
+	"ADAPTIVE_CONCURRENCY", "ADAPTIVE_MIN", "ADAPTIVE_MAX", "MAX_BODY_BYTES", "STATUS_ONLY", "MATCH", "FILTER",
+	"AUTO_BASELINE", "BASELINE_SAMPLE", "BASELINE_LENGTH_TOLERANCE", "USE_PROXY", "PROXY_ADDR", "RECORD_PREPARED_RAW",
+	"RESPONSE_STORE", "RESULTS_DB", "DEDUPE_BODIES", "LARGE_BODY_BYTES", "DIST_LISTEN", "DIST_LEASE_SIZE", "DIST_LEASE_TIMEOUT"]
+
+class IndexRanges:
+	# Set of request indexes kept as sorted, merged inclusive ranges: an attack that is done
+	# up to #N with a few gaps is a handful of pairs, whatever N is.
+	def __init__(self, ranges=()):
+		# ranges as saved by ranges(): sorted, merged, inclusive
+		self.starts = [a for a, _ in ranges]
+		self.ends = [b for _, b in ranges]
+
+	def add(self, idx):
+		i = bisect.bisect_right(self.starts, idx) - 1
+		if i >= 0 and idx <= self.ends[i]:
+			return
+		joins_left = i >= 0 and self.ends[i] == idx - 1
+		joins_right = i + 1 < len(self.starts) and self.starts[i + 1] == idx + 1
+		if joins_left and joins_right:
+			self.ends[i] = self.ends[i + 1]
+			del self.starts[i + 1], self.ends[i + 1]
+		elif joins_left:
+			self.ends[i] = idx
+		elif joins_right:
+			self.starts[i + 1] = idx
 		else:
-			if status is None:
-				line = f"[{idx}/{total}] Request -> {combo_display} \t [-] Status: None | Length: {length} chars | Time: {req_time:.3f}s"
-				print(Fore.RED + line + Style.RESET_ALL)
-			else:
-				line = f"[{idx}/{total}] Request -> {combo_display} \t [*] Status: {status} | Length: {length} chars | Time: {req_time:.3f}s"
-				if 200 <= status < 300:
-					print(Fore.GREEN + line + Style.RESET_ALL)
-				elif 300 <= status < 400:
-					print(Fore.YELLOW + line + Style.RESET_ALL)
-				else:
-					print(Fore.RED + line + Style.RESET_ALL)
+			self.starts.insert(i + 1, idx)
+			self.ends.insert(i + 1, idx)
 
-	elapsed = time.time() - start_time
-	print(Fore.CYAN + f"\n[*] Total attack time: {elapsed:.2f} s ({format_duration(elapsed)})" + Style.RESET_ALL)
+	def __contains__(self, idx):
+		i = bisect.bisect_right(self.starts, idx) - 1
+		return i >= 0 and idx <= self.ends[i]
 
-# ================================== MAIN ==================================
-def main():
-	start_all = time.time()
-	try:
-		raw = prompt_for_raw_request()
-		method, path, headers, body = parse_request(raw)
-		params, placeholder_names, original_placeholders = detect_parameters_and_placeholders(path, body, headers)
+	def __len__(self):
+		return sum(b - a + 1 for a, b in zip(self.starts, self.ends))
 
-		print(Fore.YELLOW + "\n[*] Auto Detected Parameters:" + Style.RESET_ALL)
-		if params:
-			for i, (k, v) in enumerate(params.items(), start=1):
-				print(f"{i}. {k} = {v}")
-		else:
-			print("\nNone Detected.")
+	def next_missing(self, idx):
+		# first index >= idx that is not in the set
+		i = bisect.bisect_right(self.starts, idx) - 1
+		return self.ends[i] + 1 if i >= 0 and idx <= self.ends[i] else idx
 
-		if placeholder_names:
-			print(Fore.YELLOW + "\n[*] Detected Placeholders {PH} Parameter:\n" + Style.RESET_ALL)
-			for i, ph in enumerate(placeholder_names, start=1):
-				orig = original_placeholders[i-1] if i-1 < len(original_placeholders) else ""
-				print(f"|> {ph} -> ^^{orig}^^")
-		else:
-			print("\nNo Placeholders Detected.")
+	def missing(self, total):
+		# indexes 1..total not in the set, in order
+		prev = 0
+		for a, b in zip(self.starts, self.ends):
+			yield from range(prev + 1, min(a, total + 1))
+			prev = b
+		yield from range(prev + 1, total + 1)
 
-		detected_placeholders = {ph: (original_placeholders[i-1] if i-1 < len(original_placeholders) else "") for i, ph in enumerate(placeholder_names, start=1)}
+	def ranges(self):
+		return [[a, b] for a, b in zip(self.starts, self.ends)]
 
-		ordered = list(params.keys()) + placeholder_names
-		if not ordered:
-			print(Fore.YELLOW + "No parameters or placeholders to set. Exiting." + Style.RESET_ALL)
-			return
+class Checkpoint:
+	# Progress of one attack in its output folder. Only results that got a response and were
+	# written by the ResultWriter count as done; transport errors and requests lost to an
+	# interrupt are sent again on resume.
+	def __init__(self, outdir, definition, done=None):
+		self.progress_path = os.path.join(outdir, CHECKPOINT_PROGRESS_FILENAME)
+		self.total = definition["total"]
+		self.done = done if done is not None else IndexRanges()
+		self.last_save = time.time()
+		_write_json_atomic(os.path.join(outdir, CHECKPOINT_FILENAME), definition)
+		self.save()
 
-		values_dict = get_parameter_values(list(params.keys()), placeholder_names, detected_params=params, detected_placeholders=detected_placeholders)
-		for k in ordered:
-			if k not in values_dict:
-				if k in params:
-					values_dict[k] = [params[k]]
-				else:
-					values_dict[k] = [""]
+	def add(self, idx):
+		self.done.add(idx)
 
-		if any(len(vs) == 0 for vs in values_dict.values()):
-			print(Fore.RED + "One or more parameters/placeholders have no values. Aborting." + Style.RESET_ALL)
-			return
+	def maybe_save(self):
+		if time.time() - self.last_save >= CHECKPOINT_INTERVAL:
+			self.save()
 
-		multiple = any(len(vs) > 1 for vs in values_dict.values())
-		session_headers = ["User-Agent","Accept","Accept-Language","Content-Type","Origin","Referer"]
+	def save(self):
+		count = len(self.done)
+		_write_json_atomic(self.progress_path, {"total": self.total, "done_count": count, "complete": count >= self.total,
+			"updated": time.strftime("%Y-%m-%d %H:%M:%S"), "done": self.done.ranges()})
+		self.last_save = time.time()
 
-		# Prompt for folder to save responses
-		outdir = input(Fore.CYAN + "\n[*] Enter folder name to save responses (Default: responses): " + Style.RESET_ALL).strip()
-		if not outdir:
+def _write_json_atomic(path, data):
+	tmp = path + ".tmp"
+	with open(tmp, "w", encoding="utf-8") as fh:
+		json.dump(data, fh)
+	os.replace(tmp, path)
+
+def _values_spec(vals):
+	# JSON form of a value list: inline values, a wordlist file reference or a processing chain
+	if isinstance(vals, ProcessedValues):
+		return {"values": _values_spec(vals.values), "rules": vals.rules}
+	if isinstance(vals, Wordlist):
+		st = os.stat(vals.path)
+		return {"file": vals.path, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "blake2b": vals.digest}
+	return list(vals)
+
+def _values_from_spec(spec):
+	# A wordlist must have the attack's content; a copy with another mtime (scp, checkout) is
+	# fine. Its hash comes with the line index, which such a copy gets rebuilt anyway.
+	if isinstance(spec, list):
+		return spec
+	if "rules" in spec:
+		return ProcessedValues(_values_from_spec(spec["values"]), spec["rules"])
+	st = os.stat(spec["file"])
+	problem = None
+	words = None
+	if st.st_size != spec["size"]:
+		problem = f"size is {st.st_size} bytes, expected {spec['size']}"
+	elif st.st_mtime_ns != spec["mtime_ns"]:
+		if "blake2b" not in spec:   # checkpoint written before content hashes
+			problem = "modification time differs"
+		else:
+			words = Wordlist(spec["file"])
+			if words.digest != spec["blake2b"]:
+				problem = "content hash differs"
+	if problem:
+		raise ValueError(f"Wordlist {spec['file']} does not match the attack's ({problem}), indexes would not match")
+	return words if words is not None else Wordlist(spec["file"])
+
+def checkpoint_definition(method, path, headers, body, combos, ordered_keys, original_placeholders, max_workers, processes, engine):
+	return {
+		"total": len(combos), "attack_mode": combos.attack_mode,
+		"request": {"method": method, "path": path, "headers": headers, "body": body},
+		"ordered_keys": list(ordered_keys), "original_placeholders": list(original_placeholders),
+		"values": [_values_spec(lst) for lst in combos.target_lists],
+		"engine": engine, "max_workers": max_workers, "processes": processes,
+		"config": {name: globals()[name] for name in CHECKPOINT_CONFIG},
+	}
+
+def load_checkpoint(outdir):
+	# (definition, progress) of the attack saved in outdir, or None
+	try:
+		with open(os.path.join(outdir, CHECKPOINT_FILENAME), "r", encoding="utf-8") as fh:
+			definition = json.load(fh)
+		with open(os.path.join(outdir, CHECKPOINT_PROGRESS_FILENAME), "r", encoding="utf-8") as fh:
+			progress = json.load(fh)
+	except (OSError, ValueError):
+		return None
+	return definition, progress
+
+# ================================== FILTERS ==================================
+class ResponseFilter:
+	# MATCH / FILTER rules and the optional auto-baseline, evaluated online for each result.
+	# The baseline is the most common status and, within it, the most common length, both
+	# tracked incrementally.
+	def __init__(self, match=None, filt=None, baseline=False):
+		self.match = self._compile(match or {})
+		self.filter = self._compile(filt or {})
+		self.baseline = baseline
+		self.status_counts = {}
+		self.length_counts = {}   # (status, length) -> count
+		self.best_status = None
+		self.best_length = {}     # status -> most common length
+
+	@staticmethod
+	def _compile(rules):
+		unknown = set(rules) - {"status", "length", "words", "lines", "time", "regex"}
+		if unknown:
+			raise ValueError(f"Unknown match/filter rule(s): {', '.join(sorted(unknown))}")
+		rules = dict(rules)
+		if "regex" in rules:
+			rules["regex"] = re.compile(rules["regex"])
+		return rules
+
+	@property
+	def active(self):
+		return bool(self.match or self.filter or self.baseline)
+
+	@staticmethod
+	def _in_range(value, bounds):
+		lo, hi = bounds
+		return (lo is None or value >= lo) and (hi is None or value <= hi)
+
+	def _hits(self, rules, res):
+		body = res.get("full_response", "")
+		for key, rule in rules.items():
+			if key == "status":
+				hit = res.get("status") in rule
+			elif key == "length":
+				hit = self._in_range(res.get("length", 0), rule)
+			elif key == "words":
+				hit = self._in_range(len(body.split()), rule)
+			elif key == "lines":
+				hit = self._in_range(body.count("\n") + 1 if body else 0, rule)
+			elif key == "time":
+				hit = self._in_range(res.get("time", 0.0), rule)
+			else:
+				hit = rule.search(body) is not None
+			if hit:
+				return True
+		return False
+
+	def observe(self, res):
+		status, length = res.get("status"), res.get("length", 0)
+		if status is None:
+			return
+		n = self.status_counts[status] = self.status_counts.get(status, 0) + 1
+		if self.best_status is None or n > self.status_counts[self.best_status]:
+			self.best_status = status
+		key = (status, length)
+		n = self.length_counts[key] = self.length_counts.get(key, 0) + 1
+		best = self.best_length.get(status)
+		if best is None or n > self.length_counts[(status, best)]:
+			self.best_length[status] = length
+
+	def deviates(self, res):
+		status = res.get("status")
+		if status != self.best_status:
+			return True
+		return abs(res.get("length", 0) - self.best_length[status]) > BASELINE_LENGTH_TOLERANCE
+
+	def interesting(self, res):
+		if res.get("status") is None:
+			return True   # errors are always reported
+		if res.get("prefiltered"):
+			return False   # a distributed worker already found no MATCH / a FILTER hit
+		if self.match and not self._hits(self.match, res):
+			return False
+		if self.filter and self._hits(self.filter, res):
+			return False
+		return not self.baseline or self.deviates(res)
+
+	def describe_baseline(self):
+		if self.best_status is None:
+			return "no responses"
+		return f"status {self.best_status}, length {self.best_length[self.best_status]} (±{BASELINE_LENGTH_TOLERANCE})"
+
+# ================================== METRICS ==================================
+# Per-request phases, in seconds: wait (jitter + rate limiting), render, prepare, connect / tls
+# (only when the request opened a connection), ttfb (request written until response headers),
+# download (body read + decode) and persist (background writer time per result).
+PHASES = ["wait", "render", "prepare", "connect", "tls", "ttfb", "download", "persist"]
+
+class LatencyHistogram:
+	# Log-scale buckets (PER_DECADE per power of ten, 10 us .. 1000 s, plus under/overflow) in
+	# a fixed-size list, so another thread can read a snapshot while it is being updated.
+	LOW = 1e-5
+	PER_DECADE = 20
+	SIZE = 8 * PER_DECADE + 2
+
+	def __init__(self):
+		self.counts = [0] * self.SIZE
+		self.count = 0
+		self.sum = 0.0
+		self.max = 0.0
+
+	def add(self, seconds, n=1):
+		b = 0 if seconds < self.LOW else min(self.SIZE - 1, 1 + int(math.log10(seconds / self.LOW) * self.PER_DECADE))
+		self.counts[b] += n
+		self.count += n
+		self.sum += seconds * n
+		self.max = max(self.max, seconds)
+
+	def percentile(self, p):
+		# upper edge of the bucket holding the p-th percentile (within ~12%), capped at the max
+		rank = p / 100 * self.count
+		seen = 0
+		for b, c in enumerate(self.counts):
+			seen += c
+			if c and seen >= rank:
+				return min(self.max, self.LOW * 10 ** (b / self.PER_DECADE))
+		return self.max
+
+	def summary(self):
+		return {"count": self.count, "sum_s": round(self.sum, 6), "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+			"p50_ms": round(self.percentile(50) * 1000, 3), "p95_ms": round(self.percentile(95) * 1000, 3),
+			"p99_ms": round(self.percentile(99) * 1000, 3), "max_ms": round(self.max * 1000, 3)}
+
+class AttackMetrics:
+	# Running histograms of the request time and of each phase. The emitter feeds results in
+	# order, the writer thread feeds persist; snapshots are read by the exporter thread.
+	def __init__(self):
+		self.started = time.time()
+		self.request = LatencyHistogram()
+		self.phases = {p: LatencyHistogram() for p in PHASES}
+		self.completed = 0
+		self.errors = 0
+
+	def observe(self, res):
+		self.completed += 1
+		if res.get("error"):
+			self.errors += 1
+		phases = res.get("phases")
+		if phases:
+			self.request.add(res.get("time", 0.0))
+			for p, seconds in phases.items():
+				self.phases[p].add(seconds)
+
+	def persisted(self, seconds, n):
+		self.phases["persist"].add(seconds / n, n)
+
+	def snapshot(self):
+		elapsed = time.time() - self.started
+		return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "elapsed_s": round(elapsed, 3), "completed": self.completed, "errors": self.errors,
+			"rps": round(self.completed / elapsed, 1) if elapsed else 0.0, "request": self.request.summary(),
+			"phases": {p: h.summary() for p, h in self.phases.items() if h.count}}
+
+	def breakdown_lines(self):
+		# phase table for the attack summary; share = phase time / all phase time
+		spent = sum(h.sum for h in self.phases.values()) or 1.0
+		lines = [f"	 {'phase':<10}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'share':>8}"]
+		for name, h in [("request", self.request)] + [(p, self.phases[p]) for p in PHASES]:
+			if not h.count:
+				continue
+			s = h.summary()
+			share = "" if name == "request" else f"{h.sum / spent * 100:>7.1f}%"
+			lines.append(f"	 {name:<10}{h.count:>8}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}{share:>8}")
+		return lines
+
+def _prometheus_text(snap):
+	out = [
+		"# HELP intrudr_requests_total Requests completed so far.", "# TYPE intrudr_requests_total counter", f"intrudr_requests_total {snap['completed']}",
+		"# HELP intrudr_errors_total Requests that ended in an error.", "# TYPE intrudr_errors_total counter", f"intrudr_errors_total {snap['errors']}",
+		"# HELP intrudr_requests_per_second Average completion rate since the attack started.", "# TYPE intrudr_requests_per_second gauge", f"intrudr_requests_per_second {snap['rps']}",
+		"# HELP intrudr_phase_seconds Per-request phase durations.", "# TYPE intrudr_phase_seconds summary",
+	]
+	for name, s in [("request", snap["request"])] + list(snap["phases"].items()):
+		for q, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+			out.append(f'intrudr_phase_seconds{{phase="{name}",quantile="{q}"}} {s[key] / 1000:.6f}')
+		out.append(f'intrudr_phase_seconds_sum{{phase="{name}"}} {s["sum_s"]:.6f}')
+		out.append(f'intrudr_phase_seconds_count{{phase="{name}"}} {s["count"]}')
+	return "\n".join(out) + "\n"
+
+class MetricsExporter:
+	# Writes a metrics snapshot every METRICS_INTERVAL seconds and once more at the end:
+	# appended as a JSON line, or the whole file rewritten in Prometheus text format (.prom).
+	def __init__(self, metrics, path, append=False):
+		self.metrics = metrics
+		self.path = path
+		if not append and os.path.exists(path):
+			os.remove(path)   # a fresh attack starts a fresh series
+		self.stop = threading.Event()
+		self.thread = threading.Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+	def _run(self):
+		while not self.stop.wait(METRICS_INTERVAL):
+			self.write()
+
+	def write(self):
+		snap = self.metrics.snapshot()
+		try:
+			if self.path.endswith(".prom"):
+				with open(self.path + ".tmp", "w", encoding="utf-8") as fh:
+					fh.write(_prometheus_text(snap))
+				os.replace(self.path + ".tmp", self.path)
+			else:
+				with open(self.path, "a", encoding="utf-8") as fh:
+					fh.write(json.dumps(snap) + "\n")
+		except OSError as e:
+			print(Fore.RED + f"[*] Metrics write failed: {e}" + Style.RESET_ALL)
+
+	def close(self):
+		self.stop.set()
+		self.thread.join()
+		self.write()
+
+# ================================== ORDERED OUTPUT ==================================
+def _missing_result(idx, error="missing result (task failed or cancelled)", combo_frag="(missing)"):
+	return {"idx": idx, "combo_frag": combo_frag, "status": None, "length": 0, "fname": "", "error": error, "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
+
+class ReorderBuffer:
+	# Holds only results that arrived ahead of the next index to emit. Indexes in `skip`
+	# (already done by a resumed attack) are never waited for. `describe(idx)` gives the
+	# combo fragment of a missing result, so a resumed run can match it up by combo.
+	def __init__(self, first=1, skip=None, describe=None):
+		self.skip = skip
+		self.describe = describe
+		self.next_idx = first if skip is None else skip.next_missing(first)
+		self.pending = {}
+
+	def _advance(self):
+		self.next_idx += 1
+		if self.skip is not None:
+			self.next_idx = self.skip.next_missing(self.next_idx)
+
+	def __len__(self):
+		return len(self.pending)
+
+	def push(self, idx, res):
+		self.pending[idx] = res
+
+	def pop_ready(self):
+		while self.next_idx in self.pending:
+			yield self.pending.pop(self.next_idx)
+			self._advance()
+
+	def drain(self, last_idx):
+		# flush everything up to last_idx in order, filling gaps with "missing" records
+		while self.next_idx <= last_idx:
+			res = self.pending.pop(self.next_idx, None)
+			if res is None:
+				res = _missing_result(self.next_idx) if self.describe is None else _missing_result(self.next_idx, combo_frag=self.describe(self.next_idx))
+			yield res
+			self._advance()
+
+SUMMARY_META_HEADER = ["index","params","status","length","req_time_s","error","body_hash"]
+SUMMARY_HEADER = ["index","params","status","length","filename","error","req_time_s","request","full_response","sent_raw_file","body_hash","attempts","retry_reasons","outcome","matched"]
+
+RESULTS_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+	idx INTEGER PRIMARY KEY, params TEXT, status INTEGER, length INTEGER, time REAL,
+	error TEXT, body_hash TEXT, response_ref TEXT, request_ref TEXT,
+	attempts INTEGER, retry_reasons TEXT, outcome TEXT, matched INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_status ON results(status);
+CREATE INDEX IF NOT EXISTS results_length ON results(length);
+CREATE INDEX IF NOT EXISTS results_time ON results(time);
+CREATE INDEX IF NOT EXISTS results_body_hash ON results(body_hash);
+CREATE INDEX IF NOT EXISTS results_outcome ON results(outcome);
+CREATE INDEX IF NOT EXISTS results_matched ON results(matched);
+"""
+
+def open_results_db(path):
+	db = sqlite3.connect(path)
+	db.execute("PRAGMA journal_mode=WAL")
+	db.execute("PRAGMA synchronous=NORMAL")
+	db.executescript(RESULTS_DB_SCHEMA)
+	return db
+
+class ResultWriter:
+	# Background persistence: the response store, summary.csv and the optional SQLite results
+	# DB are written in batches by one thread fed through a bounded queue (a slow disk pushes
+	# back on the emitter instead of growing memory). Written results that got a response
+	# are marked done in the checkpoint, which is saved every CHECKPOINT_INTERVAL seconds.
+	# meta_path: metadata-only copy of the summary rows (SUMMARY_META_HEADER), if given.
+	def __init__(self, summary_path, store, db_path=None, checkpoint=None, metrics=None, on_result=None, meta_path=None):
+		self.q = queue.Queue(maxsize=WRITER_QUEUE_MAX)
+		self.csv_fh = open(summary_path, "a", encoding="utf-8", newline="")
+		self.csv = csv.writer(self.csv_fh)
+		self.meta_fh = open(meta_path, "a", encoding="utf-8", newline="") if meta_path else None
+		self.meta = csv.writer(self.meta_fh) if self.meta_fh else None
+		self.store = store
+		self.db_path = db_path
+		self.checkpoint = checkpoint
+		self.metrics = metrics
+		self.on_result = on_result   # observer called with each result handed to the writer
+		self.error = None
+		self.thread = threading.Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+	def put(self, res, duplicate_of, matched=True):
+		if self.on_result is not None:
+			self.on_result(res)
+		self.q.put((res, duplicate_of, matched))
+
+	def _run(self):
+		db = open_results_db(self.db_path) if self.db_path else None
+		try:
+			while True:
+				batch = [self.q.get()]
+				while len(batch) < WRITER_BATCH_SIZE and batch[-1] is not None:
+					try:
+						batch.append(self.q.get_nowait())
+					except queue.Empty:
+						break
+				done = batch[-1] is None
+				if done:
+					batch.pop()
+				try:
+					self._write_batch(batch, db)
+				except Exception as e:
+					self.error = e
+				if done:
+					break
+		finally:
+			if db is not None:
+				db.close()
+
+	def _write_batch(self, batch, db):
+		t = time.time()
+		rows = []
+		db_rows = []
+		for res, duplicate_of, matched in batch:
+			if matched:
+				try:
+					self.store.save(res)
+				except Exception as e:
+					self.error = e
+			else:
+				res.pop("raw_bytes", None)   # compact row only
+			status = res.get("status")
+			fname = res.get("fname", "")
+			raw_path = res.get("raw_path", "")
+			body_hash = res.get("body_hash") or ""
+			attempts = res.get("attempts", 1)
+			reasons = ";".join(res.get("retry_reasons", ()))
+			outcome = res.get("outcome") or ("error" if res.get("error") else "ok")
+			request_text = res.get("request_text", "") if matched else ""
+			full_response = res.get("full_response", "") if matched and duplicate_of is None else ""
+			rows.append([res["idx"], res.get("combo_frag", ""), status if status is not None else "ERROR", res.get("length", 0), fname, res.get("error") or "", f"{res.get('time', 0.0):.3f}", request_text, full_response, raw_path, body_hash, attempts, reasons, outcome, int(matched)])
+			db_rows.append((res["idx"], res.get("combo_frag", ""), status, res.get("length", 0), res.get("time", 0.0), res.get("error"), body_hash or None, fname, raw_path, attempts, reasons or None, outcome, int(matched)))
+		self.csv.writerows(rows)
+		self.csv_fh.flush()
+		if self.meta is not None:
+			self.meta.writerows([r[0], r[1], r[2], r[3], r[6], r[5], r[10]] for r in rows)
+			self.meta_fh.flush()
+		if db is not None:
+			db.executemany("INSERT OR REPLACE INTO results VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", db_rows)
+			db.commit()
+		if self.metrics is not None and batch:
+			self.metrics.persisted(time.time() - t, len(batch))
+		if self.checkpoint is not None:
+			for res, _, _ in batch:
+				if res.get("status") is not None:
+					self.checkpoint.add(res["idx"])
+			self.checkpoint.maybe_save()
+
+	def close(self):
+		self.q.put(None)
+		self.thread.join()
+		self.csv_fh.close()
+		if self.meta_fh is not None:
+			self.meta_fh.close()
+		self.store.close()
+		if self.checkpoint is not None:
+			self.checkpoint.save()
+		if self.error is not None:
+			print(Fore.RED + f"[*] Result writer error: {self.error}" + Style.RESET_ALL)
+
+class ResultEmitter:
+	# Prints each result strictly in index order and hands it to the background writer.
+	# Results the filter drops are only counted and written as compact rows. With the
+	# auto-baseline the first BASELINE_SAMPLE results are held until the baseline is known.
+	def __init__(self, total, writer, response_filter=None, metrics=None):
+		self.total = total
+		self.writer = writer
+		self.metrics = metrics if metrics is not None else AttackMetrics()
+		self.filter = response_filter or ResponseFilter()
+		self.sampling = [] if self.filter.baseline else None
+		self.filtered = 0
+		self.summary_lines = []
+		self.bodies = {}   # body hash -> [count, first idx, status, length]
+		self.stored = {}   # body hash -> idx whose body was stored
+		self.retries = {}   # failure class -> retries spent on it
+		self.retried = 0
+		self.gave_up = {}   # failure class -> requests that ran out of retries on it
+		self.done = 0
+		self.status_counts = {}
+		self.error_count = 0
+		self.progress = None   # ProgressRenderer in compact mode
+
+	def emit(self, res):
+		if self.filter.baseline:
+			self.filter.observe(res)
+			if self.sampling is not None:
+				self.sampling.append(res)
+				if len(self.sampling) >= BASELINE_SAMPLE:
+					self.flush()
+				return
+		self._emit(res, self.filter.interesting(res))
+
+	def flush(self):
+		held, self.sampling = self.sampling or [], None
+		for res in held:
+			self._emit(res, self.filter.interesting(res))
+
+	def close(self):
+		self.flush()
+		self.writer.close()
+
+	def _emit(self, res, matched):
+		self.metrics.observe(res)
+		self.done += 1
+		if res.get("status") is None:
+			self.error_count += 1
+		else:
+			self.status_counts[res["status"]] = self.status_counts.get(res["status"], 0) + 1
+		total = self.total
+		idx = res["idx"]
+		combo_frag = res.get("combo_frag", "")
+		status = res.get("status")
+		length = res.get("length", 0)
+		error = res.get("error")
+		req_time = res.get("time", 0.0)
+		request_text = res.get("request_text", "")
+		response_preview = res.get("response_preview", "")
+		full_response = res.get("full_response", "")
+		body_hash = res.get("body_hash") or ""
+		reasons = res.get("retry_reasons") or ()
+		outcome = res.get("outcome")
+
+		if reasons:
+			self.retried += 1
+			for r in reasons:
+				self.retries[r] = self.retries.get(r, 0) + 1
+		if RETRY_POLICY.get(outcome, 0) > 0:
+			self.gave_up[outcome] = self.gave_up.get(outcome, 0) + 1
+
+		duplicate_of = None
+		if body_hash:
+			seen = self.bodies.get(body_hash)
+			if seen:
+				seen[0] += 1
+			else:
+				self.bodies[body_hash] = [1, idx, status, length]
+			if matched:
+				duplicate_of = self.stored.get(body_hash) if DEDUPE_BODIES else None
+				self.stored.setdefault(body_hash, idx)
+
+		if not matched:
+			self.filtered += 1
+			self.writer.put(res, None, False)
+			return
+		if self.progress is not None and not self.filter.active:
+			self.writer.put(res, duplicate_of)   # compact mode: nothing flagged it, the status line counts it
+			return
+
+		combo_display = combo_frag.replace("_", " | ") if combo_frag else "(no params)"
+		self.summary_lines.append((idx, total, combo_display, status, length, req_time, error))
+
+		# the whole block goes out in one write instead of a print per line
+		out = [Fore.CYAN + f"\n[{idx}/{total}] Request -> " + Style.RESET_ALL + (combo_display if combo_display else "(no params)")]
+		if request_text:
+			for ln in request_text.splitlines():
+				out.append(Fore.BLUE + "	 >> " + ln + Style.RESET_ALL)
+
+		if error:
+			out.append(Fore.RED + f"	 [-] Failed: {error}" + Style.RESET_ALL)
+		else:
+			if status is not None:
+				if 200 <= status < 300:
+					color, marker = Fore.GREEN, "[*]"
+				elif 300 <= status < 400:
+					color, marker = Fore.YELLOW, "[-]"
+				else:
+					color, marker = Fore.RED, "[-]"
+				out.append(color + f"	 {marker} Status: {status} | Length: {length} bytes | Time: {req_time:.3f}s" + Style.RESET_ALL)
+			else:
+				out.append(Fore.RED + "	 [-] No status returned." + Style.RESET_ALL)
+		if reasons:
+			out.append(Fore.YELLOW + f"	 >> {len(reasons) + 1} attempts (retried on: {', '.join(reasons)})" + Style.RESET_ALL)
+
+		if res.get("truncated"):
+			if STATUS_ONLY:
+				out.append(Fore.YELLOW + "	 >> Body not read (status-only mode)" + Style.RESET_ALL)
+			else:
+				out.append(Fore.YELLOW + f"	 >> Body capped at {MAX_BODY_BYTES} of {length} bytes" + Style.RESET_ALL)
+		if duplicate_of is not None:
+			out.append(Fore.YELLOW + f"	 >> Response body identical to #{duplicate_of} ({body_hash[:12]})" + Style.RESET_ALL)
+		elif full_response:
+			if SHOW_FULL_RESPONSE:
+				out.append(Fore.YELLOW + "	 >> Response body:" + Style.RESET_ALL)
+				count = 0
+				for ln in full_response.splitlines():
+					if MAX_RESPONSE_PRINT and count >= MAX_RESPONSE_PRINT:
+						out.append(Fore.YELLOW + "	  [Console output truncated]" + Style.RESET_ALL)
+						break
+					out.append(Fore.YELLOW + "	  " + ln + Style.RESET_ALL)
+					count += len(ln) + 1
+				if MAX_RESPONSE_PRINT and len(full_response) > MAX_RESPONSE_PRINT:
+					out.append(Fore.YELLOW + f"	  [Response truncated in console at {MAX_RESPONSE_PRINT} chars; full response stored as #{idx}]" + Style.RESET_ALL)
+			else:
+				first_line = response_preview.splitlines()[0] if response_preview.splitlines() else ""
+				out.append(Fore.YELLOW + f"	 >> Response preview: {first_line[:200]}..." + Style.RESET_ALL)
+		elif status is not None and not res.get("truncated"):
+			out.append(Fore.YELLOW + "	 >> Empty response body" + Style.RESET_ALL)
+
+		if self.progress is not None:
+			self.progress.write("\n".join(out))
+		else:
+			print("\n".join(out))
+		self.writer.put(res, duplicate_of)
+
+	def stop_progress(self):
+		if self.progress is not None:
+			self.progress.close()
+
+	def print_summary(self):
+		print(Fore.CYAN + "\n" + "-"*55 + " Attack Summary " + "-"*55 + "\n" + Style.RESET_ALL)
+		if self.filter.active:
+			print(Fore.CYAN + f"[*] {len(self.summary_lines)} interesting, {self.filtered} filtered out" + Style.RESET_ALL)
+			if self.filter.baseline:
+				print(Fore.CYAN + f"[*] Baseline: {self.filter.describe_baseline()}" + Style.RESET_ALL)
+			print()
+		if self.progress is not None:
+			print(Fore.CYAN + f"[*] {self.done} requests | status codes: {_format_status_counts(self.status_counts, 0) or 'none'} | errors: {self.error_count}" + Style.RESET_ALL)
+			if not self.filter.active:
+				print(Fore.CYAN + "[*] Per-request lines are not listed in compact mode; see summary.csv or use MATCH / FILTER to flag results" + Style.RESET_ALL)
+			print()
+		for idx, total, combo_display, status, length, req_time, error in self.summary_lines:
+			if error:
+				line = f"[{idx}/{total}] Request -> {combo_display} \t [-] Failed: {error}"
+				print(Fore.RED + line + Style.RESET_ALL)
+			else:
+				if status is None:
+					line = f"[{idx}/{total}] Request -> {combo_display} \t [-] Status: None | Length: {length} bytes | Time: {req_time:.3f}s"
+					print(Fore.RED + line + Style.RESET_ALL)
+				else:
+					line = f"[{idx}/{total}] Request -> {combo_display} \t [*] Status: {status} | Length: {length} bytes | Time: {req_time:.3f}s"
+					if 200 <= status < 300:
+						print(Fore.GREEN + line + Style.RESET_ALL)
+					elif 300 <= status < 400:
+						print(Fore.YELLOW + line + Style.RESET_ALL)
+					else:
+						print(Fore.RED + line + Style.RESET_ALL)
+
+		if self.bodies:
+			responses = sum(entry[0] for entry in self.bodies.values())
+			print(Fore.CYAN + f"\n[*] Unique response bodies: {len(self.bodies)} across {responses} responses" + Style.RESET_ALL)
+			top = sorted(self.bodies.items(), key=lambda kv: -kv[1][0])[:5]
+			for h, (count, first_idx, status, length) in top:
+				print(f"	 {h[:12]}  x{count}  first: #{first_idx} | Status: {status} | Length: {length} bytes")
+
+		if self.metrics.request.count:
+			print(Fore.CYAN + "\n[*] Phase breakdown (ms):" + Style.RESET_ALL)
+			for ln in self.metrics.breakdown_lines():
+				print(ln)
+
+		if self.retried or self.gave_up:
+			spent = ", ".join(f"{k}: {v}" for k, v in sorted(self.retries.items()))
+			print(Fore.CYAN + f"\n[*] Retried requests: {self.retried} ({spent or 'none'})" + Style.RESET_ALL)
+			if self.gave_up:
+				print(Fore.YELLOW + "	 Out of retries: " + ", ".join(f"{k}: {v}" for k, v in sorted(self.gave_up.items())) + Style.RESET_ALL)
+
+def _format_status_counts(counts, top=6):
+	# "200: 950, 404: 40", most frequent first; top=0 lists all
+	ranked = sorted(counts.items(), key=lambda kv: -kv[1])
+	return ", ".join(f"{code}: {n}" for code, n in (ranked[:top] if top else ranked))
+
+class ProgressRenderer:
+	# Compact console mode: one status line redrawn every PROGRESS_REFRESH seconds by its own
+	# thread, from the emitter's counters, instead of a block per request. Result blocks that
+	# are still printed go through write(), which clears the line first.
+	def __init__(self, emitter, total):
+		self.emitter = emitter
+		self.total = total
+		self.started = time.time()
+		self.tty = sys.stdout.isatty()
+		self.lock = threading.Lock()
+		self.stop = threading.Event()
+		self.thread = threading.Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+	def line(self):
+		e = self.emitter
+		elapsed = time.time() - self.started
+		rate = e.done / elapsed if elapsed else 0.0
+		eta = format_duration((self.total - e.done) / rate).split(".")[0] if rate and e.done < self.total else "-"
+		pct = e.done / self.total * 100 if self.total else 100.0
+		shown = f" | shown: {len(e.summary_lines)}" if e.summary_lines else ""
+		return (f"[*] {e.done}/{self.total} ({pct:.1f}%) | {rate:.1f} req/s | ETA {eta} | "
+			f"{_format_status_counts(e.status_counts) or 'no responses yet'} | errors: {e.error_count}{shown}")
+
+	def _draw(self, final=False):
+		if self.tty:
+			sys.stdout.write("\r\x1b[K" + Fore.CYAN + self.line() + Style.RESET_ALL + ("\n" if final else ""))
+		else:
+			sys.stdout.write(self.line() + "\n")
+		sys.stdout.flush()
+
+	def _run(self):
+		interval = PROGRESS_REFRESH if self.tty else max(PROGRESS_REFRESH, 10.0)
+		while not self.stop.wait(interval):
+			with self.lock:
+				self._draw()
+
+	def write(self, text):
+		with self.lock:
+			sys.stdout.write(("\r\x1b[K" if self.tty else "") + text + "\n")
+			sys.stdout.flush()
+
+	def close(self):
+		if self.stop.is_set():
+			return
+		self.stop.set()
+		self.thread.join()
+		with self.lock:
+			self._draw(final=True)
+
+# ================================== PACING ==================================
+class TokenBucket:
+	# Shared rate limiter: every send takes one token; tokens refill at `rate` per second up to
+	# `burst`. Reservations may go negative so waiters are served in arrival order.
+	def __init__(self, rate, burst=1):
+		self.rate = float(rate)
+		self.capacity = float(max(1, burst))
+		self.tokens = self.capacity
+		self.updated = time.monotonic()
+		self.lock = threading.Lock()
+
+	def reserve(self):
+		# take a token, return how long the caller must wait before sending
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+			self.updated = now
+			self.tokens -= 1
+			return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+	def set_rate(self, rate):
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+			self.updated = now
+			self.rate = float(rate)
+
+	def acquire(self):
+		delay = self.reserve()
+		if delay > 0:
+			time.sleep(delay)
+
+	async def acquire_async(self):
+		delay = self.reserve()
+		if delay > 0:
+			await asyncio.sleep(delay)
+
+_rate_limiter = None   # process-wide TokenBucket for the running attack (None = unlimited)
+
+def _target_rate():
+	return TARGET_RPS or (1.0 / THROTTLE_SECONDS if THROTTLE_SECONDS > 0 else 0)
+
+def configure_rate_limiter(share=1):
+	# TARGET_RPS (or 1 / THROTTLE_SECONDS) split evenly across `share` processes
+	global _rate_limiter
+	rate = _target_rate()
+	_rate_limiter = TokenBucket(rate / share, RATE_BURST) if rate > 0 else None
+
+def set_rate_limit(rate):
+	# distributed worker: the share of the cap the coordinator currently gives this worker
+	global _rate_limiter
+	if rate <= 0:
+		_rate_limiter = None
+	elif _rate_limiter is None:
+		_rate_limiter = TokenBucket(rate, RATE_BURST)
+	else:
+		_rate_limiter.set_rate(rate)
+
+def _pace():
+	if _rate_limiter is not None:
+		_rate_limiter.acquire()
+
+async def _pace_async():
+	if _rate_limiter is not None:
+		await _rate_limiter.acquire_async()
+
+class AdaptiveLimit:
+	# AIMD concurrency control: the in-flight limit grows by ~1 per window of healthy
+	# responses and halves (at most once per cooldown) on 429/503, connection errors or
+	# timeouts, or a latency spike against the running latency baseline.
+	def __init__(self, initial, minimum, maximum):
+		self.minimum = max(1, minimum)
+		self.maximum = max(self.minimum, maximum)
+		self.limit = float(min(max(initial, self.minimum), self.maximum))
+		self.latency = None
+		self.last_cut = 0.0
+		self.cuts = 0
+		self.peak = self.limit
+
+	def window(self):
+		return int(self.limit)
+
+	def on_result(self, res):
+		status = res.get("status")
+		elapsed = res.get("latency", res.get("time", 0.0))
+		# the +50ms floor keeps jitter on very fast targets from reading as a spike
+		spike = self.latency is not None and elapsed > max(self.latency * ADAPTIVE_LATENCY_SPIKE, self.latency + 0.05)
+		if res.get("error") or status in (429, 503) or spike:
+			now = time.monotonic()
+			if now - self.last_cut > max(self.latency or 0.0, 0.5):
+				self.limit = max(self.minimum, self.limit / 2)
+				self.last_cut = now
+				self.cuts += 1
+			return
+		self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+		self.peak = max(self.peak, self.limit)
+		self.latency = elapsed if self.latency is None else 0.9 * self.latency + 0.1 * elapsed
+
+	def describe(self):
+		return f"{self.window()} in flight (peak {int(self.peak)}, {self.cuts} back-offs)"
+
+# ================================== ENGINES ==================================
+def _iter_threaded_results(ex, indexed_combos, template, window, may_submit=None, in_flight=None, adaptive=None, retry_q=None):
+	# Keeps at most `window` tasks in flight (or the AIMD limit instead, up to ADAPTIVE_MAX,
+	# when adaptive), refilled as they complete, and yields (idx, result) in completion order. `may_submit` lets the
+	# caller pause submission. Attempts that ask for a retry wait in `retry_q`, a heap of
+	# (due, idx, combo, retry_reasons), and go ahead of fresh work once due.
+	future_map = {} if in_flight is None else in_flight
+	retry_q = [] if retry_q is None else retry_q
+	combo_of = {}
+	exhausted = False
+	while True:
+		limit = window if adaptive is None else adaptive.window()
+		while retry_q and retry_q[0][0] <= time.time() and len(future_map) < limit:
+			_, idx, combo, reasons = heapq.heappop(retry_q)
+			fut = ex.submit(_send_single_request, idx, combo, template, reasons)
+			future_map[fut] = idx
+			combo_of[fut] = combo
+		while not exhausted and len(future_map) < limit and (may_submit is None or may_submit()):
+			nxt = next(indexed_combos, None)
+			if nxt is None:
+				exhausted = True
+				break
+			idx, combo = nxt
+			fut = ex.submit(_send_single_request, idx, combo, template)
+			future_map[fut] = idx
+			combo_of[fut] = combo
+		if not future_map:
+			if not retry_q:
+				if exhausted:
+					return
+				time.sleep(0.05)   # paused by may_submit with nothing in flight
+				continue
+			time.sleep(max(0.0, retry_q[0][0] - time.time()))
+			continue
+		timeout = max(0.0, retry_q[0][0] - time.time()) if retry_q else None
+		done, _ = wait(future_map, timeout=timeout, return_when=FIRST_COMPLETED)
+		for fut in done:
+			idx = future_map.pop(fut)
+			combo = combo_of.pop(fut)
+			try:
+				res = fut.result()
+			except Exception as e:
+				res = {"idx": idx, "combo_frag": "(unknown)", "status": None, "length": 0, "fname": "", "error": f"Worker exception: {e}", "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
+			if adaptive is not None:
+				adaptive.on_result(res)
+			if "retry_in" in res:
+				heapq.heappush(retry_q, (time.time() + res["retry_in"], idx, combo, res["retry_reasons"]))
+				continue
+			yield idx, res
+
+def _shard_indexes(shard, nshards, total, done=None):
+	indexes = range(1, total + 1) if done is None else done.missing(total)
+	return itertools.islice(indexes, shard, None, nshards)
+
+def _shard_worker(shard, nshards, template, combos, max_workers, out_q, stop_event, credits, segments, done=None):
+	# Child process: sends every nshards-th index (striding keeps shards level, so the
+	# parent's reorder window stays small) with its own thread pool and sessions. Each
+	# submission takes one of this shard's credits; the parent hands it back once the
+	# result has left its reorder buffer, so a stalled shard pauses the others.
+	# The last message is {"shard", "complete", "stats"} instead of a (shard, batch) pair.
+	signal.signal(signal.SIGINT, signal.SIG_IGN)   # the parent owns Ctrl-C
+	SHARED_SEGMENTS.update(segments)   # passed along: a spawned child does not inherit them
+	configure_rate_limiter(share=nshards)
+	adaptive = AdaptiveLimit(max_workers, ADAPTIVE_MIN, ADAPTIVE_MAX) if ADAPTIVE_CONCURRENCY else None
+	pool_size = configure_http_pool(ADAPTIVE_MAX if adaptive else max_workers)
+	ex = ThreadPoolExecutor(max_workers=ADAPTIVE_MAX if adaptive else max_workers)
+	indexed = ((i, combos[i - 1]) for i in itertools.takewhile(lambda _: not stop_event.is_set(), _shard_indexes(shard, nshards, len(combos), done)))
+	batch = []
+	last_flush = time.time()
+	complete = False
+
+	def flush():
+		nonlocal batch, last_flush
+		if batch:
+			out_q.put((shard, batch))
+			batch = []
+		last_flush = time.time()
+
+	def may_submit():
+		# once stopped, submission is let through so `indexed` runs out and the loop ends
+		if stop_event.is_set() or credits.acquire(False):
+			return True
+		flush()   # out of credit: the parent may be waiting on what this shard holds
+		return False
+
+	try:
+		url = _warmup_url(template, combos) if POOL_WARMUP else None
+		if url:
+			warmup_http_pool(url, min(pool_size, -(-POOL_WARMUP // nshards)))
+		for item in _iter_threaded_results(ex, indexed, template, max_workers * SUBMIT_WINDOW_FACTOR, may_submit, adaptive=adaptive):
+			batch.append(item)
+			if len(batch) >= SHARD_BATCH_SIZE or time.time() - last_flush > 0.2:
+				flush()
+		flush()
+		complete = not stop_event.is_set()
+	finally:
+		out_q.put({"shard": shard, "complete": complete, "stats": _conn_stats.snapshot()})
+		ex.shutdown(wait=False)
+
+def _iter_sharded_results(template, combos, max_workers, processes, stop_event, done=None, emitted=None):
+	# `emitted()` is the caller's next index to emit: results below it have left the reorder
+	# buffer and their shard gets the credit back. A shard that exits early (crash, error)
+	# has its unsent indexes reported as missing so the ordered output can move past them.
+	ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+	out_q = ctx.Queue(maxsize=processes * 8)   # children block here when the parent falls behind
+	window = ADAPTIVE_MAX if ADAPTIVE_CONCURRENCY else max_workers * SUBMIT_WINDOW_FACTOR
+	credits = [ctx.Semaphore(max(window, REORDER_WINDOW_MAX // processes)) for _ in range(processes)]
+	procs = [ctx.Process(target=_shard_worker, args=(shard, processes, template, combos, max_workers, out_q, stop_event, credits[shard], dict(SHARED_SEGMENTS), done), daemon=True) for shard in range(processes)]
+	for p in procs:
+		p.start()
+	total = len(combos)
+	received = [IndexRanges() for _ in range(processes)]
+	unreleased = []   # heap of (idx, shard) received but not yet emitted by the caller
+	lost = {}         # shard -> iterator over its indexes that will never arrive
+	live = set(range(processes))
+
+	def lost_results(shard, upto):
+		for idx in lost[shard]:
+			if idx not in received[shard]:
+				yield idx, _missing_result(idx, f"missing result (shard {shard} exited early)", template.combo_frag(combos[idx - 1]))
+			if idx >= upto:
+				return
+		del lost[shard]
+
+	def shard_ended(shard):
+		live.discard(shard)
+		lost[shard] = _shard_indexes(shard, processes, total, done)
+
+	try:
+		while live or lost:
+			next_idx = emitted() if emitted is not None else total + 1
+			while unreleased and unreleased[0][0] < next_idx:
+				credits[heapq.heappop(unreleased)[1]].release()
+			# a lost shard's gaps are filled just ahead of the output, all at once when nothing
+			# else is still running
+			for shard in list(lost):
+				yield from lost_results(shard, next_idx + REORDER_WINDOW_MAX if live else total)
+			if not live:
+				continue
+			try:
+				msg = out_q.get(timeout=0.5)
+			except queue.Empty:
+				for shard in list(live):
+					if not procs[shard].is_alive():
+						shard_ended(shard)   # died without reporting
+				continue
+			if isinstance(msg, dict):   # a shard finished
+				_conn_stats.merge(msg["stats"])
+				if msg["shard"] in live:
+					if msg["complete"]:
+						live.discard(msg["shard"])
+					else:
+						shard_ended(msg["shard"])
+				continue
+			shard, batch = msg
+			if shard not in live:
+				continue   # late batch from a shard already given up on; its indexes were reported
+			for idx, res in batch:
+				received[shard].add(idx)
+				heapq.heappush(unreleased, (idx, shard))
+				yield idx, res
+	finally:
+		stop_event.set()
+		for p in procs:
+			p.join(timeout=2)
+			if p.is_alive():
+				p.terminate()
+
+# ================================== ASYNC ENGINE ==================================
+class AsyncConnectionPool:
+	# Idle keep-alive connections per (scheme, host, port); each in-flight request holds one.
+	# `tunnel` makes proxied plain-http connections go through CONNECT too, so exact-bytes
+	# requests keep their origin-form request line.
+	def __init__(self, tunnel=False):
+		self.idle = {}
+		self.tunnel = tunnel
+		self.ssl_ctx = ssl.create_default_context()
+		self.ssl_ctx.check_hostname = False
+		self.ssl_ctx.verify_mode = ssl.CERT_NONE
+
+	async def acquire(self, key, phases, fresh=False):
+		conns = self.idle.get(key)
+		while conns and not fresh:
+			reader, writer = conns.pop()
+			if not writer.is_closing() and not reader.at_eof():
+				return reader, writer, True
+			writer.close()
+		reader, writer, tcp, tls = await self._open(*key)
+		_conn_stats.opened(tcp + tls)
+		phases["connect"] = phases.get("connect", 0.0) + tcp
+		if tls:
+			phases["tls"] = phases.get("tls", 0.0) + tls
+		return reader, writer, False
+
+	async def warmup(self, key, count):
+		async def open_one():
+			reader, writer, tcp, tls = await self._open(*key)
+			_conn_stats.opened(tcp + tls, warm=True)
+			return reader, writer
+		results = await asyncio.gather(*(open_one() for _ in range(count)), return_exceptions=True)
+		errors = [r for r in results if isinstance(r, BaseException)]
+		for conn in results:
+			if not isinstance(conn, BaseException):
+				self.release(key, *conn)
+		return count - len(errors), (errors[0] if errors else None)
+
+	async def _open(self, scheme, host, port):
+		# returns (reader, writer, TCP connect seconds, TLS + proxy CONNECT seconds)
+		tls = self.ssl_ctx if scheme == "https" else None
+		t = time.perf_counter()
+		if not USE_PROXY:
+			reader, writer = await asyncio.open_connection(host, port)
+			connected = time.perf_counter()
+			if tls:
+				await writer.start_tls(tls, server_hostname=host)
+			return reader, writer, connected - t, time.perf_counter() - connected if tls else 0.0
+		proxy = urlsplit(PROXY_ADDR)
+		reader, writer = await asyncio.open_connection(proxy.hostname, proxy.port or 8080)
+		connected = time.perf_counter()
+		if tls or self.tunnel:
+			writer.write(f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode("latin-1"))
+			await writer.drain()
+			status, _, _ = await _async_read_head(reader)
+			if status != 200:
+				writer.close()
+				raise ConnectionError(f"Proxy CONNECT failed with status {status}")
+			if tls:
+				await writer.start_tls(tls, server_hostname=host)
+			return reader, writer, connected - t, time.perf_counter() - connected
+		return reader, writer, connected - t, 0.0
+
+	def release(self, key, reader, writer):
+		self.idle.setdefault(key, []).append((reader, writer))
+
+	def close(self):
+		for conns in self.idle.values():
+			for _, writer in conns:
+				writer.close()
+		self.idle.clear()
+
+async def _async_read_head(reader):
+	line = await reader.readline()
+	if not line:
+		raise ConnectionResetError("Connection closed before response")
+	parts = line.decode("latin-1").split(" ", 2)
+	if len(parts) < 2 or not parts[1].isdigit():
+		raise ValueError(f"Malformed status line: {line[:100]!r}")
+	headers = []
+	while True:
+		ln = await reader.readline()
+		if ln in (b"\r\n", b"\n", b""):
+			break
+		k, _, v = ln.decode("latin-1").partition(":")
+		headers.append((k.strip(), v.strip()))
+	return int(parts[1]), parts[0], headers
+
+async def _async_read_capped(reader, n, body):
+	# reads n body bytes into a CappedBody
+	while n > 0:
+		piece = await reader.readexactly(min(n, 65536))
+		n -= len(piece)
+		body.feed(piece)
+
+async def _async_read_body(reader, method, status, version, headers):
+	# returns (body, keep_alive, length, truncated); length is None for a full read (the body
+	# is still content-encoded), else the decoded length of a capped or skipped body, which
+	# is then already decoded (see _read_stream_body)
+	h = {k.lower(): v for k, v in headers}
+	conn = h.get("connection", "").lower()
+	keep = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+	declared = _declared_length(method, status, h.get("content-length"), h.get("content-encoding"))
+	if declared == 0:
+		return b"", keep, None, False
+	if STATUS_ONLY:
+		return b"", False, _header_length(h.get("content-length")), True   # unread body: drop the connection
+	capped = CappedBody(headers) if MAX_BODY_BYTES else None
+	if "chunked" in h.get("transfer-encoding", "").lower():
+		chunks = []
+		while True:
+			size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+			if size == 0:
+				while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+					pass   # trailers
+				break
+			if capped is not None:
+				await _async_read_capped(reader, size, capped)
+			else:
+				chunks.append(await reader.readexactly(size))
+			await reader.readexactly(2)
+		if capped is not None:
+			body, length, truncated = capped.result()
+			return body, keep, length, truncated
+		return b"".join(chunks), keep, None, False
+	if "content-length" in h:
+		size = int(h["content-length"])
+		if capped is not None and declared is not None and size > MAX_BODY_BYTES:
+			# the rest is known from Content-Length, no need to download it
+			return await reader.readexactly(MAX_BODY_BYTES), False, size, True
+		if capped is not None:
+			await _async_read_capped(reader, size, capped)
+			body, length, truncated = capped.result()
+			return body, keep, length, truncated
+		return await reader.readexactly(size), keep, None, False
+	if capped is not None:
+		while True:
+			piece = await reader.read(65536)
+			if not piece:
+				break
+			capped.feed(piece)
+		body, length, truncated = capped.result()
+		return body, False, length, truncated
+	return await reader.read(), False, None, False   # body delimited by connection close
+
+def _decode_content_encoding(body, headers):
+	enc = next((v.lower() for k, v in headers if k.lower() == "content-encoding"), "")
+	try:
+		if enc == "gzip":
+			return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body)
+		if enc == "deflate":
+			try:
+				return zlib.decompressobj().decompress(body)
+			except zlib.error:
+				return zlib.decompressobj(-zlib.MAX_WBITS).decompress(body)
+	except zlib.error:
+		pass
+	return body
+
+def build_request_bytes(method, url, headers, body_bytes):
+	# Serialize the way the requests stack would send it: origin-form target (absolute-form
+	# through an HTTP proxy), Host first when missing, session defaults, Content-Length.
+	up = urlsplit(url)
+	if USE_PROXY and up.scheme == "http":
+		target = url
+	else:
+		target = f"{up.path or '/'}{('?' + up.query) if up.query else ''}"
+	hdrs = dict(headers)
+	lower = {k.lower(): k for k in hdrs}
+	if "host" not in lower:
+		hdrs = {"Host": up.netloc, **hdrs}
+	for k, v in (("Accept-Encoding", "gzip, deflate"), ("Accept", "*/*"), ("Connection", "keep-alive")):
+		if k.lower() not in lower:
+			hdrs[k] = v
+	if "content-length" in lower:
+		del hdrs[lower["content-length"]]
+	if body_bytes:
+		hdrs["Content-Length"] = str(len(body_bytes))
+	head = f"{method} {target} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in hdrs.items()) + "\r\n"
+	if isinstance(body_bytes, ChainedBytes):
+		return ChainedBytes([head.encode("utf-8")] + body_bytes.parts)
+	return head.encode("utf-8") + body_bytes
+
+async def _async_exchange(pool, key, raw_bytes, method, phases):
+	# one request/response on a pooled connection; a reused connection the server already
+	# closed gets one transparent retry on a fresh one. Adds the connect/tls/ttfb/download phases.
+	_conn_stats.used()   # once per request, not per connection attempt
+	for fresh in (False, True):
+		reader, writer, reused = await pool.acquire(key, phases, fresh=fresh)
+		try:
+			t = time.time()
+			if isinstance(raw_bytes, ChainedBytes):
+				for buf in raw_bytes:
+					writer.write(buf)
+			else:
+				writer.write(raw_bytes)
+			await writer.drain()
+			status, version, headers = await _async_read_head(reader)
+			head_at = time.time()
+			phases["ttfb"] = head_at - t
+			body, keep, length, truncated = await _async_read_body(reader, method, status, version, headers)
+		except (ConnectionError, asyncio.IncompleteReadError):
+			writer.close()
+			if reused:
+				continue
+			raise
+		except BaseException:
+			writer.close()
+			raise
+		if keep:
+			pool.release(key, reader, writer)
+		else:
+			writer.close()
+		if length is None:
+			body = _decode_content_encoding(body, headers)
+			length = len(body)
+		phases["download"] = time.time() - head_at
+		return status, body, headers, length, truncated
+
+async def _async_send_single(idx, combo, template, pool, raw=False, retry_reasons=None):
+	try:
+		start_req = time.time()
+		if REQUEST_JITTER[1] > 0:
+			await asyncio.sleep(random.uniform(*REQUEST_JITTER))
+		t = time.time()
+		phases = {"wait": t - start_req}
+		combo_frag = template.combo_frag(combo)
+		method = template.method
+		if raw:
+			url, prepared_headers, raw_bytes = template.render_raw(combo)
+		else:
+			url, prepared_headers, new_body = template.render(combo, random.choice(USER_AGENTS))
+		phases["render"] = time.time() - t
+		t = time.time()
+		if not raw:
+			body_bytes = new_body if isinstance(new_body, ChainedBytes) else new_body.encode("utf-8") if new_body else b""
+			raw_bytes = build_request_bytes(method, url, prepared_headers, body_bytes) if url else b""
+		if url is None:
+			return idx, {"idx": idx, "combo_frag": combo_frag, "status": None, "length": 0, "fname": "", "error": "No Host header", "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
+
+		up = urlsplit(url)
+		key = (up.scheme, up.hostname, up.port or (443 if up.scheme == "https" else 80))
+
+		if raw:
+			sent_request_text = (raw_bytes.text() if isinstance(raw_bytes, ChainedBytes) else _decode_body(raw_bytes)).replace("\r\n", "\n")
+		else:
+			sent_request_text = build_sent_request_text(method, url, prepared_headers, new_body)
+		phases["prepare"] = time.time() - t
+		resp, last_exc = None, None
+		t = time.time()
+		await _pace_async()
+		sent_at = time.time()
+		phases["wait"] += sent_at - t
+		try:
+			resp = await asyncio.wait_for(_async_exchange(pool, key, raw_bytes, method, phases), REQUEST_TIMEOUT)
+		except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+			last_exc = e
+		latency = time.time() - sent_at
+		elapsed_req = time.time() - start_req - phases["wait"]
+
+		recorded = raw_bytes if RECORD_PREPARED_RAW else b""
+		if resp is None:
+			failure = _failure_class(last_exc)
+			res = {"idx": idx, "combo_frag": combo_frag, "status": None, "length": 0, "fname": "", "error": f"Failed ({failure}): {last_exc!r}", "time": elapsed_req, "latency": latency, "phases": phases, "request_text": sent_request_text, "response_preview": "", "full_response": "", "raw_path": "", "raw_bytes": recorded}
+			return idx, _finish_attempt(res, retry_reasons, failure)
+		status, content_bytes, resp_headers, length, truncated = resp
+		res = _response_result(idx, combo_frag, status, _decode_body(content_bytes), elapsed_req, sent_request_text, recorded, _capped_body_hash(content_bytes, length, truncated), length, truncated)
+		res["latency"] = latency
+		res["phases"] = phases
+		retry_after = next((_retry_after_seconds(v) for k, v in resp_headers if k.lower() == "retry-after"), None)
+		return idx, _finish_attempt(res, retry_reasons, _status_class(status), retry_after)
+	except Exception as exc:
+		return idx, {"idx": idx, "combo_frag": "(error)", "status": None, "length": 0, "fname": "", "error": str(exc), "time": 0.0, "request_text": "", "response_preview": "", "full_response": "", "raw_path": ""}
+
+async def _async_attack(template, indexed_combos, concurrency, may_submit, out_q, stop_event, raw=False, adaptive=None, warmup=None, ready=None):
+	# Same windowing as the threaded engine, but the window is coroutines on one event loop,
+	# so thousands of requests can be in flight without an OS thread each. Retries wait in a
+	# heap like the threaded engine's and go ahead of fresh work once due.
+	pool = AsyncConnectionPool(tunnel=raw)
+	in_flight = set()
+	combo_of = {}
+	retry_q = []
+	exhausted = False
+	try:
+		if warmup:
+			url, count = warmup
+			up = urlsplit(url)
+			opened, err = await pool.warmup((up.scheme, up.hostname, up.port or (443 if up.scheme == "https" else 80)), count)
+			_print_warmup(opened, count, err)
+		if ready is not None:
+			ready.set()
+		while True:
+			limit = concurrency if adaptive is None else min(concurrency, adaptive.window())
+			while retry_q and retry_q[0][0] <= time.time() and not stop_event.is_set() and len(in_flight) < limit:
+				_, idx, combo, reasons = heapq.heappop(retry_q)
+				task = asyncio.ensure_future(_async_send_single(idx, combo, template, pool, raw, reasons))
+				in_flight.add(task)
+				combo_of[task] = combo
+			while not exhausted and not stop_event.is_set() and len(in_flight) < limit and out_q.qsize() < concurrency and may_submit():
+				nxt = next(indexed_combos, None)
+				if nxt is None:
+					exhausted = True
+					break
+				idx, combo = nxt
+				task = asyncio.ensure_future(_async_send_single(idx, combo, template, pool, raw))
+				in_flight.add(task)
+				combo_of[task] = combo
+			if stop_event.is_set():
+				for task in in_flight:
+					task.cancel()
+				break
+			if not in_flight:
+				if exhausted and not retry_q:
+					break
+				await asyncio.sleep(0.01)   # paused by backpressure or waiting for a retry
+				continue
+			done, in_flight = await asyncio.wait(in_flight, timeout=0.05, return_when=asyncio.FIRST_COMPLETED)
+			for task in done:
+				combo = combo_of.pop(task)
+				idx, res = task.result()
+				if adaptive is not None:
+					adaptive.on_result(res)
+				if "retry_in" in res:
+					heapq.heappush(retry_q, (time.time() + res["retry_in"], idx, combo, res["retry_reasons"]))
+					continue
+				out_q.put((idx, res))
+	finally:
+		pool.close()
+		if ready is not None:
+			ready.set()
+		out_q.put(None)
+
+def _iter_async_results(template, indexed_combos, concurrency, may_submit, stop_event, raw=False, adaptive=None, warmup=None):
+	# The event loop runs in a helper thread; the caller consumes (idx, result) from a queue.
+	# Returns once the loop is up (and done warming connections, if asked to).
+	out_q = queue.Queue()
+	ready = threading.Event()
+	loop_thread = threading.Thread(target=asyncio.run, args=(_async_attack(template, indexed_combos, concurrency, may_submit, out_q, stop_event, raw, adaptive, warmup, ready),), daemon=True)
+	loop_thread.start()
+	ready.wait()
+	return _iter_queue_results(out_q, stop_event)
+
+def _iter_queue_results(out_q, stop_event):
+	try:
+		while True:
+			item = out_q.get()
+			if item is None:
+				break
+			yield item
+	finally:
+		stop_event.set()
+
+# ================================== DISTRIBUTED ==================================
+# ENGINE = "distributed": this process is the coordinator. It keeps the attack definition and
+# the single ordered output, and leases index ranges to `worker HOST:PORT` processes (any
+# number, on any host), which send them with their own engine and stream the results back.
+# Every message is a zlib-compressed frame: a JSON part, then raw request bytes if any.
+DIST_FRAME = struct.Struct("<II")   # compressed payload length, JSON part length
+DIST_MAX_FRAME = 512 * 1024 * 1024
+DIST_BATCH_BYTES = 4 * 1024 * 1024  # body + raw bytes a worker collects before sending a batch
+DIST_RESULT_FIELDS = ["combo_frag", "status", "length", "error", "time", "latency", "phases", "request_text",
+	"full_response", "body_hash", "truncated", "attempts", "retry_reasons", "outcome"]
+
+def _parse_addr(addr):
+	host, _, port = addr.rpartition(":")
+	if not host or not port.isdigit():
+		raise ValueError(f"Bad address (expected HOST:PORT): {addr}")
+	return host.strip("[]"), int(port)
+
+def _index_runs(indexes):
+	# sorted indexes -> [[first, last], ...]
+	runs = []
+	for i in indexes:
+		if runs and runs[-1][1] == i - 1:
+			runs[-1][1] = i
+		else:
+			runs.append([i, i])
+	return runs
+
+class DistConnection:
+	# One framed TCP connection. Any thread may send; only one thread receives.
+	def __init__(self, sock):
+		sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		self.sock = sock
+		self.rfile = sock.makefile("rb")
+		self.lock = threading.Lock()
+
+	def send(self, msg, blob=b""):
+		data = json.dumps(msg).encode("utf-8")
+		payload = zlib.compress(data + blob, 1)
+		with self.lock:
+			self.sock.sendall(DIST_FRAME.pack(len(payload), len(data)) + payload)
+
+	def recv(self):
+		head = self.rfile.read(DIST_FRAME.size)
+		if len(head) < DIST_FRAME.size:
+			raise ConnectionError("connection closed")
+		size, json_len = DIST_FRAME.unpack(head)
+		if size > DIST_MAX_FRAME:
+			raise ConnectionError(f"frame of {size} bytes refused")
+		payload = self.rfile.read(size)
+		if len(payload) < size:
+			raise ConnectionError("connection closed")
+		d = zlib.decompressobj()
+		data = d.decompress(payload, DIST_MAX_FRAME)
+		if d.unconsumed_tail:
+			raise ConnectionError("frame too large")
+		return json.loads(data[:json_len]), data[json_len:]
+
+	def shutdown(self):
+		# unblocks the receiving thread; it closes the connection
+		try:
+			self.sock.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass
+
+	def close(self):
+		self.shutdown()
+		self.rfile.close()
+		self.sock.close()
+
+def _compact_result(res, blob, prefilter=None):
+	# worker -> coordinator record: no preview (rebuilt on the other side), raw request bytes
+	# appended to the frame's blob. Results the static MATCH/FILTER rules drop only need their
+	# summary columns, so their request and body are not sent at all.
+	item = {k: res[k] for k in DIST_RESULT_FIELDS if k in res}
+	item["idx"] = res["idx"]
+	if prefilter is not None and res.get("status") is not None and not prefilter.interesting(res):
+		item.update(prefiltered=True, request_text="", full_response="")
+		return item
+	raw = res.get("raw_bytes")
+	if isinstance(raw, ChainedBytes):
+		# shared template pieces go by key; the coordinator compiled the same template
+		item["raw_chain"] = []
+		for p in raw.parts:
+			if isinstance(p, bytes):
+				item["raw_chain"].append([len(blob), len(p)])
+				blob += p
+			else:
+				item["raw_chain"].append(p)
+	elif raw:
+		item["raw"] = [len(blob), len(raw)]
+		blob += raw
+	return item
+
+def _dist_result(item, blob):
+	res = dict(item, fname="", raw_path="", response_preview=_response_preview(item.get("full_response", "")))
+	raw = res.pop("raw", None)
+	if raw:
+		res["raw_bytes"] = blob[raw[0]:raw[0] + raw[1]]
+	chain = res.pop("raw_chain", None)
+	if chain:
+		res["raw_bytes"] = ChainedBytes([p if isinstance(p, str) else blob[p[0]:p[0] + p[1]] for p in chain])
+	return res
+
+class Coordinator:
+	# Leases up to DIST_LEASE_SIZE indexes at a time, lowest first, so the reorder buffer only
+	# waits on what the workers hold. A worker that disconnects or is silent for
+	# DIST_LEASE_TIMEOUT is dropped and its unfinished indexes go back to the front of the
+	# queue; if they are reported twice after all, the first copy wins. A rate cap is split
+	# evenly across the connected workers: every lease reply carries the worker's current
+	# share, and leases are cut to about a second of sends so a join or leave is picked up
+	# quickly.
+	def __init__(self, definition, done=None, may_lease=None, note=print):
+		total = definition["total"]
+		self.definition = definition
+		self.todo = iter(range(1, total + 1)) if done is None else done.missing(total)
+		self.expected = total - (len(done) if done is not None else 0)
+		self.requeued = []   # heap of indexes taken back from dropped workers
+		self.received = IndexRanges()
+		self.may_lease = may_lease or (lambda: True)
+		self.note = note
+		self.lock = threading.Lock()
+		self.workers = {}   # id -> {"name", "conn", "leased", "last_seen"}
+		self.out_q = queue.Queue()
+		self.stop = threading.Event()
+		self.joined = self.lost = self.releases = self.duplicates = 0
+		self.token = DIST_TOKEN or secrets.token_urlsafe(12)
+		self.rate = _target_rate()
+		host, port = _parse_addr(DIST_LISTEN)
+		self.server = socket.create_server((host, port), family=socket.AF_INET6 if ":" in host else socket.AF_INET)
+		if not self.expected:
+			self.stop.set()
+			self.out_q.put(None)
+		for target in (self._accept, self._reap):
+			threading.Thread(target=target, daemon=True).start()
+		hint = "" if DIST_TOKEN else f" --token {self.token}"
+		print(Fore.CYAN + f"[*] Coordinator listening on {DIST_LISTEN}; start workers with: {sys.argv[0]} worker {DIST_LISTEN}{hint}" + Style.RESET_ALL)
+
+	def _accept(self):
+		while not self.stop.is_set():
+			try:
+				sock, addr = self.server.accept()
+			except OSError:
+				break
+			threading.Thread(target=self._serve, args=(sock, f"{addr[0]}:{addr[1]}"), daemon=True).start()
+
+	def _reap(self):
+		while not self.stop.wait(1.0):
+			now = time.time()
+			with self.lock:
+				silent = [w for w in self.workers.values() if now - w["last_seen"] > DIST_LEASE_TIMEOUT]
+			for w in silent:
+				w["conn"].shutdown()   # its handler drops it and re-queues the leases
+
+	def _serve(self, sock, addr):
+		conn = DistConnection(sock)
+		w = None
+		try:
+			msg, _ = conn.recv()
+			if msg.get("type") != "hello" or not hmac.compare_digest(str(msg.get("token", "")).encode(), self.token.encode()):
+				conn.send({"type": "error", "error": "bad token"})
+				return
+			w = {"id": id(conn), "name": str(msg.get("name") or addr), "conn": conn, "leased": set(), "last_seen": time.time()}
+			with self.lock:
+				self.workers[w["id"]] = w
+				self.joined += 1
+			self.note(Fore.GREEN + f"[*] Worker {w['name']} joined ({len(self.workers)} connected)" + Style.RESET_ALL)
+			conn.send({"type": "attack", "definition": self.definition})
+			while True:
+				msg, blob = conn.recv()
+				w["last_seen"] = time.time()
+				if msg["type"] == "lease":
+					conn.send(self._lease(w))
+				elif msg["type"] == "results":
+					self._results(w, msg["items"], blob)
+				elif msg["type"] == "bye":
+					_conn_stats.merge(msg["conn_stats"])
+					break
+		except (OSError, ValueError, KeyError, TypeError):
+			pass
+		finally:
+			if w is not None:
+				self._drop(w)
+			conn.close()
+
+	def _lease(self, w):
+		with self.lock:
+			if self.stop.is_set():
+				return {"type": "done"}
+			rps = self.rate / max(1, len(self.workers))
+			if not self.may_lease():
+				return {"type": "wait", "rps": rps}
+			size = min(DIST_LEASE_SIZE, math.ceil(rps)) if rps else DIST_LEASE_SIZE
+			got = []
+			while self.requeued and len(got) < size:
+				idx = heapq.heappop(self.requeued)
+				if idx not in self.received:
+					got.append(idx)
+			self.releases += len(got)
+			got.extend(itertools.islice(self.todo, size - len(got)))
+			if not got:
+				return {"type": "wait", "rps": rps}   # all leased out; a dropped worker may still give some back
+			got.sort()
+			w["leased"].update(got)
+		return {"type": "lease", "ranges": _index_runs(got), "rps": rps}
+
+	def _results(self, w, items, blob):
+		# queued under the lock, so the end marker cannot overtake another worker's results
+		with self.lock:
+			for item in items:
+				idx = item["idx"]
+				w["leased"].discard(idx)
+				if idx in self.received:
+					self.duplicates += 1
+					continue
+				self.received.add(idx)
+				self.out_q.put((idx, _dist_result(item, blob)))
+				self.expected -= 1
+				if not self.expected:
+					self.stop.set()
+					self.out_q.put(None)
+
+	def _drop(self, w):
+		with self.lock:
+			self.workers.pop(w["id"], None)
+			lost = [i for i in w["leased"] if i not in self.received]
+			for i in lost:
+				heapq.heappush(self.requeued, i)
+			w["leased"].clear()
+			self.lost += bool(lost)
+		if lost and not self.stop.is_set():
+			self.note(Fore.YELLOW + f"[*] Worker {w['name']} dropped with {len(lost)} leased request(s); re-queued" + Style.RESET_ALL)
+
+	def results(self):
+		try:
+			yield from _iter_queue_results(self.out_q, self.stop)
+		finally:
+			self.close()
+
+	def close(self):
+		self.stop.set()
+		self.server.close()
+		deadline = time.time() + 2.0
+		while self.workers and not self.expected and time.time() < deadline:
+			time.sleep(0.05)   # finished workers are saying goodbye (connection stats)
+		with self.lock:
+			for w in self.workers.values():
+				w["conn"].shutdown()
+
+	def describe(self):
+		return (f"{self.joined} worker(s) joined, {self.lost} dropped with leases, {self.releases} requests re-leased, "
+			f"{self.duplicates} duplicate results ignored")
+
+class LeaseFeed:
+	# Worker side: (idx, combo) over the leases granted to this worker. A helper thread asks
+	# for the next lease once half of the current one is handed out, so neither engine waits
+	# on the round trip, and ready() tells the async engine whether next() would block its
+	# event loop. Ends when the coordinator has nothing to lease right now (state "wait"), is
+	# finished ("done") or is gone ("lost").
+	def __init__(self, conn, combos):
+		self.conn = conn
+		self.combos = combos
+		self.pending = collections.deque()
+		self.cond = threading.Condition()
+		self.state = None
+		threading.Thread(target=self._fetch, daemon=True).start()
+
+	def _fetch(self):
+		size = 0
+		try:
+			while True:
+				with self.cond:
+					while len(self.pending) > size // 2:
+						self.cond.wait()
+				self.conn.send({"type": "lease"})
+				msg, _ = self.conn.recv()
+				set_rate_limit(msg.get("rps", 0))
+				if msg["type"] != "lease":
+					state = msg["type"]
+					break
+				indexes = [i for a, b in msg["ranges"] for i in range(a, b + 1)]
+				size = len(indexes)
+				with self.cond:
+					self.pending.extend(indexes)
+					self.cond.notify_all()
+		except (OSError, ValueError, KeyError):
+			state = "lost"
+		with self.cond:
+			self.state = state
+			self.cond.notify_all()
+
+	def ready(self):
+		return bool(self.pending) or self.state is not None
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		with self.cond:
+			while not self.pending:
+				if self.state is not None:
+					raise StopIteration
+				self.cond.wait()
+			idx = self.pending.popleft()
+			self.cond.notify_all()
+		return idx, self.combos[idx - 1]
+
+def _dist_work(conn, definition, engine, max_workers):
+	# Sends leased requests until the coordinator is done with the attack; returns the number
+	# of results sent. Result batches are flushed like a shard's, or sooner with big bodies.
+	values = [_values_from_spec(spec) for spec in definition["values"]]
+	combos, ordered_keys = generate_combos_from_values(dict(zip(definition["ordered_keys"], values)), definition["attack_mode"])
+	if len(combos) != definition["total"]:
+		raise ValueError(f"combo count differs: {len(combos)} here, {definition['total']} on the coordinator")
+	req = definition["request"]
+	template = RequestTemplate(req["method"], req["path"], req["headers"], req["body"], ordered_keys, definition["original_placeholders"])
+	prefilter = ResponseFilter(MATCH, FILTER)
+	prefilter = prefilter if prefilter.active else None
+	set_rate_limit(0)   # the coordinator sends this worker's share of the cap with each lease
+	adaptive = None
+	ex = None
+	if engine in ("async", "raw"):
+		configure_http_pool(ASYNC_CONCURRENCY)
+		if ADAPTIVE_CONCURRENCY:
+			adaptive = AdaptiveLimit(min(max_workers, ASYNC_CONCURRENCY), ADAPTIVE_MIN, ASYNC_CONCURRENCY)
+	else:
+		if ADAPTIVE_CONCURRENCY:
+			adaptive = AdaptiveLimit(max_workers, ADAPTIVE_MIN, ADAPTIVE_MAX)
+		configure_http_pool(ADAPTIVE_MAX if adaptive else max_workers)
+		ex = ThreadPoolExecutor(max_workers=ADAPTIVE_MAX if adaptive else max_workers)
+
+	stop = threading.Event()
+	def heartbeat():
+		while not stop.wait(DIST_LEASE_TIMEOUT / 3):
+			try:
+				conn.send({"type": "ping"})
+			except OSError:
+				break
+	threading.Thread(target=heartbeat, daemon=True).start()
+	sent = 0
+	try:
+		while True:
+			feed = LeaseFeed(conn, combos)
+			if ex is None:
+				results = _iter_async_results(template, feed, ASYNC_CONCURRENCY, feed.ready, threading.Event(), raw=(engine == "raw"), adaptive=adaptive)
+			else:
+				results = _iter_threaded_results(ex, feed, template, max(1, max_workers * SUBMIT_WINDOW_FACTOR), feed.ready, adaptive=adaptive)
+			items, blob, size = [], bytearray(), 0
+			last_flush = time.time()
+			try:
+				for _, res in results:
+					items.append(_compact_result(res, blob, prefilter))
+					size += len(items[-1].get("full_response") or "")
+					if len(items) >= SHARD_BATCH_SIZE or size + len(blob) >= DIST_BATCH_BYTES or time.time() - last_flush > 0.2:
+						conn.send({"type": "results", "items": items}, bytes(blob))
+						sent += len(items)
+						items, blob, size = [], bytearray(), 0
+						last_flush = time.time()
+			finally:
+				results.close()
+			if items:
+				conn.send({"type": "results", "items": items}, bytes(blob))
+				sent += len(items)
+			if feed.state != "wait":
+				break
+			time.sleep(1.0)
+		if feed.state == "lost":
+			raise ConnectionError("lost the connection to the coordinator")
+		conn.send({"type": "bye", "conn_stats": _conn_stats.snapshot()})
+	finally:
+		stop.set()
+		if ex is not None:
+			ex.shutdown(wait=False, cancel_futures=True)
+	return sent
+
+# ================================== ORDERED CONCURRENT SENDER ==================================
+def send_requests_concurrent(method, path, headers, body, combos, ordered_keys, outdir, session_headers, original_placeholders, max_workers=MAX_WORKERS, start_time=None, processes=PROCESS_WORKERS, engine=ENGINE, resume=None, on_result=None):
+	# resume: IndexRanges of indexes already done; only the rest is sent and the output is appended to.
+	# on_result: called with every final result as it is written (the benchmark counts with it)
+	os.makedirs(outdir, exist_ok=True)
+	summary_path = os.path.join(outdir, SUMMARY_FILENAME)
+	meta_path = os.path.join(outdir, SUMMARY_META_FILENAME)
+	if resume is None:
+		for p, header in ((summary_path, SUMMARY_HEADER), (meta_path, SUMMARY_META_HEADER)):
+			with open(p, "w", encoding="utf-8", newline="") as slog:
+				csv.writer(slog).writerow(header)
+	elif not os.path.exists(meta_path):
+		meta_path = None   # run started before the metadata file existed; a partial one would mislead `diff`
+
+	total = len(combos)
+	done = None if resume is None else IndexRanges(resume.ranges())   # fixed copy; the checkpoint keeps adding to resume
+	remaining = total - len(done) if done is not None else total
+	processes = min(processes or 1, remaining) or 1
+	ex = None
+	in_flight = {}   # threaded engine: future -> idx, bounded by the submission window
+	retry_q = []     # threaded engine: attempts waiting for their backoff to expire
+	reorder = ReorderBuffer(first=1, skip=done, describe=lambda idx: template.combo_frag(combos[idx - 1]))
+	db_path = os.path.join(outdir, RESULTS_DB) if RESULTS_DB else None
+	checkpoint = None
+	if engine == "distributed" and not isinstance(combos, ComboSpace):
+		engine = "threads"   # a single request is not worth leasing out
+	if CHECKPOINT_INTERVAL and isinstance(combos, ComboSpace) or engine == "distributed":
+		definition = checkpoint_definition(method, path, headers, body, combos, ordered_keys, original_placeholders, max_workers, processes, engine)
+	if CHECKPOINT_INTERVAL and isinstance(combos, ComboSpace):
+		checkpoint = Checkpoint(outdir, definition, resume)
+	store = open_result_store(outdir, append=resume is not None)
+	metrics = AttackMetrics()
+	exporter = MetricsExporter(metrics, os.path.join(outdir, METRICS_FILE), append=resume is not None) if METRICS_FILE else None
+	emitter = ResultEmitter(total, ResultWriter(summary_path, store, db_path, checkpoint, metrics, on_result, meta_path), ResponseFilter(MATCH, FILTER, AUTO_BASELINE), metrics)
+	template = RequestTemplate(method, path, headers, body, ordered_keys, original_placeholders)
+
+	# results arrive in completion order and are emitted as soon as every earlier index is in.
+	# Threaded: submission pauses while the reorder buffer is full. Sharded: each process
+	# strides the index space and the parent merges everything into one ordered stream,
+	# handing each shard send credits back as its results are emitted.
+	# Pacing: the token bucket caps sends per second across all workers, AIMD adapts the
+	# in-flight limit (per shard in sharded mode). Connections are pooled across workers and
+	# optionally warmed up (threads/async) before the attack clock starts. Distributed: the
+	# workers lease index ranges and the coordinator merges their results the same way.
+	indexed = enumerate(combos, start=1) if done is None else ((i, combos[i - 1]) for i in done.missing(total))
+	if done is not None:
+		print(Fore.CYAN + f"[*] Resuming: {len(done)} of {total} requests already done, {remaining} to send" + Style.RESET_ALL)
+	adaptive = None
+	coordinator = None
+	warmup_url = _warmup_url(template, combos) if POOL_WARMUP else None
+	if engine == "distributed":
+		coordinator = Coordinator(definition, done, lambda: len(reorder) < REORDER_WINDOW_MAX,
+			note=lambda text: emitter.progress.write(text) if emitter.progress is not None else print(text))
+		results = coordinator.results()
+	elif engine in ("async", "raw"):
+		configure_rate_limiter()
+		configure_http_pool(ASYNC_CONCURRENCY)
+		if ADAPTIVE_CONCURRENCY:
+			adaptive = AdaptiveLimit(min(max_workers, ASYNC_CONCURRENCY), ADAPTIVE_MIN, ASYNC_CONCURRENCY)
+		label = "Raw exact-bytes" if engine == "raw" else "Async"
+		print(Fore.CYAN + f"[*] {label} engine: up to {ASYNC_CONCURRENCY} requests in flight" + Style.RESET_ALL)
+		warmup = (warmup_url, min(POOL_WARMUP, ASYNC_CONCURRENCY)) if warmup_url else None
+		results = _iter_async_results(template, indexed, ASYNC_CONCURRENCY, lambda: len(reorder) < REORDER_WINDOW_MAX, threading.Event(), raw=(engine == "raw"), adaptive=adaptive, warmup=warmup)
+	elif processes > 1:
+		print(Fore.CYAN + f"[*] Sharding across {processes} processes x {max_workers} threads" + Style.RESET_ALL)
+		configure_http_pool(max_workers)
+		stop_event = mp.Event()
+		results = _iter_sharded_results(template, combos, max_workers, processes, stop_event, done, emitted=lambda: reorder.next_idx)
+	else:
+		configure_rate_limiter()
+		if ADAPTIVE_CONCURRENCY:
+			adaptive = AdaptiveLimit(max_workers, ADAPTIVE_MIN, ADAPTIVE_MAX)
+		pool_size = configure_http_pool(ADAPTIVE_MAX if adaptive else max_workers)
+		if warmup_url:
+			count = min(POOL_WARMUP, pool_size)
+			opened, err = warmup_http_pool(warmup_url, count)
+			_print_warmup(opened, count, err)
+		ex = ThreadPoolExecutor(max_workers=ADAPTIVE_MAX if adaptive else max_workers)
+		window = max(1, max_workers * SUBMIT_WINDOW_FACTOR)
+		results = _iter_threaded_results(ex, indexed, template, window, lambda: len(reorder) < REORDER_WINDOW_MAX, in_flight, adaptive=adaptive, retry_q=retry_q)
+	if start_time is None or warmup_url:
+		start_time = time.time()
+	print(Fore.CYAN + f"\n[*] [Attack started at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}]" + Style.RESET_ALL)
+	rate = _target_rate()
+	if rate:
+		print(Fore.CYAN + f"[*] Rate limit: {rate:g} requests/s" + Style.RESET_ALL)
+	if OUTPUT_MODE == "compact" and remaining > 1:   # a single request is always shown in full
+		emitter.progress = ProgressRenderer(emitter, remaining)
+	try:
+		for idx, res in results:
+			reorder.push(idx, res)
+			for r in reorder.pop_ready():
+				emitter.emit(r)
+	except KeyboardInterrupt:
+		emitter.stop_progress()
+		print(Fore.YELLOW + "\nKeyboardInterrupt detected — cancelling pending tasks..." + Style.RESET_ALL)
+	except Exception as e:
+		emitter.stop_progress()
+		print(Fore.RED + f"\nCollector error: {e}" + Style.RESET_ALL)
+	finally:
+		results.close()
+		for fut in in_flight:
+			fut.cancel()
+		if ex is not None:
+			ex.shutdown(wait=False, cancel_futures=True)
+		# whatever was submitted but never emitted (interrupt/collector error) is flushed as missing
+		last_idx = max([reorder.next_idx - 1, *reorder.pending, *in_flight.values(), *(entry[1] for entry in retry_q)])
+		try:
+			for res in reorder.drain(last_idx):
+				emitter.emit(res)
+		except KeyboardInterrupt:
+			pass
+		emitter.close()
+		emitter.stop_progress()
+		if exporter is not None:
+			exporter.close()
+		SHARED_SEGMENTS.clear()   # a batch run must not keep every earlier job's request body
+
+	emitter.print_summary()
+	if adaptive is not None:
+		print(Fore.CYAN + f"\n[*] Adaptive concurrency ended at {adaptive.describe()}" + Style.RESET_ALL)
+	if coordinator is not None:
+		print(Fore.CYAN + f"\n[*] Distributed: {coordinator.describe()}" + Style.RESET_ALL)
+	if _conn_stats.requests:
+		print(Fore.CYAN + f"\n[*] Connections: {_conn_stats.describe()}" + Style.RESET_ALL)
+
+	elapsed = time.time() - start_time
+	print(Fore.CYAN + f"\n[*] Total attack time: {elapsed:.2f} s ({format_duration(elapsed)})" + Style.RESET_ALL)
+
+# ================================== BENCHMARK ==================================
+# A local stand-in target (own process, so it does not compete with the attack for the GIL)
+# and a runner that drives the real batch path once per case in a fresh forked process, so
+# peak RSS and connection state are per case.
+BENCH_CASE_KEYS = ["mode", "engine", "workers", "processes", "body_bytes", "output", "latency_ms", "keepalive", "error_rate", "reset_rate", "requests"]
+BENCH_ENGINES = ["threads", "async", "raw"]
+BENCH_OUTPUTS = {   # output settings swept by `bench --outputs`
+	"archive": {"RESPONSE_STORE": "archive"},
+	"files": {"RESPONSE_STORE": "files"},
+	"db": {"RESPONSE_STORE": "archive", "RESULTS_DB": "results.db"},
+	"compact": {"MATCH": {"status": [999]}},   # nothing matches: summary rows only, no bodies stored
+	"raw-off": {"RESPONSE_STORE": "archive", "RECORD_PREPARED_RAW": False},
+	"verbose": {"RESPONSE_STORE": "archive", "OUTPUT_MODE": "verbose", "SHOW_FULL_RESPONSE": True},   # every request printed (to /dev/null unless --verbose)
+}
+
+def _bench_server(port_q, latency, body_size, keepalive, error_rate, reset_rate):
+	rng = random.Random(0)
+	filler = (b"A" * 63 + b"\n") * (body_size // 64 + 1)
+
+	class Handler(http.server.BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1" if keepalive else "HTTP/1.0"
+		disable_nagle_algorithm = True
+
+		def handle_one_request(self):
+			try:
+				super().handle_one_request()
+			except ConnectionError:
+				self.close_connection = True
+
+		def _respond(self):
+			n = int(self.headers.get("Content-Length") or 0)
+			if n:
+				self.rfile.read(n)
+			if latency:
+				time.sleep(latency)
+			roll = rng.random()
+			if roll < reset_rate:
+				self.close_connection = True
+				self.connection.shutdown(2)   # drop without a response
+				return
+			body = (self.path.encode() + b"\n" + filler)[:body_size]   # distinct per request, so body dedupe does not hide store costs
+			self.send_response(500 if roll < reset_rate + error_rate else 200)
+			self.send_header("Content-Type", "text/plain")
+			self.send_header("Content-Length", str(len(body)))
+			if not keepalive:
+				self.send_header("Connection", "close")
+			self.end_headers()
+			self.wfile.write(body)
+
+		do_GET = do_POST = _respond
+
+		def log_message(self, *args):
+			pass
+
+	http.server.ThreadingHTTPServer.request_queue_size = 4096
+	server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+	server.daemon_threads = True
+	port_q.put(server.server_address[1])
+	server.serve_forever()
+
+def _bench_job(case, port, outdir):
+	# same request/values shape for every case (two params, each given its values); the mode
+	# decides how the values combine
+	n = case["requests"]
+	if case["mode"] == "Sniper":
+		a = max(1, n // 2)
+		b = max(1, n - a)
+	elif case["mode"] == "Clusterbomb":
+		a, b = max(1, n // 10), 10
+	else:
+		a = b = n
+	raw = f"POST /bench?q=1 HTTP/1.1\nHost: 127.0.0.1:{port}\nContent-Type: application/x-www-form-urlencoded\n\nuser=x"
+	return {"raw": raw, "values": {"q": [str(i) for i in range(a)], "user": [f"u{i}" for i in range(b)]}, "mode": case["mode"],
+		"outdir": outdir, "workers": case["workers"], "processes": case["processes"], "engine": case["engine"]}
+
+def _bench_case(case, port, outdir, result_q, verbose):
+	# child process: one attack, then its metrics ({"failed": reason} if the attack raised)
+	try:
+		_bench_attack(case, port, outdir, result_q, verbose)
+	except Exception as e:
+		result_q.put({"failed": f"{type(e).__name__}: {e}"})
+
+def _bench_attack(case, port, outdir, result_q, verbose):
+	random.seed(0)
+	if not verbose:
+		sys.stdout = open(os.devnull, "w")
+	_apply_config(dict({"REQUEST_JITTER": (0, 0), "SHOW_FULL_RESPONSE": False, "METRICS_FILE": "bench_metrics.jsonl", "METRICS_INTERVAL": 3600}, **BENCH_OUTPUTS[case["output"]]))
+	times = array.array("d")
+	errors = [0]
+
+	def count(res):
+		times.append(res.get("time", 0.0))
+		if res.get("error") or (res.get("status") or 0) >= 500:
+			errors[0] += 1
+
+	started = time.perf_counter()
+	run_job(_bench_job(case, port, outdir), outdir, on_result=count)
+	elapsed = time.perf_counter() - started
+	lat = sorted(times)
+	def pct(p):
+		return round(lat[min(len(lat) - 1, int(p / 100 * len(lat)))] * 1000, 3) if lat else None
+	rss = None
+	if resource is not None:
+		# the peak of the single biggest process (the attack or one shard), not a total:
+		# the OS only reports the largest child
+		rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+	with open(os.path.join(outdir, METRICS_FILE), "r", encoding="utf-8") as fh:
+		phases = json.loads(fh.read().splitlines()[-1])["phases"]
+	os.remove(os.path.join(outdir, METRICS_FILE))
+	written = 0
+	for root, _, files in os.walk(outdir):
+		written += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+	result_q.put({"completed": len(lat), "errors": errors[0], "elapsed_s": round(elapsed, 4), "rps": round(len(lat) / elapsed, 1) if elapsed else None,
+		"lat_p50_ms": pct(50), "lat_p90_ms": pct(90), "lat_p99_ms": pct(99), "lat_max_ms": round(lat[-1] * 1000, 3) if lat else None,
+		"max_process_rss_kb": rss, "bytes_written": written, "phases": {p: {k: v[k] for k in ("mean_ms", "p50_ms", "p99_ms")} for p, v in phases.items()}})
+
+def run_bench_case(case, keep_output=False, verbose=False):
+	ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+	port_q = ctx.Queue()
+	server = ctx.Process(target=_bench_server, args=(port_q, case["latency_ms"] / 1000.0, case["body_bytes"], case["keepalive"], case["error_rate"], case["reset_rate"]), daemon=True)
+	server.start()
+	outdir = tempfile.mkdtemp(prefix="intrudr_bench_")
+	try:
+		port = port_q.get(timeout=10)
+		result_q = ctx.Queue()
+		child = ctx.Process(target=_bench_case, args=(case, port, outdir, result_q, verbose))
+		child.start()
+		try:
+			while True:
+				try:
+					return result_q.get(timeout=1.0)
+				except queue.Empty:
+					if not child.is_alive() and result_q.empty():
+						return {"failed": f"case process exited with code {child.exitcode} before reporting"}
+		finally:
+			child.join()
+	finally:
+		server.terminate()
+		server.join()
+		if keep_output:
+			print(Fore.CYAN + f"[*] Output kept in {outdir}" + Style.RESET_ALL)
+		else:
+			shutil.rmtree(outdir, ignore_errors=True)
+
+def _bench_run_info():
+	try:
+		commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=5).stdout.strip() or None
+	except (OSError, subprocess.SubprocessError):
+		commit = None
+	return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit, "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def _bench_key(case):
+	return tuple(case[k] for k in BENCH_CASE_KEYS)
+
+def _load_bench_results(path):
+	# case key -> metrics of the last run of that case in a results file
+	with open(path, "r", encoding="utf-8") as fh:
+		rows = [json.loads(ln) for ln in fh if ln.strip()]
+	return {_bench_key(row["case"]): row["metrics"] for row in rows if "failed" not in row["metrics"]}
+
+# ================================== RUN DIFF ==================================
+# Compares two runs of an attack by combo (the params column), from metadata only: the
+# results DB when the run has one, else summary_meta.csv (summary.csv for older runs). Bodies are read from the response
+# store only for the entries shown as changed.
+DIFF_KINDS = ["status", "length", "body", "new_error", "fixed", "only_a", "only_b"]
+DIFF_LABELS = {"status": "status changed", "length": "length changed", "body": "body changed", "new_error": "new errors",
+	"fixed": "errors fixed", "only_a": "only in A", "only_b": "only in B"}
+NO_HASH = bytes(16)
+DIFF_BODY_LINES = 40   # unified diff lines printed per changed body
+
+class RunMeta:
+	# One run's results as parallel arrays (index, status, length, time, 16-byte body hash)
+	# plus a combo -> position dict; error texts are kept for failed requests only. When an
+	# index appears twice (resumed run) its last row wins.
+	def __init__(self, outdir):
+		self.outdir = outdir
+		self.pos = {}
+		self.idx = array.array("Q")
+		self.status = array.array("i")   # -1 = error
+		self.length = array.array("q")
+		self.time = array.array("d")
+		self.hashes = bytearray()
+		self.errors = {}
+		db_path = self._db_path()
+		if db_path:
+			self.source = os.path.basename(db_path)
+			db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+			try:
+				for row in db.execute("SELECT idx, params, status, length, time, error, body_hash FROM results ORDER BY idx"):
+					self._add(*row)
+			finally:
+				db.close()
+		else:
+			# the metadata-only file when the run has one, else the full summary.csv
+			self.source = SUMMARY_META_FILENAME if os.path.exists(os.path.join(outdir, SUMMARY_META_FILENAME)) else SUMMARY_FILENAME
+			with open(os.path.join(outdir, self.source), "r", encoding="utf-8", newline="") as fh:
+				rows = csv.reader(fh)
+				cols = {name: i for i, name in enumerate(next(rows))}
+				c_idx, c_params, c_status, c_len, c_time, c_err, c_hash = (cols[n] for n in ("index", "params", "status", "length", "req_time_s", "error", "body_hash"))
+				for r in rows:
+					status = None if r[c_status] == "ERROR" else int(r[c_status])
+					self._add(int(r[c_idx]), r[c_params], status, int(r[c_len] or 0), float(r[c_time] or 0), r[c_err], r[c_hash])
+
+	def _db_path(self):
+		# the run's own RESULTS_DB setting (from its checkpoint), else the current one
+		saved = load_checkpoint(self.outdir)
+		for name in ((saved[0]["config"].get("RESULTS_DB") if saved else None), RESULTS_DB):
+			if name and os.path.exists(os.path.join(self.outdir, name)):
+				return os.path.join(self.outdir, name)
+		return None
+
+	def _add(self, idx, params, status, length, seconds, error, body_hash):
+		p = self.pos.get(params)
+		h = bytes.fromhex(body_hash) if body_hash else NO_HASH
+		if p is None:
+			p = self.pos[params] = len(self.idx)
+			self.idx.append(idx)
+			self.status.append(-1 if status is None else status)
+			self.length.append(length or 0)
+			self.time.append(seconds or 0.0)
+			self.hashes += h
+		else:
+			self.idx[p], self.status[p], self.length[p], self.time[p] = idx, -1 if status is None else status, length or 0, seconds or 0.0
+			self.hashes[p * 16:p * 16 + 16] = h
+		if status is None:
+			self.errors[p] = error or "error"
+		else:
+			self.errors.pop(p, None)
+
+	def __len__(self):
+		return len(self.idx)
+
+	def hash(self, p):
+		return bytes(self.hashes[p * 16:p * 16 + 16])
+
+	def median_time(self):
+		times = sorted(t for t, s in zip(self.time, self.status) if s >= 0)
+		return times[len(times) // 2] if times else 0.0
+
+class RunBodies:
+	# Reads stored response bodies of one run: from the archive, or from the per-request /
+	# deduplicated body files of the "files" store. None when the body was not stored
+	# (e.g. the result was filtered out).
+	def __init__(self, outdir):
+		self.outdir = outdir
+		self.reader = ArchiveReader(outdir) if os.path.exists(os.path.join(outdir, ARCHIVE_DIRNAME, ARCHIVE_INDEX_NAME)) else None
+
+	def get(self, idx, params, body_hash):
+		if self.reader is not None:
+			view = self.reader.get(idx, ARCHIVE_RESPONSE)
+			if view is None:
+				return None
+			with view:
+				return _decode_body(bytes(view))
+		for name in ((f"{BODIES_DIRNAME}/{body_hash.hex()}.txt" if body_hash != NO_HASH else None), _response_fname(idx, params)):
+			if name and os.path.exists(os.path.join(self.outdir, name)):
+				with open(os.path.join(self.outdir, name), "r", encoding="utf-8", errors="replace") as fh:
+					return fh.read()
+		return None
+
+	def close(self):
+		if self.reader is not None:
+			self.reader.close()
+
+def diff_runs(a, b):
+	# (kind, combo, position in a or None, position in b or None) for every combo that
+	# differs, in run B's order, then the combos B no longer has. One dict lookup per combo.
+	out = []
+	for params, pb in b.pos.items():
+		pa = a.pos.get(params)
+		if pa is None:
+			out.append(("only_b", params, None, pb))
+			continue
+		sa, sb = a.status[pa], b.status[pb]
+		if sb < 0:
+			if sa >= 0:
+				out.append(("new_error", params, pa, pb))
+		elif sa < 0:
+			out.append(("fixed", params, pa, pb))
+		elif sa != sb:
+			out.append(("status", params, pa, pb))
+		elif a.length[pa] != b.length[pb]:
+			out.append(("length", params, pa, pb))
+		elif a.hash(pa) != b.hash(pb):
+			out.append(("body", params, pa, pb))
+	for params, pa in a.pos.items():
+		if params not in b.pos:
+			out.append(("only_a", params, pa, None))
+	return out
+
+# ================================== CLI ==================================
+def archive_cli(args):
+	try:
+		reader = ArchiveReader(args.outdir)
+	except FileNotFoundError:
+		print(Fore.RED + f"[*] No archive found in '{args.outdir}'." + Style.RESET_ALL)
+		return 1
+	try:
+		if args.action == "ls":
+			for idx in reader.indexes():
+				req = reader.size(idx, ARCHIVE_REQUEST)
+				resp = reader.size(idx, ARCHIVE_RESPONSE)
+				print(f"{idx}\trequest: {'-' if req is None else req} bytes\tresponse: {'-' if resp is None else resp} bytes")
+			return 0
+		if args.idx is None:
+			print(Fore.RED + "[*] An index is required." + Style.RESET_ALL)
+			return 1
+		kind, label = (ARCHIVE_REQUEST, "request") if args.request else (ARCHIVE_RESPONSE, "response")
+		view = reader.get(args.idx, kind)
+		if view is None:
+			print(Fore.RED + f"[*] No {label} stored for index {args.idx}." + Style.RESET_ALL)
+			return 1
+		with view:
+			if args.action == "cat":
+				sys.stdout.flush()
+				sys.stdout.buffer.write(view)
+				sys.stdout.flush()
+			else:
+				dest = args.dest or (f"sent_raw_{args.idx:04d}.bin" if args.request else f"response_{args.idx:04d}.txt")
+				safe_write_file(dest, bytes(view))
+				print(Fore.CYAN + f"[*] Saved {label} {args.idx} to {dest}" + Style.RESET_ALL)
+		return 0
+	finally:
+		reader.close()
+
+SESSION_HEADERS = ["User-Agent","Accept","Accept-Language","Content-Type","Origin","Referer"]
+ATTACK_MODES = ["Sniper", "Clusterbomb", "Pitchfork", "Battering-ram"]
+
+def _job_values(spec, name, default):
+	# one parameter's values from a job file: "default", {"file": path}, {"manual": value}
+	# or a list of values
+	if spec is None or spec == "default":
+		if default is None:
+			raise ValueError(f"No detected/default value for '{name}'")
+		return [default]
+	if isinstance(spec, list):
+		return [str(v) for v in spec]
+	if isinstance(spec, dict) and "file" in spec:
+		vals = load_wordlist(spec["file"])
+		if not vals:
+			raise ValueError(f"File for '{name}' is empty: {spec['file']}")
+		return vals
+	if isinstance(spec, dict) and "manual" in spec:
+		return [str(spec["manual"])]
+	raise ValueError(f"Bad value source for '{name}': {spec!r}")
+
+def _apply_config(overrides):
+	# sets module config constants for one job; returns the previous values. Every name is
+	# checked first, so an unknown one leaves the config untouched.
+	g = globals()
+	unknown = [name for name in overrides if not (name.isupper() and name in g)]
+	if unknown:
+		raise ValueError(f"Unknown config option(s): {', '.join(unknown)}")
+	old = {name: g[name] for name in overrides}
+	g.update(overrides)
+	return old
+
+def run_job(job, base_dir, on_result=None):
+	# One attack from a job dict, same flow as the interactive main() without the prompts.
+	# Relative paths are resolved against the job file's folder. on_result: see send_requests_concurrent.
+	def resolve(p):
+		return p if os.path.isabs(p) else os.path.join(base_dir, p)
+
+	if "raw" in job:
+		raw = job["raw"]
+	else:
+		with open(resolve(job["request"]), "r", encoding="utf-8", errors="ignore") as fh:
+			raw = fh.read()
+	method, path, headers, body = parse_request(raw)
+	params, placeholder_names, original_placeholders = detect_parameters_and_placeholders(path, body, headers)
+	ordered = list(params.keys()) + placeholder_names
+	if not ordered:
+		raise ValueError("No parameters or placeholders in the request")
+
+	specs = job.get("values", {})
+	values_dict = {}
+	for i, k in enumerate(ordered):
+		if k in params:
+			spec, default = specs.get(k), params[k]
+		else:
+			orig = original_placeholders[i - len(params)] if i - len(params) < len(original_placeholders) else ""
+			spec, default = specs.get(k, specs.get(orig)), orig
+		if isinstance(spec, dict) and "file" in spec:
+			spec = dict(spec, file=resolve(spec["file"]))
+		values_dict[k] = _job_values(spec, k, default)
+	values_dict = apply_payload_processing(values_dict, placeholder_names, original_placeholders)
+
+	attack_mode = job.get("mode") or ("Sniper" if len(ordered) == 1 else "Clusterbomb")
+	if attack_mode not in ATTACK_MODES:
+		raise ValueError(f"Unknown attack mode: {attack_mode}")
+	combos, ordered_keys = generate_combos_from_values(values_dict, attack_mode)
+	outdir = resolve(job.get("outdir", "responses"))
+	print(Fore.MAGENTA + f"\n[*] Total requests to send: {len(combos)} using {attack_mode} -> {outdir}" + Style.RESET_ALL)
+	send_requests_concurrent(method, path, headers, body, combos, ordered_keys, outdir, SESSION_HEADERS, original_placeholders,
+		max_workers=job.get("workers", MAX_WORKERS), processes=job.get("processes", PROCESS_WORKERS), engine=job.get("engine", ENGINE), on_result=on_result)
+
+def _load_jobs(jobfile):
+	with open(jobfile, "r", encoding="utf-8") as fh:
+		data = json.load(fh)
+	jobs = data.get("jobs", [data]) if isinstance(data, dict) else data
+	defaults = data.get("defaults", {}) if isinstance(data, dict) else {}
+	return [dict(defaults, **job) for job in jobs]
+
+def batch_cli(args):
+	# Runs every job of every job file back to back in this process: imports, the HTTP
+	# adapter and its idle keep-alive connections carry over from one job to the next.
+	pending = []
+	for jobfile in args.jobfiles:
+		try:
+			pending.extend((jobfile, job) for job in _load_jobs(jobfile))
+		except (OSError, ValueError) as e:
+			print(Fore.RED + f"[*] Cannot load job file '{jobfile}': {e}" + Style.RESET_ALL)
+			return 1
+	start_all = time.time()
+	failed = 0
+	for n, (jobfile, job) in enumerate(pending, start=1):
+		name = job.get("name") or job.get("request") or f"job {n}"
+		print(Fore.LIGHTCYAN_EX + f"\n[*] ===== Job {n}/{len(pending)}: {name} =====" + Style.RESET_ALL)
+		old = {}
+		try:
+			old = _apply_config(job.get("config", {}))
+			run_job(job, os.path.dirname(os.path.abspath(jobfile)))
+		except KeyboardInterrupt:
+			print(Fore.YELLOW + "\n[*] Batch interrupted." + Style.RESET_ALL)
+			return 130
+		except Exception as e:
+			failed += 1
+			print(Fore.RED + f"[*] Job failed: {e}" + Style.RESET_ALL)
+			if args.stop_on_error:
+				break
+		finally:
+			_apply_config(old)
+	elapsed = time.time() - start_all
+	print(Fore.CYAN + f"\n[*] Batch done: {len(pending) - failed} ok, {failed} failed in {elapsed:.2f} s ({format_duration(elapsed)})" + Style.RESET_ALL)
+	return 1 if failed else 0
+
+def resume_cli(args):
+	# Continues the attack checkpointed in outdir with the same request, values and config:
+	# indexes already done are skipped and results are appended to the existing output.
+	saved = load_checkpoint(args.outdir)
+	if saved is None:
+		print(Fore.RED + f"[*] No checkpoint found in '{args.outdir}'." + Style.RESET_ALL)
+		return 1
+	definition, progress = saved
+	done = IndexRanges(progress["done"])
+	if len(done) >= definition["total"]:
+		print(Fore.CYAN + f"[*] Attack in '{args.outdir}' is already complete ({definition['total']} requests)." + Style.RESET_ALL)
+		return 0
+	old = {}
+	try:
+		old = _apply_config(definition["config"])
+		values = [_values_from_spec(spec) for spec in definition["values"]]
+		combos, ordered_keys = generate_combos_from_values(dict(zip(definition["ordered_keys"], values)), definition["attack_mode"])
+		if len(combos) != definition["total"]:
+			raise ValueError(f"combo count changed: {len(combos)} now, {definition['total']} in the checkpoint")
+		req = definition["request"]
+		print(Fore.MAGENTA + f"\n[*] Resuming {definition['attack_mode']} attack in '{args.outdir}' (last checkpoint {progress['updated']})" + Style.RESET_ALL)
+		send_requests_concurrent(req["method"], req["path"], req["headers"], req["body"], combos, ordered_keys, args.outdir, SESSION_HEADERS, definition["original_placeholders"],
+			max_workers=definition["max_workers"], processes=definition["processes"], engine=definition["engine"], resume=done)
+	except (OSError, ValueError, KeyError) as e:
+		print(Fore.RED + f"[*] Cannot resume: {e}" + Style.RESET_ALL)
+		return 1
+	finally:
+		_apply_config(old)
+	return 0
+
+def bench_cli(args):
+	# Sweeps every combination of the comma-separated axes against the local stand-in server
+	# and appends one JSON line per case (run info, case, metrics) to --out.
+	def axis(text, cast=str):
+		return [cast(v.strip()) for v in text.split(",") if v.strip()]
+	try:
+		axes = {
+			"mode": axis(args.modes), "engine": axis(args.engines), "workers": axis(args.workers, int),
+			"processes": axis(args.processes, int), "body_bytes": axis(args.body_sizes, int), "output": axis(args.outputs),
+			"latency_ms": axis(args.latency_ms, float), "keepalive": [v == "on" for v in axis(args.keepalive)],
+			"error_rate": [args.error_rate], "reset_rate": [args.reset_rate], "requests": [args.requests],
+		}
+		bad = ([m for m in axes["mode"] if m not in ATTACK_MODES] + [e for e in axes["engine"] if e not in BENCH_ENGINES]
+			+ [o for o in axes["output"] if o not in BENCH_OUTPUTS])
+		if bad:
+			raise ValueError(f"unknown mode/engine/output: {', '.join(bad)}")
+		if args.requests < 1:
+			raise ValueError("--requests must be at least 1")
+		baseline = _load_bench_results(args.baseline) if args.baseline else {}
+	except (OSError, ValueError) as e:
+		print(Fore.RED + f"[*] {e}" + Style.RESET_ALL)
+		return 1
+	cases = [dict(zip(BENCH_CASE_KEYS, values)) for values in itertools.product(*(axes[k] for k in BENCH_CASE_KEYS))]
+	info = _bench_run_info()
+	print(Fore.CYAN + f"[*] {len(cases)} case(s) x {args.repeat}, {args.requests} requests each -> {args.out}" + Style.RESET_ALL)
+	print(f"{'mode':<14}{'engine':<8}{'wrk':>4}{'proc':>5}{'body':>8}  {'output':<8}{'lat':>5}{'ka':>4}  {'req/s':>9}{'p50 ms':>8}{'p99 ms':>8}{'proc MB':>8}{'written':>10}{'err':>6}")
+	with open(args.out, "a", encoding="utf-8") as out:
+		for case in cases:
+			for _ in range(args.repeat):
+				metrics = run_bench_case(case, args.keep_output, args.verbose)
+				out.write(json.dumps({"run": info, "case": case, "metrics": metrics}) + "\n")
+				out.flush()
+				if "failed" in metrics:
+					print(Fore.RED + f"{case['mode']:<14}{case['engine']:<8}{case['workers']:>4}{case['processes']:>5}{case['body_bytes']:>8}  {case['output']:<8}  failed: {metrics['failed']}" + Style.RESET_ALL)
+					continue
+				rss = f"{metrics['max_process_rss_kb'] / 1024:.0f}" if metrics["max_process_rss_kb"] else "-"
+				line = (f"{case['mode']:<14}{case['engine']:<8}{case['workers']:>4}{case['processes']:>5}{case['body_bytes']:>8}  {case['output']:<8}"
+					f"{case['latency_ms']:>5g}{'on' if case['keepalive'] else 'off':>4}  {metrics['rps'] or 0:>9.1f}{metrics['lat_p50_ms'] or 0:>8.2f}"
+					f"{metrics['lat_p99_ms'] or 0:>8.2f}{rss:>8}{metrics['bytes_written'] / 1024 / 1024:>9.1f}M{metrics['errors']:>6}")
+				old = baseline.get(_bench_key(case))
+				if old and old.get("rps") and metrics["rps"]:
+					delta = (metrics["rps"] / old["rps"] - 1) * 100
+					line += (Fore.GREEN if delta >= 0 else Fore.RED) + f"  {delta:+.1f}% vs baseline" + Style.RESET_ALL
+				print(line)
+	return 0
+
+def worker_cli(args):
+	# Joins the distributed attack of the coordinator at args.coordinator: takes the attack
+	# definition (request, values, config) from it and sends the leases it hands out until
+	# the attack is done. Wordlists too big to send inline must exist at the same path here.
+	try:
+		conn = DistConnection(socket.create_connection(_parse_addr(args.coordinator), timeout=10))
+	except (OSError, ValueError) as e:
+		print(Fore.RED + f"[*] Cannot reach coordinator '{args.coordinator}': {e}" + Style.RESET_ALL)
+		return 1
+	conn.sock.settimeout(None)
+	name = args.name or f"{socket.gethostname()}:{os.getpid()}"
+	old = {}
+	try:
+		conn.send({"type": "hello", "token": args.token, "name": name})
+		msg, _ = conn.recv()
+		if msg["type"] != "attack":
+			raise ConnectionError(f"refused by coordinator: {msg.get('error', msg['type'])}")
+		definition = msg["definition"]
+		old = _apply_config(definition["config"])
+		max_workers = args.workers or definition["max_workers"]
+		print(Fore.CYAN + f"[*] Worker {name}: {definition['attack_mode']} attack of {definition['total']} requests, {args.engine} engine, {max_workers} workers" + Style.RESET_ALL)
+		t = time.time()
+		sent = _dist_work(conn, definition, args.engine, max_workers)
+		elapsed = time.time() - t
+		print(Fore.CYAN + f"[*] Attack done: {sent} results sent in {elapsed:.2f} s ({format_duration(elapsed)})" + Style.RESET_ALL)
+	except KeyboardInterrupt:
+		print(Fore.YELLOW + "\n[*] Worker interrupted; the coordinator re-issues its leases." + Style.RESET_ALL)
+		return 130
+	except (OSError, ValueError, KeyError) as e:
+		print(Fore.RED + f"[*] Worker stopped: {e}" + Style.RESET_ALL)
+		return 1
+	finally:
+		_apply_config(old)
+		conn.close()
+	if _conn_stats.requests:
+		print(Fore.CYAN + f"[*] Connections: {_conn_stats.describe()}" + Style.RESET_ALL)
+	return 0
+
+def diff_cli(args):
+	# Prints what changed from run A to run B: counts per kind, then the first --limit
+	# entries of each kind with body diffs for up to --bodies of them. Exit status like
+	# diff(1): 0 same, 1 different, 2 trouble.
+	try:
+		t = time.time()
+		a, b = RunMeta(args.run_a), RunMeta(args.run_b)
+	except (OSError, ValueError, KeyError, StopIteration, sqlite3.Error) as e:
+		print(Fore.RED + f"[*] Cannot load run: {e}" + Style.RESET_ALL)
+		return 2
+	changes = diff_runs(a, b)
+	counts = {k: 0 for k in DIFF_KINDS}
+	for kind, *_ in changes:
+		counts[kind] += 1
+	print(Fore.CYAN + f"[*] A: {args.run_a} ({len(a)} results, {a.source})  B: {args.run_b} ({len(b)} results, {b.source})  compared in {time.time() - t:.2f} s" + Style.RESET_ALL)
+	print(" | ".join(f"{DIFF_LABELS[k]}: {counts[k]}" for k in DIFF_KINDS) + f" | unchanged: {len(b) - sum(counts[k] for k in DIFF_KINDS if k != 'only_a')}")
+	print(f"median request time: {a.median_time() * 1000:.1f} ms -> {b.median_time() * 1000:.1f} ms")
+
+	def describe(run, p):
+		if p is None:
+			return "-"
+		if run.status[p] < 0:
+			return f"#{run.idx[p]} ERROR ({run.errors[p][:80]})"
+		return f"#{run.idx[p]} {run.status[p]} len {run.length[p]} {run.time[p] * 1000:.0f} ms"
+
+	bodies_a, bodies_b = RunBodies(args.run_a), RunBodies(args.run_b)
+	try:
+		shown_bodies = 0
+		for kind in DIFF_KINDS:
+			entries = [c for c in changes if c[0] == kind]
+			if not entries:
+				continue
+			color = Fore.RED if kind in ("status", "new_error") else Fore.GREEN if kind == "fixed" else Fore.YELLOW
+			print(color + f"\n[*] {DIFF_LABELS[kind]} ({len(entries)})" + Style.RESET_ALL)
+			for _, params, pa, pb in entries[:args.limit]:
+				print(f"	 {params}: {describe(a, pa)} -> {describe(b, pb)}")
+				if kind not in ("status", "length", "body") or shown_bodies >= args.bodies or a.hash(pa) == b.hash(pb):
+					continue
+				shown_bodies += 1
+				old = bodies_a.get(a.idx[pa], params, a.hash(pa))
+				new = bodies_b.get(b.idx[pb], params, b.hash(pb))
+				if old is None or new is None:
+					print(Fore.YELLOW + "	   (body not stored in " + ("A" if old is None else "B") + ")" + Style.RESET_ALL)
+					continue
+				lines = list(difflib.unified_diff(old.splitlines(), new.splitlines(), "A", "B", lineterm="", n=1))
+				for ln in lines[2:2 + DIFF_BODY_LINES]:
+					print((Fore.GREEN if ln.startswith("+") else Fore.RED if ln.startswith("-") else "") + "	   " + ln + Style.RESET_ALL)
+				if len(lines) > 2 + DIFF_BODY_LINES:
+					print(Fore.YELLOW + f"	   [{len(lines) - 2 - DIFF_BODY_LINES} more diff lines]" + Style.RESET_ALL)
+			if len(entries) > args.limit:
+				print(Fore.YELLOW + f"	 ... {len(entries) - args.limit} more" + Style.RESET_ALL)
+	finally:
+		bodies_a.close()
+		bodies_b.close()
+
+	if args.out:
+		with open(args.out, "w", encoding="utf-8", newline="") as fh:
+			w = csv.writer(fh)
+			w.writerow(["kind", "params", "index_a", "status_a", "length_a", "time_a", "index_b", "status_b", "length_b", "time_b", "error_b"])
+			for kind, params, pa, pb in changes:
+				cols = []
+				for run, p in ((a, pa), (b, pb)):
+					cols += ["", "", "", ""] if p is None else [run.idx[p], run.status[p] if run.status[p] >= 0 else "ERROR", run.length[p], f"{run.time[p]:.3f}"]
+				w.writerow([kind, params] + cols + [b.errors.get(pb, "") if pb is not None else ""])
+		print(Fore.CYAN + f"\n[*] {len(changes)} difference(s) written to {args.out}" + Style.RESET_ALL)
+	return 1 if changes else 0
+
+def build_cli_parser():
+	parser = argparse.ArgumentParser(prog="intrudr_v2beta.py", description="Run without arguments for the interactive attack.")
+	sub = parser.add_subparsers(dest="command", required=True)
+
+	p = sub.add_parser("archive", help="list, print or extract entries of a run's response archive")
+	p.add_argument("action", choices=["ls", "cat", "extract"])
+	p.add_argument("outdir", help="output folder of the run")
+	p.add_argument("idx", type=int, nargs="?", help="request index")
+	p.add_argument("dest", nargs="?", help="file to extract to (extract only)")
+	p.add_argument("--request", action="store_true", help="use the sent raw request instead of the response")
+	p.set_defaults(func=archive_cli)
+
+	p = sub.add_parser("batch", help="run attacks from JSON job files, without prompts, in one process")
+	p.add_argument("jobfiles", nargs="+", help="job file(s): one job, a list of jobs or {\"defaults\": {...}, \"jobs\": [...]}")
+	p.add_argument("--stop-on-error", action="store_true", help="stop at the first failed job")
+	p.set_defaults(func=batch_cli)
+
+	p = sub.add_parser("resume", help="continue an interrupted attack from the checkpoint in its output folder")
+	p.add_argument("outdir", help="output folder of the interrupted run")
+	p.set_defaults(func=resume_cli)
+
+	p = sub.add_parser("worker", help="join a distributed attack (ENGINE = \"distributed\") run by a coordinator")
+	p.add_argument("coordinator", help="HOST:PORT the coordinator listens on (its DIST_LISTEN)")
+	p.add_argument("--token", required=True, help="shared secret printed by the coordinator (its DIST_TOKEN)")
+	p.add_argument("--engine", choices=["threads", "async", "raw"], default="threads", help="engine this worker sends with (default: threads)")
+	p.add_argument("--workers", type=int, help="worker threads (default: the coordinator's)")
+	p.add_argument("--name", help="name shown by the coordinator (default: host:pid)")
+	p.set_defaults(func=worker_cli)
+
+	p = sub.add_parser("diff", help="compare two runs of an attack: changed status, length, body and new errors per combo")
+	p.add_argument("run_a", help="output folder of the earlier run")
+	p.add_argument("run_b", help="output folder of the later run")
+	p.add_argument("--limit", type=int, default=20, help="entries listed per kind of change (default: 20)")
+	p.add_argument("--bodies", type=int, default=5, help="changed entries whose bodies are read and diffed (default: 5)")
+	p.add_argument("--out", help="also write every difference to this CSV file")
+	p.set_defaults(func=diff_cli)
+
+	p = sub.add_parser("bench", help="throughput benchmark against a local stand-in server; axes take comma-separated lists")
+	p.add_argument("--modes", default="Clusterbomb", help="attack modes (default: Clusterbomb)")
+	p.add_argument("--engines", default="threads", help="threads, async, raw (default: threads)")
+	p.add_argument("--workers", default="12", help="worker threads (default: 12)")
+	p.add_argument("--processes", default="1", help="shard processes (default: 1)")
+	p.add_argument("--body-sizes", default="1024", help="response body bytes (default: 1024)")
+	p.add_argument("--outputs", default="archive", help=f"output settings: {', '.join(BENCH_OUTPUTS)} (default: archive)")
+	p.add_argument("--latency-ms", default="0", help="server latency per request (default: 0)")
+	p.add_argument("--keepalive", default="on", help="server keep-alive: on, off (default: on)")
+	p.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses (default: 0)")
+	p.add_argument("--reset-rate", type=float, default=0.0, help="fraction of connections dropped without a response (default: 0)")
+	p.add_argument("--requests", type=int, default=2000, help="requests per case (default: 2000)")
+	p.add_argument("--repeat", type=int, default=1, help="runs per case (default: 1)")
+	p.add_argument("--out", default="bench_results.jsonl", help="JSON lines file the results are appended to")
+	p.add_argument("--baseline", help="earlier results file: print the req/s change per matching case")
+	p.add_argument("--keep-output", action="store_true", help="keep each case's output folder")
+	p.add_argument("--verbose", action="store_true", help="show the attack output")
+	p.set_defaults(func=bench_cli)
+	return parser
+
+# ================================== MAIN ==================================
+def main():
+	start_all = time.time()
+	try:
+		raw = prompt_for_raw_request()
+		method, path, headers, body = parse_request(raw)
+		params, placeholder_names, original_placeholders = detect_parameters_and_placeholders(path, body, headers)
+
+		print(Fore.YELLOW + "\n[*] Auto Detected Parameters:" + Style.RESET_ALL)
+		if params:
+			for i, (k, v) in enumerate(params.items(), start=1):
+				print(f"{i}. {k} = {v}")
+		else:
+			print("\nNone Detected.")
+
+		if placeholder_names:
+			print(Fore.YELLOW + "\n[*] Detected Placeholders {PH} Parameter:\n" + Style.RESET_ALL)
+			for i, ph in enumerate(placeholder_names, start=1):
+				orig = original_placeholders[i-1] if i-1 < len(original_placeholders) else ""
+				print(f"|> {ph} -> ^^{orig}^^")
+		else:
+			print("\nNo Placeholders Detected.")
+
+		detected_placeholders = {ph: (original_placeholders[i-1] if i-1 < len(original_placeholders) else "") for i, ph in enumerate(placeholder_names, start=1)}
+
+		ordered = list(params.keys()) + placeholder_names
+		if not ordered:
+			print(Fore.YELLOW + "No parameters or placeholders to set. Exiting." + Style.RESET_ALL)
+			return
+
+		values_dict = get_parameter_values(list(params.keys()), placeholder_names, detected_params=params, detected_placeholders=detected_placeholders)
+		for k in ordered:
+			if k not in values_dict:
+				if k in params:
+					values_dict[k] = [params[k]]
+				else:
+					values_dict[k] = [""]
+
+		if any(len(vs) == 0 for vs in values_dict.values()):
+			print(Fore.RED + "One or more parameters/placeholders have no values. Aborting." + Style.RESET_ALL)
+			return
+		values_dict = apply_payload_processing(values_dict, placeholder_names, original_placeholders)
+
+		multiple = any(len(vs) > 1 for vs in values_dict.values())
+		session_headers = SESSION_HEADERS
+
+		# Prompt for folder to save responses
+		outdir = input(Fore.CYAN + "\n[*] Enter folder name to save responses (Default: responses): " + Style.RESET_ALL).strip()
+		if not outdir:
 			outdir = "responses"
+		saved = load_checkpoint(outdir)
+		if saved and not saved[1].get("complete"):
+			print(Fore.YELLOW + f"[*] '{outdir}' holds an unfinished attack ({saved[1]['done_count']}/{saved[1]['total']} done). Continue it with: {sys.argv[0]} resume {outdir}" + Style.RESET_ALL)
+			if input("> Start over and overwrite it? [y/N]: ").strip().lower() != "y":
+				return
 
 		if not multiple:
 			combo = tuple(values_dict[k][0] for k in ordered)
@@ -679,7 +4148,7 @@ def main():
 				return
 			print(Fore.MAGENTA + f"\n[*] Total requests to send: {len(combos)} using {attack_mode}" + Style.RESET_ALL)
 			attack_start_time = time.time()
-			send_requests_concurrent(method, path, headers, body, combos, ordered_keys, outdir, session_headers, original_placeholders, max_workers=MAX_WORKERS, start_time=attack_start_time)
+			send_requests_concurrent(method, path, headers, body, combos, ordered_keys, outdir, session_headers, original_placeholders, max_workers=MAX_WORKERS, start_time=attack_start_time, processes=PROCESS_WORKERS, engine=ENGINE)
 
 	except KeyboardInterrupt:
 		elapsed = time.time() - start_all
@@ -699,6 +4168,9 @@ def main():
 #====================MAIN CALL=====================================================
 
 if __name__ == "__main__":
+	if len(sys.argv) > 1:
+		cli_args = build_cli_parser().parse_args()
+		sys.exit(cli_args.func(cli_args))
 	ascii_art = r"""
 					 _____ __   _ _______  ______ _     _ ______   ______
 					   |   | \  |    |    |_____/ |     | |     \ |_____/	
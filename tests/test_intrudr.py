@@ -0,0 +1,994 @@
+import argparse
+import asyncio
+import csv
+import gzip
+import hashlib
+import http.server
+import itertools
+import json
+import multiprocessing as mp
+import os
+import pickle
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import intrudr_v2beta as intrudr
+
+
+@pytest.mark.parametrize("keys", [["id", "userid"], ["userid", "id"]])
+def test_template_param_suffix_of_another_name(keys):
+	vals = {"id": "X", "userid": "Y"}
+	t = intrudr.RequestTemplate("POST", "/a?id=7&userid=5", {"Host": "h", "Cookie": "userid=1; id=2"}, "userid=3&id=4", keys, [])
+	combo = [vals[k] for k in keys]
+	assert t.render(combo, "ua") == ("http://h/a?id=X&userid=Y", {"Host": "h", "Cookie": "userid=Y; id=X", "User-Agent": "ua"}, "userid=Y&id=X")
+	_, _, raw = t.render_raw(combo)
+	assert raw == b"POST /a?id=X&userid=Y HTTP/1.1\r\nHost: h\r\nCookie: userid=Y; id=X\r\nContent-Length: 13\r\n\r\nuserid=Y&id=X"
+
+
+def test_adaptive_limit_above_submit_window(monkeypatch):
+	lock = threading.Lock()
+	state = {"active": 0, "peak": 0}
+
+	def fake_send(idx, combo, template, retry_reasons=None):
+		with lock:
+			state["active"] += 1
+			state["peak"] = max(state["peak"], state["active"])
+		time.sleep(0.2)
+		with lock:
+			state["active"] -= 1
+		return {"idx": idx, "status": 200, "error": "", "time": 0.2}
+
+	monkeypatch.setattr(intrudr, "_send_single_request", fake_send)
+	window = intrudr.MAX_WORKERS * intrudr.SUBMIT_WINDOW_FACTOR
+	adaptive = intrudr.AdaptiveLimit(window + 40, window + 40, window + 40)
+	with ThreadPoolExecutor(max_workers=window + 60) as ex:
+		results = list(intrudr._iter_threaded_results(ex, ((i, (str(i),)) for i in range(1, 301)), None, window, adaptive=adaptive))
+	assert len(results) == 300
+	assert state["peak"] == window + 40
+
+
+def _dying_send(idx, combo, template, retry_reasons=None):
+	if idx == 50:
+		os._exit(1)
+	return {"idx": idx, "status": 200, "error": ""}
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="shards see the patched sender through fork")
+def test_sharded_dead_shard_reported_missing(monkeypatch):
+	monkeypatch.setattr(intrudr, "_send_single_request", _dying_send)
+	monkeypatch.setattr(intrudr, "REORDER_WINDOW_MAX", 50)
+	reorder = intrudr.ReorderBuffer()
+	out = []
+	for idx, res in intrudr._iter_sharded_results(intrudr.RequestTemplate("GET", "/?q=1", {"Host": "h"}, "", ["q"], []), [(str(i),) for i in range(400)], 2, 3, mp.Event(), emitted=lambda: reorder.next_idx):
+		reorder.push(idx, res)
+		out.extend(reorder.pop_ready())
+	assert [r["idx"] for r in out] == list(range(1, 401))
+	assert out[49]["error"].startswith("missing result")
+	assert out[49]["combo_frag"] == "q-49"
+
+
+@pytest.mark.parametrize("encoding", ["", "gzip", "deflate"])
+def test_capped_body_counts_decoded_bytes(monkeypatch, encoding):
+	monkeypatch.setattr(intrudr, "MAX_BODY_BYTES", 100)
+	body = ("héllo wörld " * 500).encode("utf-8")
+	wire = {"": body, "gzip": gzip.compress(body), "deflate": zlib.compress(body)}[encoding]
+	capped = intrudr.CappedBody([("Content-Encoding", encoding)] if encoding else [])
+	for i in range(0, len(wire), 333):
+		capped.feed(wire[i:i + 333])
+	kept, length, truncated = capped.result()
+	assert (kept, length, truncated) == (body[:100], len(body), True)
+
+
+def _bench_case(mode, requests):
+	return dict(zip(intrudr.BENCH_CASE_KEYS, [mode, "threads", 2, 1, 64, "archive", 0.0, True, 0.0, 0.0, requests]))
+
+
+@pytest.mark.parametrize("mode", intrudr.ATTACK_MODES)
+@pytest.mark.parametrize("requests", [1, 20])
+def test_bench_job_builds_every_mode(mode, requests):
+	job = intrudr._bench_job(_bench_case(mode, requests), 1, "out")
+	method, path, headers, body = intrudr.parse_request(job["raw"])
+	params, _, _ = intrudr.detect_parameters_and_placeholders(path, body, headers)
+	assert set(params) == set(job["values"])
+	combos, _ = intrudr.generate_combos_from_values(job["values"], mode)
+	assert len(combos) >= requests
+
+
+def _bench_dies(*args):
+	os._exit(3)
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="the case process sees the patch through fork")
+def test_bench_case_reports_a_dead_child(monkeypatch):
+	monkeypatch.setattr(intrudr, "_bench_attack", _bench_dies)
+	assert intrudr.run_bench_case(_bench_case("Sniper", 4)) == {"failed": "case process exited with code 3 before reporting"}
+	monkeypatch.setattr(intrudr, "_bench_attack", lambda *a: 1 / 0)
+	assert intrudr.run_bench_case(_bench_case("Sniper", 4))["failed"].startswith("ZeroDivisionError")
+
+
+def test_apply_config_unknown_name_changes_nothing():
+	before = intrudr.TARGET_RPS
+	with pytest.raises(ValueError, match="NOT_AN_OPTION"):
+		intrudr._apply_config({"TARGET_RPS": before + 5, "NOT_AN_OPTION": 1})
+	assert intrudr.TARGET_RPS == before
+	old = intrudr._apply_config({"TARGET_RPS": before + 5})
+	assert intrudr.TARGET_RPS == before + 5
+	intrudr._apply_config(old)
+	assert intrudr.TARGET_RPS == before
+
+
+def test_wordlist_spec_accepts_a_copy_by_content(tmp_path, monkeypatch):
+	path = tmp_path / "words.txt"
+	path.write_bytes(b"".join(b"w%d\n" % i for i in range(500)))
+	spec = intrudr._values_spec(intrudr.Wordlist(str(path)))
+	assert spec["blake2b"] == hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+	# building the spec again reuses the digest stored in the line index
+	monkeypatch.setattr(intrudr, "_build_line_index", None)
+	assert intrudr._values_spec(intrudr.Wordlist(str(path))) == spec
+	monkeypatch.undo()
+
+	os.utime(path, ns=(1, 1))   # a copy without preserved times
+	assert list(intrudr._values_from_spec(spec)) == [f"w{i}" for i in range(500)]
+	path.write_bytes(path.read_bytes().replace(b"w1\n", b"x1\n"))
+	with pytest.raises(ValueError, match="content hash differs"):
+		intrudr._values_from_spec(spec)
+
+
+def _free_port():
+	with socket.socket() as sock:
+		sock.bind(("127.0.0.1", 0))
+		return sock.getsockname()[1]
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="the stand-in target is forked")
+def test_distributed_attack_on_one_box(tmp_path, monkeypatch):
+	ctx = mp.get_context("fork")
+	port_q = ctx.Queue()
+	server = ctx.Process(target=intrudr._bench_server, args=(port_q, 0.0, 64, True, 0.0, 0.0), daemon=True)
+	server.start()
+	dist_port = _free_port()
+	for name, value in {"DIST_LISTEN": f"127.0.0.1:{dist_port}", "DIST_TOKEN": "test-token", "DIST_LEASE_SIZE": 16,
+			"REQUEST_JITTER": (0, 0), "OUTPUT_MODE": "compact"}.items():
+		monkeypatch.setattr(intrudr, name, value)
+	workers = []
+
+	def start_workers():
+		for _ in range(200):
+			try:
+				socket.create_connection(("127.0.0.1", dist_port), timeout=1).close()
+				break
+			except OSError:
+				time.sleep(0.05)
+		for engine in ("threads", "async"):
+			workers.append(subprocess.Popen([sys.executable, intrudr.__file__, "worker", f"127.0.0.1:{dist_port}", "--token", "test-token", "--engine", engine],
+				stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+	try:
+		port = port_q.get(timeout=10)
+		threading.Thread(target=start_workers, daemon=True).start()
+		combos, keys = intrudr.generate_combos_from_values({"q": [str(i) for i in range(150)]}, "Sniper")
+		outdir = str(tmp_path / "out")
+		intrudr.send_requests_concurrent("GET", "/t?q=1", {"Host": f"127.0.0.1:{port}"}, "", combos, keys, outdir, [], [], engine="distributed")
+	finally:
+		for w in workers:
+			w.wait(timeout=30)
+		server.terminate()
+	with open(os.path.join(outdir, intrudr.SUMMARY_FILENAME), encoding="utf-8", newline="") as fh:
+		rows = list(csv.DictReader(fh))
+	assert [int(r["index"]) for r in rows] == list(range(1, 151))
+	assert {r["status"] for r in rows} == {"200"}
+	assert [w.returncode for w in workers] == [0, 0]
+
+
+def _write_run(outdir, batches):
+	# each batch is one ResultWriter session: the first starts the run, the rest resume it
+	for n, results in enumerate(batches):
+		summary = os.path.join(outdir, intrudr.SUMMARY_FILENAME)
+		meta = os.path.join(outdir, intrudr.SUMMARY_META_FILENAME)
+		if n == 0:
+			os.makedirs(outdir)
+			for p, header in ((summary, intrudr.SUMMARY_HEADER), (meta, intrudr.SUMMARY_META_HEADER)):
+				with open(p, "w", encoding="utf-8", newline="") as fh:
+					csv.writer(fh).writerow(header)
+		writer = intrudr.ResultWriter(summary, intrudr.open_result_store(outdir, append=n > 0), meta_path=meta)
+		for res in results:
+			writer.put(res, None, matched=False)
+		writer.close()
+
+
+def test_diff_resumed_missing_row_matches_clean_run(tmp_path):
+	def ok(idx):
+		return {"idx": idx, "combo_frag": f"q-{idx}", "status": 200, "length": 10, "error": "", "time": 0.1, "body_hash": "ab" * 16}
+
+	clean = str(tmp_path / "clean")
+	resumed = str(tmp_path / "resumed")
+	_write_run(clean, [[ok(1), ok(2), ok(3)]])
+	_write_run(resumed, [[ok(1), intrudr._missing_result(2, combo_frag="q-2"), intrudr._missing_result(3, combo_frag="q-3")], [ok(2), ok(3)]])
+	a, b = intrudr.RunMeta(clean), intrudr.RunMeta(resumed)
+	assert a.source == b.source == intrudr.SUMMARY_META_FILENAME
+	assert len(b.pos) == 3
+	assert intrudr.diff_runs(a, b) == []
+
+
+def test_wordlist_loaders_agree_on_crlf(tmp_path, monkeypatch):
+	p = tmp_path / "words.txt"
+	p.write_bytes(b"alpha\r\n\r\n  beta \r\n\t\r\ngamma\r\n\xc2\xa0delta\xc2\xa0\r\nla\rst\r\nend")
+	monkeypatch.setattr(intrudr, "WORDLIST_MMAP_BYTES", 1 << 30)
+	plain = intrudr.load_wordlist(str(p))
+	monkeypatch.setattr(intrudr, "WORDLIST_MMAP_BYTES", 0)
+	mapped = intrudr.load_wordlist(str(p))
+	assert isinstance(plain, list) and isinstance(mapped, intrudr.Wordlist)
+	assert plain == ["alpha", "beta", "gamma", "\xa0delta\xa0", "la\rst", "end"]
+	assert [mapped[i] for i in range(len(mapped))] == plain
+	assert list(mapped) == plain
+
+
+def test_async_fresh_retry_counts_one_request(monkeypatch):
+	# the server answers the first request on each connection and drops any later one, so the
+	# second request fails on its reused connection and is retried on a fresh one
+	async def handle(reader, writer):
+		try:
+			await reader.readuntil(b"\r\n\r\n")
+			writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+			await writer.drain()
+			await reader.readuntil(b"\r\n\r\n")
+		except asyncio.IncompleteReadError:
+			pass
+		writer.close()
+
+	async def run():
+		server = await asyncio.start_server(handle, "127.0.0.1", 0)
+		key = ("http", "127.0.0.1", server.sockets[0].getsockname()[1])
+		pool = intrudr.AsyncConnectionPool()
+		raw = b"GET / HTTP/1.1\r\nHost: h\r\n\r\n"
+		try:
+			for _ in range(2):
+				status = (await intrudr._async_exchange(pool, key, raw, "GET", {}))[0]
+				assert status == 200
+		finally:
+			server.close()
+
+	monkeypatch.setattr(intrudr, "_conn_stats", intrudr.ConnStats())
+	asyncio.run(run())
+	assert (intrudr._conn_stats.requests, intrudr._conn_stats.new) == (2, 2)
+
+
+@pytest.mark.parametrize("mode", intrudr.ATTACK_MODES)
+def test_combo_space_index_matches_iteration(mode):
+	lists = [["a", "b", "c"], ["1", "2", "3"], ["x", "y", "z"]]
+	space = intrudr.ComboSpace(lists, mode)
+	combos = list(space)
+	assert len(combos) == len(space)
+	assert [space[i] for i in range(len(space))] == combos
+	assert space[-1] == combos[-1]
+	with pytest.raises(IndexError):
+		space[len(space)]
+
+
+def test_combo_space_orders():
+	lists = [["a", "b"], ["1", "2", "3"]]
+	assert list(intrudr.ComboSpace(lists, "Sniper")) == [("a", "1"), ("b", "1"), ("a", "1"), ("a", "2"), ("a", "3")]
+	assert list(intrudr.ComboSpace(lists, "Battering-ram")) == [("a", "a"), ("b", "b")]
+	assert list(intrudr.ComboSpace(lists, "Clusterbomb")) == list(itertools.product(*lists))
+
+
+def test_combo_space_streams_a_wordlist(tmp_path):
+	p = tmp_path / "words.txt"
+	p.write_text("\n".join(f"w{i}" for i in range(50)))
+	space = intrudr.ComboSpace([intrudr.Wordlist(str(p)), ["1", "2"]], "Clusterbomb")
+	assert list(space) == list(itertools.product([f"w{i}" for i in range(50)], ["1", "2"]))
+	assert space[77] == ("w38", "2")
+
+
+def test_submission_window_bounds_in_flight_and_reads_lazily(monkeypatch):
+	lock = threading.Lock()
+	state = {"active": 0, "peak": 0, "pulled": 0}
+
+	def fake_send(idx, combo, template, retry_reasons=None):
+		with lock:
+			state["active"] += 1
+			state["peak"] = max(state["peak"], state["active"])
+		time.sleep(0.01)
+		with lock:
+			state["active"] -= 1
+		return {"idx": idx, "status": 200, "error": ""}
+
+	def combos():
+		for i in range(1, 201):
+			state["pulled"] += 1
+			yield i, (str(i),)
+
+	monkeypatch.setattr(intrudr, "_send_single_request", fake_send)
+	seen = 0
+	with ThreadPoolExecutor(max_workers=20) as ex:
+		for _ in intrudr._iter_threaded_results(ex, combos(), None, 5):
+			seen += 1
+			assert state["pulled"] <= seen + 5
+	assert seen == 200
+	assert state["peak"] <= 5
+
+
+def test_submission_pauses_while_may_submit_is_false(monkeypatch):
+	monkeypatch.setattr(intrudr, "_send_single_request", lambda idx, combo, template, retry_reasons=None: {"idx": idx, "status": 200, "error": ""})
+	gate = threading.Event()
+	threading.Timer(0.3, gate.set).start()
+	start = time.time()
+	with ThreadPoolExecutor(max_workers=4) as ex:
+		results = list(intrudr._iter_threaded_results(ex, ((i, (str(i),)) for i in range(1, 11)), None, 4, may_submit=gate.is_set))
+	assert len(results) == 10
+	assert time.time() - start >= 0.3
+
+
+def test_reorder_buffer_emits_in_index_order():
+	reorder = intrudr.ReorderBuffer()
+	out = []
+	for idx in (3, 1, 2, 5, 4):
+		reorder.push(idx, {"idx": idx})
+		out.extend(r["idx"] for r in reorder.pop_ready())
+	assert out == [1, 2, 3, 4, 5]
+	assert len(reorder) == 0
+
+
+def test_reorder_buffer_holds_only_results_ahead():
+	reorder = intrudr.ReorderBuffer()
+	reorder.push(2, {"idx": 2})
+	reorder.push(3, {"idx": 3})
+	assert list(reorder.pop_ready()) == [] and len(reorder) == 2
+	reorder.push(1, {"idx": 1})
+	assert [r["idx"] for r in reorder.pop_ready()] == [1, 2, 3] and len(reorder) == 0
+
+
+def test_reorder_buffer_skips_done_and_fills_gaps():
+	done = intrudr.IndexRanges()
+	for idx in (1, 2, 4):
+		done.add(idx)
+	reorder = intrudr.ReorderBuffer(skip=done, describe=lambda idx: f"q-{idx}")
+	reorder.push(3, {"idx": 3})
+	reorder.push(6, {"idx": 6})
+	assert [r["idx"] for r in reorder.pop_ready()] == [3]
+	out = list(reorder.drain(7))
+	assert [r["idx"] for r in out] == [5, 6, 7]
+	assert out[0]["error"].startswith("missing result") and out[0]["combo_frag"] == "q-5"
+	assert out[1] == {"idx": 6}
+
+
+def test_template_fills_placeholders_everywhere():
+	t = intrudr.RequestTemplate("POST", "/u/^^user^^", {"Host": "h", "X-Token": "^^tok^^"}, "name=^^user^^&t=^^tok^^", ["PH1", "PH2"], ["user", "tok"])
+	assert t.render(("bob", "T1"), "ua") == ("http://h/u/bob", {"Host": "h", "X-Token": "T1", "User-Agent": "ua"}, "name=bob&t=T1")
+	assert t.render(("eve", "T2"), "ua")[2] == "name=eve&t=T2"
+
+
+def test_template_without_host_has_no_url():
+	t = intrudr.RequestTemplate("GET", "/?q=1", {}, "", ["q"], [])
+	assert t.render(("x",), "ua")[0] is None
+
+
+def test_shard_indexes_stride_and_skip_done():
+	done = intrudr.IndexRanges()
+	for idx in (2, 3):
+		done.add(idx)
+	shards = [list(intrudr._shard_indexes(s, 3, 10, done)) for s in range(3)]
+	assert shards == [[1, 6, 9], [4, 7, 10], [5, 8]]
+	assert [list(intrudr._shard_indexes(s, 2, 5)) for s in range(2)] == [[1, 3, 5], [2, 4]]
+
+
+def _ok_send(idx, combo, template, retry_reasons=None):
+	return {"idx": idx, "status": 200, "error": "", "pid": os.getpid()}
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="shards see the patched sender through fork")
+def test_sharded_results_cover_every_index_across_processes(monkeypatch):
+	monkeypatch.setattr(intrudr, "_send_single_request", _ok_send)
+	reorder = intrudr.ReorderBuffer()
+	out = []
+	for idx, res in intrudr._iter_sharded_results(intrudr.RequestTemplate("GET", "/?q=1", {"Host": "h"}, "", ["q"], []), [(str(i),) for i in range(300)], 3, 4, mp.Event(), emitted=lambda: reorder.next_idx):
+		reorder.push(idx, res)
+		out.extend(reorder.pop_ready())
+	assert [r["idx"] for r in out] == list(range(1, 301))
+	assert len({r["pid"] for r in out}) == 4
+
+
+def test_async_pool_reuses_keep_alive_connections(monkeypatch):
+	async def handle(reader, writer):
+		try:
+			while True:
+				await reader.readuntil(b"\r\n\r\n")
+				writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello")
+				await writer.drain()
+		except asyncio.IncompleteReadError:
+			pass
+		writer.close()
+
+	async def run():
+		server = await asyncio.start_server(handle, "127.0.0.1", 0)
+		key = ("http", "127.0.0.1", server.sockets[0].getsockname()[1])
+		pool = intrudr.AsyncConnectionPool()
+		try:
+			for _ in range(5):
+				status, body = (await intrudr._async_exchange(pool, key, b"GET / HTTP/1.1\r\nHost: h\r\n\r\n", "GET", {}))[:2]
+				assert (status, body) == (200, b"hello")
+		finally:
+			server.close()
+
+	monkeypatch.setattr(intrudr, "_conn_stats", intrudr.ConnStats())
+	asyncio.run(run())
+	assert (intrudr._conn_stats.requests, intrudr._conn_stats.new) == (5, 1)
+
+
+def test_raw_mode_sends_the_pasted_bytes(monkeypatch):
+	received = []
+
+	async def handle(reader, writer):
+		head = await reader.readuntil(b"\r\n\r\n")
+		length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+		received.append(head + await reader.readexactly(length))
+		writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+		await writer.drain()
+		writer.close()
+
+	async def run():
+		server = await asyncio.start_server(handle, "127.0.0.1", 0)
+		host = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+		headers = {"Host": host, "X-B": "2", "User-Agent": "Pasted/1", "X-A": "1", "Content-Length": "3"}
+		t = intrudr.RequestTemplate("POST", "/p", headers, "q=1&z=0", ["q"], [])
+		try:
+			return await intrudr._async_send_single(1, ("long-value",), t, intrudr.AsyncConnectionPool(), raw=True)
+		finally:
+			server.close()
+
+	monkeypatch.setattr(intrudr, "_conn_stats", intrudr.ConnStats())
+	idx, res = asyncio.run(run())
+	assert res["status"] == 200
+	host = received[0].split(b"Host: ")[1].split(b"\r\n")[0].decode()
+	assert received == [f"POST /p HTTP/1.1\r\nHost: {host}\r\nX-B: 2\r\nUser-Agent: Pasted/1\r\nX-A: 1\r\nContent-Length: 16\r\n\r\nq=long-value&z=0".encode()]
+
+
+def test_archive_round_trip_across_segments(tmp_path):
+	out = str(tmp_path)
+	writer = intrudr.ArchiveWriter(out, segment_bytes=64)
+	for idx in range(1, 21):
+		writer.save({"idx": idx, "status": 200, "full_response": f"response {idx} " * 3, "raw_bytes": f"GET /{idx} HTTP/1.1\r\n\r\n".encode()})
+	writer.close()
+	assert len(os.listdir(os.path.join(out, intrudr.ARCHIVE_DIRNAME))) > 3
+	reader = intrudr.ArchiveReader(out)
+	assert reader.indexes() == list(range(1, 21))
+	for idx in range(1, 21):
+		with reader.get(idx) as body, reader.get(idx, intrudr.ARCHIVE_REQUEST) as req:
+			assert bytes(body) == (f"response {idx} " * 3).encode()
+			assert bytes(req) == f"GET /{idx} HTTP/1.1\r\n\r\n".encode()
+		assert reader.size(idx) == len(f"response {idx} " * 3)
+	assert reader.get(21) is None
+	reader.close()
+
+
+def test_archive_resumed_index_last_record_wins(tmp_path):
+	out = str(tmp_path)
+	writer = intrudr.ArchiveWriter(out)
+	writer.save({"idx": 1, "status": 200, "full_response": "one"})
+	writer.save({"idx": 3, "status": 500, "full_response": "first try"})
+	writer.close()
+	writer = intrudr.ArchiveWriter(out, append=True)
+	writer.save({"idx": 2, "status": 200, "full_response": "two"})
+	writer.save({"idx": 3, "status": 200, "full_response": "second try"})
+	writer.close()
+	reader = intrudr.ArchiveReader(out)
+	assert [bytes(reader.get(i)) for i in (1, 2, 3)] == [b"one", b"two", b"second try"]
+	reader.close()
+	intrudr.ArchiveWriter(out).close()   # a fresh run starts an empty archive
+	assert intrudr.ArchiveReader(out).indexes() == []
+
+
+def _stored(idx, body):
+	return {"idx": idx, "status": 200, "full_response": body, "body_hash": intrudr._body_hash(body.encode()), "combo_frag": f"q-{idx}"}
+
+
+def test_archive_stores_each_body_once(tmp_path, monkeypatch):
+	monkeypatch.setattr(intrudr, "DEDUPE_BODIES", True)
+	out = str(tmp_path)
+	writer = intrudr.ArchiveWriter(out)
+	rows = [_stored(1, "same body"), _stored(2, "other"), _stored(3, "same body")]
+	for res in rows:
+		writer.save(res)
+	writer.close()
+	assert rows[0]["fname"] == rows[2]["fname"] != rows[1]["fname"]
+	assert os.path.getsize(os.path.join(out, intrudr.ARCHIVE_DIRNAME, "segment_00000.bin")) == len("same body") + len("other")
+	reader = intrudr.ArchiveReader(out)
+	assert [bytes(reader.get(i)) for i in (1, 2, 3)] == [b"same body", b"other", b"same body"]
+	reader.close()
+
+
+def test_file_store_writes_each_body_once(tmp_path, monkeypatch):
+	monkeypatch.setattr(intrudr, "DEDUPE_BODIES", True)
+	store = intrudr.FileStore(str(tmp_path))
+	rows = [_stored(1, "same body"), _stored(2, "other"), _stored(3, "same body")]
+	for res in rows:
+		store.save(res)
+	assert rows[0]["fname"] == rows[2]["fname"] != rows[1]["fname"]
+	assert sorted(os.listdir(tmp_path / intrudr.BODIES_DIRNAME)) == sorted(f"{r['body_hash']}.txt" for r in rows[:2])
+
+
+def test_result_writer_fills_summary_and_db(tmp_path):
+	out = str(tmp_path)
+	summary = os.path.join(out, intrudr.SUMMARY_FILENAME)
+	db_path = os.path.join(out, "results.db")
+	with open(summary, "w", encoding="utf-8", newline="") as fh:
+		csv.writer(fh).writerow(intrudr.SUMMARY_HEADER)
+	writer = intrudr.ResultWriter(summary, intrudr.open_result_store(out), db_path)
+	n = intrudr.WRITER_BATCH_SIZE * 2 + 7
+	for idx in range(1, n + 1):
+		writer.put(dict(_stored(idx, f"body {idx % 3}"), length=6, time=0.5), None)
+	writer.put(intrudr._missing_result(n + 1, combo_frag=f"q-{n + 1}"), None)
+	writer.close()
+	assert writer.error is None
+	with open(summary, encoding="utf-8", newline="") as fh:
+		rows = list(csv.DictReader(fh))
+	assert [int(r["index"]) for r in rows] == list(range(1, n + 2))
+	assert rows[0]["params"] == "q-1" and rows[0]["status"] == "200" and rows[0]["req_time_s"] == "0.500"
+	assert rows[-1]["status"] == "ERROR" and rows[-1]["outcome"] == "error"
+	db = sqlite3.connect(db_path)
+	try:
+		assert db.execute("SELECT COUNT(*) FROM results WHERE status = 200").fetchone() == (n,)
+		assert db.execute("SELECT params, error FROM results WHERE status IS NULL").fetchall() == [(f"q-{n + 1}", rows[-1]["error"])]
+	finally:
+		db.close()
+
+
+def test_token_bucket_paces_after_burst():
+	bucket = intrudr.TokenBucket(100, burst=5)
+	delays = [bucket.reserve() for _ in range(10)]
+	assert delays[:5] == [0.0] * 5
+	assert all(b > a for a, b in zip(delays[5:], delays[6:]))
+	assert delays[-1] == pytest.approx(0.05, abs=0.005)
+
+
+def test_token_bucket_holds_a_threaded_rate():
+	bucket = intrudr.TokenBucket(200, burst=1)
+	start = time.monotonic()
+	with ThreadPoolExecutor(max_workers=8) as ex:
+		list(ex.map(lambda _: bucket.acquire(), range(60)))
+	assert time.monotonic() - start >= 59 / 200 * 0.95
+
+
+def test_adaptive_limit_grows_and_halves():
+	adaptive = intrudr.AdaptiveLimit(4, 2, 8)
+	for _ in range(40):
+		adaptive.on_result({"status": 200, "latency": 0.01})
+	assert adaptive.window() > 4
+	grown = adaptive.limit
+	adaptive.on_result({"status": 429, "latency": 0.01})
+	assert adaptive.limit == pytest.approx(max(2, grown / 2)) and adaptive.cuts == 1
+	adaptive.on_result({"status": 503, "latency": 0.01})
+	assert adaptive.cuts == 1   # one cut per cooldown
+	for _ in range(1000):
+		adaptive.on_result({"status": 200, "latency": 0.01})
+	assert adaptive.window() == 8
+
+
+def test_failure_classes_see_through_wrapping():
+	wrapped = intrudr.requests.ConnectionError(OSError("pool", ConnectionRefusedError()))
+	assert intrudr._failure_class(wrapped) == "refused"
+	assert intrudr._failure_class(intrudr.requests.ReadTimeout()) == "timeout"
+	assert intrudr._failure_class(ValueError("x")) == "error"
+	assert [intrudr._status_class(s) for s in (200, 429, 503, None)] == [None, "429", "5xx", None]
+	assert intrudr._retry_after_seconds("7") == 7.0 and intrudr._retry_after_seconds("soon") is None
+
+
+def test_finish_attempt_retries_within_policy(monkeypatch):
+	monkeypatch.setattr(intrudr, "RETRY_POLICY", {"reset": 2, "429": 1})
+	reasons = []
+	for _ in range(2):
+		res = intrudr._finish_attempt({}, reasons, "reset")
+		assert res["retry_in"] > 0
+		reasons = res["retry_reasons"]
+	res = intrudr._finish_attempt({}, reasons, "reset")
+	assert "retry_in" not in res and res["attempts"] == 3 and res["outcome"] == "reset"
+	res = intrudr._finish_attempt({}, [], "429", retry_after=1000)
+	assert res["retry_in"] == intrudr.RETRY_AFTER_MAX
+	assert "retry_in" not in intrudr._finish_attempt({}, [], None)
+
+
+def test_retry_waits_without_holding_a_worker(monkeypatch):
+	def fake_send(idx, combo, template, retry_reasons=None):
+		res = {"idx": idx, "status": 200, "error": ""}
+		if idx == 1 and not retry_reasons:
+			return dict(res, status=429, retry_in=0.3, retry_reasons=["429"])
+		return dict(res, attempts=len(retry_reasons or ()) + 1)
+
+	monkeypatch.setattr(intrudr, "_send_single_request", fake_send)
+	start = time.time()
+	with ThreadPoolExecutor(max_workers=1) as ex:
+		order = [(idx, res["attempts"], time.time() - start) for idx, res in intrudr._iter_threaded_results(ex, ((i, (str(i),)) for i in range(1, 11)), None, 1)]
+	assert [idx for idx, _, _ in order] == list(range(2, 11)) + [1]
+	assert order[-2][2] < 0.3 <= order[-1][2]
+	assert order[-1][1] == 2
+
+
+@pytest.fixture
+def keepalive_server():
+	class Handler(http.server.BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"
+
+		def do_GET(self):
+			self.send_response(200)
+			self.send_header("Content-Length", "2")
+			self.end_headers()
+			self.wfile.write(b"ok")
+
+		def log_message(self, *args):
+			pass
+
+	server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield f"http://127.0.0.1:{server.server_address[1]}/"
+	server.shutdown()
+	server.server_close()
+
+
+def test_warmed_connections_are_reused(keepalive_server, monkeypatch):
+	monkeypatch.setattr(intrudr, "_http_adapter", intrudr.TimedHTTPAdapter(pool_connections=1, pool_maxsize=4))
+	assert intrudr.configure_http_pool(4) == 4
+	assert intrudr.warmup_http_pool(keepalive_server, 3) == (3, None)
+
+	def get(_):
+		resp = intrudr.get_thread_session().get(keepalive_server, verify=False)
+		assert resp.content == b"ok"
+
+	with ThreadPoolExecutor(max_workers=3) as ex:
+		for _ in range(4):
+			list(ex.map(get, range(3)))
+	stats = intrudr._conn_stats
+	assert (stats.requests, stats.warmed) == (12, 3)
+	assert stats.new == 3   # every request went out on a warmed connection
+	assert "pre-warmed" in stats.describe()
+
+
+def _read_async_body(raw_headers, wire, method="GET"):
+	async def run():
+		reader = asyncio.StreamReader()
+		reader.feed_data(wire)
+		reader.feed_eof()
+		return await intrudr._async_read_body(reader, method, 200, "HTTP/1.1", raw_headers)
+	return asyncio.run(run())
+
+
+def test_status_only_skips_the_body(monkeypatch):
+	monkeypatch.setattr(intrudr, "STATUS_ONLY", True)
+	assert _read_async_body([("Content-Length", "5000")], b"x" * 5000) == (b"", False, 5000, True)
+	assert _read_async_body([("Transfer-Encoding", "chunked")], b"5\r\nhello\r\n0\r\n\r\n") == (b"", False, -1, True)
+	assert _read_async_body([("Content-Length", "0")], b"") == (b"", True, None, False)
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_max_body_bytes_keeps_a_prefix(monkeypatch, chunked):
+	monkeypatch.setattr(intrudr, "MAX_BODY_BYTES", 10)
+	body = b"0123456789" * 30
+	if chunked:
+		wire = b"".join(b"%x\r\n%s\r\n" % (len(body[i:i + 64]), body[i:i + 64]) for i in range(0, len(body), 64)) + b"0\r\n\r\n"
+		headers = [("Transfer-Encoding", "chunked")]
+	else:
+		wire, headers = body, [("Content-Length", str(len(body)))]
+	kept, _, length, truncated = _read_async_body(headers, wire)
+	assert (kept, length, truncated) == (body[:10], len(body), True)
+
+
+def test_response_filter_rules():
+	f = intrudr.ResponseFilter({"status": (200, 302), "regex": "admin"}, {"length": (0, 10)})
+	assert f.interesting({"status": 200, "length": 50, "full_response": "x" * 50})
+	assert f.interesting({"status": 500, "length": 50, "full_response": "the admin panel" + "x" * 40})
+	assert not f.interesting({"status": 500, "length": 50, "full_response": "x" * 50})
+	assert not f.interesting({"status": 200, "length": 5, "full_response": "short"})
+	assert f.interesting({"status": None, "error": "Failed (reset)"})
+	with pytest.raises(ValueError):
+		intrudr.ResponseFilter({"size": (1, 2)})
+
+
+class _CollectingWriter:
+	def __init__(self):
+		self.rows = []
+
+	def put(self, res, duplicate_of, matched=True):
+		self.rows.append((res["idx"], matched))
+
+	def close(self):
+		pass
+
+
+def test_auto_baseline_reports_only_deviations(monkeypatch, capsys):
+	monkeypatch.setattr(intrudr, "BASELINE_SAMPLE", 10)
+	lengths = {3: 500, 25: 480}
+	writer = _CollectingWriter()
+	emitter = intrudr.ResultEmitter(40, writer, intrudr.ResponseFilter(baseline=True))
+	for idx in range(1, 41):
+		emitter.emit({"idx": idx, "status": 403 if idx == 31 else 200, "length": lengths.get(idx, 100 + idx % 5), "error": "", "full_response": ""})
+	emitter.close()
+	assert [idx for idx, _ in writer.rows] == list(range(1, 41))
+	assert [idx for idx, matched in writer.rows if matched] == [3, 25, 31]
+	assert emitter.filtered == 37
+
+
+def test_batch_runs_jobs_with_their_own_config(tmp_path, keepalive_server, monkeypatch, capsys):
+	host = keepalive_server.split("/")[2]
+	(tmp_path / "ids.txt").write_text("1\n2\n3\n")
+	jobs = {
+		"defaults": {"raw": f"GET /item?id=0 HTTP/1.1\nHost: {host}\n\n", "engine": "threads", "processes": 1},
+		"jobs": [
+			{"name": "list", "values": {"id": {"file": "ids.txt"}}, "outdir": "out1", "config": {"MAX_WORKERS": 2}},
+			{"name": "inline", "values": {"id": ["a", "b"]}, "outdir": "out2", "config": {"REQUEST_TIMEOUT": 3}},
+			{"name": "broken", "values": {"id": ["x"]}, "outdir": "out3", "config": {"NOT_AN_OPTION": 1}},
+		],
+	}
+	jobfile = tmp_path / "jobs.json"
+	jobfile.write_text(json.dumps(jobs))
+	before = (intrudr.MAX_WORKERS, intrudr.REQUEST_TIMEOUT)
+	assert intrudr.batch_cli(argparse.Namespace(jobfiles=[str(jobfile)], stop_on_error=False)) == 1
+	assert (intrudr.MAX_WORKERS, intrudr.REQUEST_TIMEOUT) == before
+	for outdir, params in (("out1", ["id-1", "id-2", "id-3"]), ("out2", ["id-a", "id-b"])):
+		with open(tmp_path / outdir / intrudr.SUMMARY_FILENAME, encoding="utf-8", newline="") as fh:
+			rows = list(csv.DictReader(fh))
+		assert [(r["params"], r["status"]) for r in rows] == [(p, "200") for p in params]
+	assert not (tmp_path / "out3").exists()
+	assert "1 failed" in capsys.readouterr().out
+
+
+def test_wordlist_index_is_reused_and_rebuilt_on_change(tmp_path):
+	p = tmp_path / "words.txt"
+	p.write_text("a\nb\n\nc\n")
+	words = intrudr.Wordlist(str(p))
+	assert list(words) == ["a", "b", "c"] and words[-1] == "c"
+	assert os.path.exists(str(p) + ".idx")
+	reopened = intrudr.Wordlist(str(p))
+	assert reopened.idx_mm is not None and reopened.digest == words.digest   # served from the saved index
+	p.write_text("a\nb\nc\nd\ne\n")
+	changed = intrudr.Wordlist(str(p))
+	assert len(changed) == 5 and changed[4] == "e" and changed.digest != words.digest
+
+
+def test_wordlist_pickles_by_path(tmp_path):
+	p = tmp_path / "words.txt"
+	p.write_text("\n".join(str(i) for i in range(1000)))
+	words = intrudr.Wordlist(str(p))
+	data = pickle.dumps(words)
+	assert len(data) < 500
+	assert list(pickle.loads(data)) == list(words)
+
+
+def test_rule_chain_applies_rules_in_order():
+	chain = intrudr.compile_rule_chain(["upper", ("prefix", "x-"), "base64"])
+	assert chain("ab") == "eC1BQg=="
+	assert intrudr.compile_rule_chain([("replace", "a", "4"), "urlencode"])("a b") == "4%20b"
+	assert intrudr.compile_rule_chain(["base64decode"])("aGk") == "hi"
+	with pytest.raises(ValueError):
+		intrudr.compile_rule_chain(["rot13"])
+	with pytest.raises(ValueError):
+		intrudr.compile_rule_chain([("prefix",)])
+
+
+def test_processed_values_run_each_value_once(monkeypatch):
+	calls = []
+	monkeypatch.setitem(intrudr.PAYLOAD_RULES, "spy", lambda v: calls.append(v) or v.upper())
+	vals = intrudr.ProcessedValues(["a", "b"], ["spy"])
+	space = intrudr.ComboSpace([vals, [str(i) for i in range(50)]], "Clusterbomb")
+	combos = list(space)
+	assert combos[0] == ("A", "0") and combos[-1] == ("B", "49")
+	assert sorted(calls) == ["", "a", "b"]   # "" is the argument check at compile time
+	assert list(pickle.loads(pickle.dumps(vals))) == ["A", "B"]
+
+
+def test_payload_processing_by_placeholder_name(monkeypatch, capsys):
+	monkeypatch.setattr(intrudr, "PAYLOAD_PROCESSING", {"user": ["md5"], "id": ["hex"]})
+	out = intrudr.apply_payload_processing({"id": ["1"], "PH1": ["bob"], "q": ["x"]}, ["PH1"], ["user"])
+	assert list(out["id"]) == ["31"]
+	assert list(out["PH1"]) == [hashlib.md5(b"bob").hexdigest()]
+	assert out["q"] == ["x"]
+
+
+def test_index_ranges_merge_and_report_gaps():
+	done = intrudr.IndexRanges()
+	for idx in (5, 1, 2, 3, 7, 6, 10):
+		done.add(idx)
+	assert done.ranges() == [[1, 3], [5, 7], [10, 10]] and len(done) == 7
+	assert 6 in done and 4 not in done
+	assert done.next_missing(1) == 4 and done.next_missing(5) == 8
+	assert list(done.missing(11)) == [4, 8, 9, 11]
+	assert intrudr.IndexRanges(done.ranges()).ranges() == done.ranges()
+
+
+def test_resume_sends_only_what_is_left(tmp_path, monkeypatch, capsys):
+	sent = []
+	failing = [True]
+
+	def fake_send(idx, combo, template, retry_reasons=None):
+		sent.append(idx)
+		res = {"idx": idx, "combo_frag": template.combo_frag(combo), "status": 200, "length": 2, "error": "", "time": 0.01, "full_response": "ok"}
+		if idx % 4 == 0 and failing[0]:
+			res.update(status=None, error="Failed (reset): boom")
+		return res
+
+	monkeypatch.setattr(intrudr, "_send_single_request", fake_send)
+	outdir = str(tmp_path / "run")
+	combos, keys = intrudr.generate_combos_from_values({"q": [str(i) for i in range(20)]}, "Sniper")
+	intrudr.send_requests_concurrent("GET", "/?q=1", {"Host": "h"}, "", combos, keys, outdir, [], [], max_workers=4, processes=1, engine="threads")
+	definition, progress = intrudr.load_checkpoint(outdir)
+	assert progress["done_count"] == 15 and not progress["complete"]
+	assert definition["values"] == [[str(i) for i in range(20)]]
+
+	sent.clear()
+	failing[0] = False
+	assert intrudr.resume_cli(argparse.Namespace(outdir=outdir)) == 0
+	assert sorted(sent) == [4, 8, 12, 16, 20]
+	assert intrudr.load_checkpoint(outdir)[1]["complete"]
+	with open(os.path.join(outdir, intrudr.SUMMARY_FILENAME), encoding="utf-8", newline="") as fh:
+		rows = list(csv.DictReader(fh))
+	assert len(rows) == 25 and [r["index"] for r in rows[20:]] == ["4", "8", "12", "16", "20"]
+	assert intrudr.resume_cli(argparse.Namespace(outdir=outdir)) == 0
+	assert "already complete" in capsys.readouterr().out
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="the stand-in target is forked")
+@pytest.mark.parametrize("engine", intrudr.BENCH_ENGINES)
+def test_bench_case_measures_a_run(engine):
+	case = dict(_bench_case("Clusterbomb", 30), engine=engine, error_rate=0.2)
+	result = intrudr.run_bench_case(case)
+	assert "failed" not in result
+	assert result["completed"] >= 30
+	assert 0 < result["errors"] < result["completed"]   # the stand-in answers 500 at the set rate
+	assert result["rps"] > 0 and result["lat_p50_ms"] <= result["lat_max_ms"]
+	assert result["bytes_written"] > 0 and "ttfb" in result["phases"]
+
+
+def test_latency_histogram_percentiles_within_a_bucket():
+	hist = intrudr.LatencyHistogram()
+	for ms in range(1, 1001):
+		hist.add(ms / 1000)
+	assert hist.count == 1000 and hist.max == 1.0
+	for p, exact in ((50, 0.5), (95, 0.95), (99, 0.99)):
+		assert exact <= hist.percentile(p) <= exact * 1.13
+	assert hist.percentile(100) == 1.0
+	assert hist.summary()["mean_ms"] == pytest.approx(500.5)
+
+
+@pytest.mark.parametrize("name", ["metrics.jsonl", "metrics.prom"])
+def test_metrics_exporter_formats(tmp_path, monkeypatch, name):
+	monkeypatch.setattr(intrudr, "METRICS_INTERVAL", 3600)
+	metrics = intrudr.AttackMetrics()
+	for i in range(10):
+		metrics.observe({"time": 0.02, "error": "x" if i == 0 else "", "phases": {"wait": 0.001, "ttfb": 0.015}})
+	metrics.persisted(0.01, 10)
+	path = str(tmp_path / name)
+	intrudr.MetricsExporter(metrics, path).close()
+	text = open(path, encoding="utf-8").read()
+	if name.endswith(".prom"):
+		assert "intrudr_requests_total 10\n" in text and "intrudr_errors_total 1\n" in text
+		assert 'intrudr_phase_seconds_count{phase="ttfb"} 10' in text
+	else:
+		snap = json.loads(text)
+		assert (snap["completed"], snap["errors"]) == (10, 1)
+		assert set(snap["phases"]) == {"wait", "ttfb", "persist"}
+		assert snap["phases"]["persist"]["count"] == 10
+
+
+def test_compact_mode_prints_only_flagged_results(monkeypatch, capsys):
+	monkeypatch.setattr(intrudr, "PROGRESS_REFRESH", 3600)
+	writer = _CollectingWriter()
+	emitter = intrudr.ResultEmitter(20, writer, intrudr.ResponseFilter({"status": (500,)}))
+	emitter.progress = intrudr.ProgressRenderer(emitter, 20)
+	for idx in range(1, 21):
+		emitter.emit({"idx": idx, "combo_frag": f"q-{idx}", "status": 500 if idx == 7 else 200, "length": 2, "error": "", "full_response": "ok", "response_preview": "ok"})
+	emitter.stop_progress()
+	emitter.close()
+	out = capsys.readouterr().out
+	assert out.count("Request -> ") == 1 and "[7/20] Request -> " in out
+	assert out.splitlines()[-1].startswith("[*] 20/20 (100.0%)") and "shown: 1" in out.splitlines()[-1]
+	assert len(writer.rows) == 20
+
+
+def _dist_client(port, token):
+	conn = intrudr.DistConnection(socket.create_connection(("127.0.0.1", port), timeout=5))
+	conn.send({"type": "hello", "token": token, "name": "test"})
+	return conn, conn.recv()[0]
+
+
+def test_coordinator_requeues_a_dropped_workers_lease(monkeypatch):
+	port = _free_port()
+	for name, value in {"DIST_LISTEN": f"127.0.0.1:{port}", "DIST_TOKEN": "t", "DIST_LEASE_SIZE": 4, "TARGET_RPS": 0, "THROTTLE_SECONDS": 0}.items():
+		monkeypatch.setattr(intrudr, name, value)
+	notes = []
+	coord = intrudr.Coordinator({"total": 10}, note=notes.append)
+	try:
+		conn, msg = _dist_client(port, "wrong")
+		assert msg == {"type": "error", "error": "bad token"}
+		conn.close()
+
+		first, msg = _dist_client(port, "t")
+		assert msg["type"] == "attack" and msg["definition"] == {"total": 10}
+		first.send({"type": "lease"})
+		assert first.recv()[0]["ranges"] == [[1, 4]]
+		first.send({"type": "results", "items": [{"idx": 1, "status": 200}, {"idx": 2, "status": 200}]})
+		first.close()   # leaves with 3 and 4 unfinished
+
+		second, _ = _dist_client(port, "t")
+		deadline = time.time() + 5
+		while not coord.lost and time.time() < deadline:
+			time.sleep(0.02)
+		leases = []
+		for _ in range(3):
+			second.send({"type": "lease"})
+			leases.append(second.recv()[0].get("ranges"))
+		assert leases == [[[3, 6]], [[7, 10]], None]   # the re-queued 3 and 4 go out first
+		second.send({"type": "results", "items": [{"idx": i, "status": 200} for i in (2, *range(3, 11))]})
+		second.close()
+		assert sorted(idx for idx, _ in coord.results()) == list(range(1, 11))
+		assert (coord.lost, coord.releases, coord.duplicates) == (1, 2, 1)
+	finally:
+		coord.close()
+
+
+def _row(idx, status=200, body="same", length=None):
+	res = {"idx": idx, "combo_frag": f"q-{idx}", "status": status, "length": len(body) if length is None else length, "error": "", "time": 0.1}
+	if status is None:
+		res.update(error="Failed (reset): boom", length=0)
+	else:
+		res["body_hash"] = intrudr._body_hash(body.encode())
+	return res
+
+
+def test_diff_reports_every_kind(tmp_path):
+	a, b = str(tmp_path / "a"), str(tmp_path / "b")
+	_write_run(a, [[_row(1), _row(2), _row(3), _row(4), _row(5, None), _row(6), _row(7)]])
+	_write_run(b, [[_row(1), _row(2, 500), _row(3, body="longer"), _row(4, body="diff"), _row(5), _row(6, None), _row(8)]])
+	changes = intrudr.diff_runs(intrudr.RunMeta(a), intrudr.RunMeta(b))
+	assert [(kind, params) for kind, params, _, _ in changes] == [("status", "q-2"), ("length", "q-3"), ("body", "q-4"), ("fixed", "q-5"), ("new_error", "q-6"), ("only_b", "q-8"), ("only_a", "q-7")]
+
+
+def test_diff_reads_the_results_db_first(tmp_path, monkeypatch):
+	monkeypatch.setattr(intrudr, "RESULTS_DB", "results.db")
+	run = str(tmp_path / "run")
+	os.makedirs(run)
+	summary = os.path.join(run, intrudr.SUMMARY_FILENAME)
+	with open(summary, "w", encoding="utf-8", newline="") as fh:
+		csv.writer(fh).writerow(intrudr.SUMMARY_HEADER)
+	writer = intrudr.ResultWriter(summary, intrudr.open_result_store(run), os.path.join(run, "results.db"))
+	for idx in range(1, 4):
+		writer.put(_row(idx), None, matched=False)
+	writer.close()
+	meta = intrudr.RunMeta(run)
+	assert meta.source == "results.db" and len(meta) == 3 and meta.status[meta.pos["q-2"]] == 200
+
+
+def test_large_body_is_chained_from_shared_pieces(tmp_path, monkeypatch):
+	monkeypatch.setattr(intrudr, "LARGE_BODY_BYTES", 1024)
+	monkeypatch.setattr(intrudr, "SHARED_SEGMENTS", {})
+	blob = "B" * 200_000
+	body = f"--x\r\nContent-Disposition: form-data; name=\"f\"\r\n\r\n{blob}\r\n--x\r\nname=^^user^^\r\n--x--\r\n"
+	headers = {"Host": "h", "Content-Type": "multipart/form-data; boundary=x"}
+	chained = intrudr.RequestTemplate("POST", "/up", headers, body, ["PH1"], ["user"])
+	monkeypatch.setattr(intrudr, "LARGE_BODY_BYTES", 0)
+	plain = intrudr.RequestTemplate("POST", "/up", headers, body, ["PH1"], ["user"])
+	bodies = [chained.render((u,), "ua")[2] for u in ("alice", "bob")]
+	assert all(isinstance(b, intrudr.ChainedBytes) for b in bodies)
+	assert [bytes(b) for b in bodies] == [plain.render((u,), "ua")[2].encode() for u in ("alice", "bob")]
+	shared = [p for p in bodies[0].parts if isinstance(p, str)]
+	assert shared and shared == [p for p in bodies[1].parts if isinstance(p, str)]
+	assert len(pickle.dumps(bodies[0])) < 1000   # shared pieces travel as keys
+
+	writer = intrudr.ArchiveWriter(str(tmp_path))
+	for idx, b in enumerate(bodies, start=1):
+		writer.save({"idx": idx, "status": None, "raw_bytes": b})
+	writer.close()
+	size = os.path.getsize(tmp_path / intrudr.ARCHIVE_DIRNAME / "segment_00000.bin")
+	assert len(blob) < size < 2 * len(blob)   # the template piece is stored once per run
+	reader = intrudr.ArchiveReader(str(tmp_path))
+	assert [bytes(reader.get(i, intrudr.ARCHIVE_REQUEST)) for i in (1, 2)] == [bytes(b) for b in bodies]
+	reader.close()